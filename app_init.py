@@ -1,26 +1,84 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from config import Config # Import from root config.py
-
-db = SQLAlchemy()
-migrate = Migrate()
-
-def create_app(config_class=Config):
-    # Adjusted static_folder to point from root to app/dist
-    app = Flask(__name__, static_folder='app/dist', static_url_path='') 
-    app.config.from_object(config_class)
-
-    db.init_app(app)
-    migrate.init_app(app, db)
-
-    # Import models from the new models directory
-    # To make this work, models/models.py will need to be importable.
-    # We might need an __init__.py in the models directory.
-    from models import models # Import from models.models
-
-    # Register Blueprints here if you add them later
-    # from .api import bp as api_bp # This would need adjustment too
-    # app.register_blueprint(api_bp, url_prefix='/api')
-
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from config import Config # Import from root config.py
+
+db = SQLAlchemy()
+migrate = Migrate()
+
+def sqlite_profile(app):
+    """Returns the configured SQLite profile, or None if the database isn't a file-backed SQLite DB."""
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return app.config['SQLITE_PROFILES'][app.config['SQLITE_PROFILE']]
+
+def apply_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return on_connect
+
+def create_app(config_class=Config):
+    # The frontend build (app/dist) is served by static_files.py, not Flask's static route
+    app = Flask(__name__, static_folder=None)
+    app.config.from_object(config_class)
+
+    profile = sqlite_profile(app)
+    if profile:
+        # Explicit SQLALCHEMY_ENGINE_OPTIONS in the config win over the profile's
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**profile['engine_options'], **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
+    from json_provider import init_json_provider
+    init_json_provider(app)
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+
+    if profile and profile['pragmas']:
+        with app.app_context():
+            event.listen(db.engine, 'connect', apply_sqlite_pragmas(profile['pragmas']))
+
+    from instrumentation import init_instrumentation
+    init_instrumentation(app, db)
+
+    from compression import init_compression
+    init_compression(app)
+
+    # Import models from the new models directory
+    # To make this work, models/models.py will need to be importable.
+    # We might need an __init__.py in the models directory.
+    from models import models # Import from models.models
+
+    from change_tracking import init_change_tracking
+    init_change_tracking()
+
+    from settings_cache import init_settings_cache
+    init_settings_cache(app)
+
+    from events import init_events
+    init_events(app)
+
+    from static_files import init_static
+    init_static(app)
+
+    # Full-text search index (FTS5 tables and triggers, built alongside db.create_all())
+    from search import init_search
+    init_search(app)
+
+    from completion_stats import init_completion_stats
+    init_completion_stats(app)
+
+    # Background jobs (nightly recurring-instance top up)
+    from scheduler import init_scheduler
+    init_scheduler(app)
+
+    # Register Blueprints here if you add them later
+    # from .api import bp as api_bp # This would need adjustment too
+    # app.register_blueprint(api_bp, url_prefix='/api')
+
     return app 
\ No newline at end of file
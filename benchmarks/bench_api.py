@@ -0,0 +1,203 @@
+"""
+End-to-end benchmark of the task API: seeds a synthetic dataset into a throwaway SQLite
+database, drives the real Flask app through its test client and reports latency percentiles,
+SQL query counts, peak Python memory and response size per endpoint, plus the same for
+generate_task_instances.
+
+    python benchmarks/bench_api.py [--definitions 500 --years 3 ...] [--output results.json]
+    python benchmarks/bench_api.py --compare baseline.json --output current.json
+
+Results are written as JSON (stdout when --output is omitted); --compare prints the p50/p95
+change against an earlier results file and exits non-zero when any exceeds --max-regression.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# run.py builds its app from Config at import time, so point it at a throwaway database first
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_api.db')
+os.environ['SCHEDULER_ENABLED'] = '0'
+
+from sqlalchemy import event
+
+from run import app, bootstrap_settings, db
+from instrumentation import percentile
+from models.models import Asset, TaskDefinition
+from services import generate_task_instances, get_generation_limits
+from synthetic import seed_dataset
+
+ENDPOINTS = [
+    ('bootstrap', '/api/bootstrap', {}),
+    ('task_instances', '/api/task_instances', {}),
+    ('task_instances_pending', '/api/task_instances?status=Pending,Overdue', {}),
+    ('task_instances_page', '/api/task_instances?limit=100', {}),
+    ('task_instances_stream', '/api/task_instances?stream=1', {}),
+    ('task_definitions', '/api/task_definitions', {}),
+    ('assets', '/api/assets', {}),
+    ('asset_history', '/api/assets/{asset_id}/completed_task_instances', {}),
+    ('asset_history_page', '/api/assets/{asset_id}/completed_task_instances?limit=50', {}),
+    ('categories', '/api/categories', {}),
+    ('settings', '/api/settings', {}),
+    ('completion_statistics', '/api/statistics/completions?group_by=category,asset', {}),
+    ('task_instances_304', '/api/task_instances', {'conditional': True}),
+]
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+def summarize(name, samples, queries, peak_bytes, extra=None):
+    samples = sorted(samples)
+    result = {
+        'name': name,
+        'iterations': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'queries': queries,
+        'peak_kib': round(peak_bytes / 1024, 1)
+    }
+    result.update(extra or {})
+    return result
+
+def measure(fn, iterations, counter):
+    """Runs fn once for warm-up, iterations times for timing and once more under tracemalloc."""
+    fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+
+    counter.count = 0
+    tracemalloc.start()
+    value = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return samples, counter.count, peak, value
+
+def bench_endpoints(app, client, counter, iterations):
+    with app.app_context():
+        # Asset with the most definitions, so its history is the interesting case
+        asset_id = max(Asset.query.all(), key=lambda asset: asset.task_definitions.count()).id
+    results = []
+    for name, path, options in ENDPOINTS:
+        path = path.format(asset_id=asset_id)
+        headers = {}
+        if options.get('conditional'):
+            headers['If-None-Match'] = client.get(path).headers['ETag']
+
+        def request():
+            response = client.get(path, headers=headers)
+            body = response.get_data() # Drains streamed bodies too
+            return response.status_code, len(body)
+
+        samples, queries, peak, (status, size) = measure(request, iterations, counter)
+        results.append(summarize(name, samples, queries, peak, {'path': path, 'status': status, 'bytes': size}))
+    return results
+
+def bench_generation(app, counter, iterations):
+    results = []
+    with app.app_context():
+        definition_ids = [td.id for td in TaskDefinition.query.filter(TaskDefinition.recurrence_rule.has()).limit(iterations + 2)]
+        limits = get_generation_limits()
+        for name, is_new in (('generate_task_instances_topup', True), ('generate_task_instances_regenerate', False)):
+            ids = iter(definition_ids * 2)
+
+            def generate():
+                task_def = db.session.get(TaskDefinition, next(ids))
+                created = generate_task_instances(task_def, is_new_definition=is_new, limits=limits)
+                db.session.commit()
+                return created
+
+            samples, queries, peak, _ = measure(generate, iterations, counter)
+            results.append(summarize(name, samples, queries, peak))
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline, current, max_regression):
+    previous = {result['name']: result for result in baseline['results']}
+    regressed = False
+    print(f"{'benchmark':<36} {'p50 ms':>10} {'change':>8} {'p95 ms':>10} {'change':>8} {'queries':>9}", file=sys.stderr)
+    for result in current['results']:
+        before = previous.get(result['name'])
+        if not before:
+            continue
+        ratios = [result[key] / before[key] if before[key] else 1.0 for key in ('p50_ms', 'p95_ms')]
+        regressed |= any(ratio > max_regression for ratio in ratios)
+        print(f"{result['name']:<36} {result['p50_ms']:>10.2f} {ratios[0]:>7.2f}x {result['p95_ms']:>10.2f} {ratios[1]:>7.2f}x "
+              f"{before['queries']:>4}->{result['queries']:<4}", file=sys.stderr)
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the task API against a synthetic dataset.')
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--assets', type=int, default=50)
+    parser.add_argument('--definitions', type=int, default=500)
+    parser.add_argument('--years', type=int, default=3, help='Years of completed history per recurring definition')
+    parser.add_argument('--monthly-share', type=float, default=0.4, help='Share of definitions that recur monthly')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', help='Write results JSON here instead of stdout')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    parser.add_argument('--max-regression', type=float, default=1.25, help='Allowed p50/p95 ratio for --compare')
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    with app.app_context():
+        db.create_all()
+        bootstrap_settings()
+        event.listen(db.engine, 'before_cursor_execute', counter)
+        started = time.perf_counter()
+        dataset = seed_dataset(categories=args.categories, assets=args.assets, definitions=args.definitions,
+                               years=args.years, monthly_share=args.monthly_share, seed=args.seed)
+        dataset['seed_seconds'] = round(time.perf_counter() - started, 2)
+
+    client = app.test_client()
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'json_provider': type(app.json).__name__,
+            'iterations': args.iterations,
+            'dataset': dataset
+        },
+        'results': bench_endpoints(app, client, counter, args.iterations) + bench_generation(app, counter, args.iterations)
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.max_regression):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: CPU cost against bytes saved for each gzip level (and brotli quality, when the
+brotli package is installed) on real API payloads, used to choose COMPRESSION_GZIP_LEVEL.
+
+    python benchmarks/bench_compression.py [--definitions 500 --years 3] [--link-mbps 10] [--json]
+
+Seeds the synthetic dataset into a throwaway SQLite database, fetches the larger endpoints
+uncompressed through the test client, then times compression.compress (compress_stream for the
+streamed list) on those bodies. Timings are the best of --repeat runs. Run it on the target
+machine (a Raspberry Pi); elsewhere, --cpu-scale multiplies the CPU times to approximate a
+slower CPU. 'est_ms' adds the time to send the compressed bytes at --link-mbps, and the level
+with the lowest est_ms is reported as the best trade-off for that link.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# run.py builds its app from Config at import time, so point it at a throwaway database first
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_compression.db')
+os.environ['SCHEDULER_ENABLED'] = '0'
+
+from run import app, bootstrap_settings, db
+from compression import brotli, compress, compress_stream
+from synthetic import seed_dataset
+
+PAYLOADS = [
+    ('bootstrap', '/api/bootstrap'),
+    ('task_instances', '/api/task_instances'),
+    ('task_instances_pending', '/api/task_instances?status=Pending,Overdue'),
+    ('task_instances_page', '/api/task_instances?limit=100'),
+    ('task_definitions', '/api/task_definitions'),
+    ('assets', '/api/assets'),
+    ('completion_statistics', '/api/statistics/completions?group_by=category,asset')
+]
+STREAMED_PAYLOAD = ('task_instances_stream', '/api/task_instances?stream=1')
+
+def fetch_payloads(client):
+    """{name: list of body chunks}; one chunk for buffered responses, the stream's chunks otherwise."""
+    payloads = {}
+    for name, path in PAYLOADS:
+        payloads[name] = [client.get(path).get_data()]
+    name, path = STREAMED_PAYLOAD
+    response = client.get(path, buffered=False)
+    payloads[name] = list(response.iter_encoded())
+    response.close()
+    return payloads
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def bench_level(payloads, encoding, level, repeat):
+    size = compressed = seconds = 0.0
+    for chunks in payloads.values():
+        if len(chunks) == 1:
+            elapsed, output = best_of(repeat, lambda: compress(chunks[0], encoding, level))
+        else:
+            elapsed, output = best_of(repeat, lambda: b''.join(compress_stream(chunks, encoding, level)))
+        size += sum(len(chunk) for chunk in chunks)
+        compressed += len(output)
+        seconds += elapsed
+    return size, compressed, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--assets', type=int, default=50)
+    parser.add_argument('--definitions', type=int, default=500)
+    parser.add_argument('--years', type=int, default=3, help='Years of completed history per recurring definition')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cpu-scale', type=float, default=1.0,
+                        help='Multiply CPU times by this, e.g. to approximate a Pi when running on a faster machine')
+    parser.add_argument('--link-mbps', type=float, default=10.0, help='Link speed used for est_ms')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON instead of a table')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        bootstrap_settings()
+        seed_dataset(categories=args.categories, assets=args.assets, definitions=args.definitions,
+                     years=args.years, seed=args.seed)
+    payloads = fetch_payloads(app.test_client())
+
+    levels = [('identity', 0)] + [('gzip', level) for level in range(1, 10)]
+    if brotli is not None:
+        levels += [('br', quality) for quality in range(0, 12)]
+    results = []
+    for encoding, level in levels:
+        if encoding == 'identity':
+            size = compressed = sum(len(chunk) for chunks in payloads.values() for chunk in chunks)
+            seconds = 0.0
+        else:
+            size, compressed, seconds = bench_level(payloads, encoding, level, args.repeat)
+        cpu_ms = seconds * 1000 * args.cpu_scale
+        transfer_ms = compressed * 8 / (args.link_mbps * 1000)
+        results.append({
+            'encoding': encoding, 'level': level, 'bytes': int(size), 'compressed_bytes': int(compressed),
+            'ratio': round(size / compressed, 2), 'cpu_ms': round(cpu_ms, 2),
+            'mb_per_s': round(size / 1e6 / (cpu_ms / 1000), 1) if cpu_ms else None,
+            'est_ms': round(cpu_ms + transfer_ms, 2)
+        })
+    best = {}
+    for result in results:
+        if result['encoding'] != 'identity' and (result['encoding'] not in best or
+                                                 result['est_ms'] < best[result['encoding']]['est_ms']):
+            best[result['encoding']] = result
+
+    if args.json:
+        print(json.dumps({
+            'meta': {'platform': platform.platform(), 'machine': platform.machine(), 'python': platform.python_version(),
+                     'cpu_scale': args.cpu_scale, 'link_mbps': args.link_mbps,
+                     'payloads': {name: sum(len(chunk) for chunk in chunks) for name, chunks in payloads.items()}},
+            'results': results,
+            'best': {encoding: result['level'] for encoding, result in best.items()}
+        }, indent=2))
+        return
+    print(f"{len(payloads)} payloads, {results[0]['bytes']} bytes; {platform.machine()}, "
+          f"cpu scale {args.cpu_scale}, link {args.link_mbps} Mbit/s")
+    print(f"{'encoding':>8} {'level':>5} {'bytes':>10} {'ratio':>6} {'cpu_ms':>8} {'MB/s':>7} {'est_ms':>8}")
+    for r in results:
+        print(f"{r['encoding']:>8} {r['level']:>5} {r['compressed_bytes']:>10} {r['ratio']:>6.2f} {r['cpu_ms']:>8.2f} "
+              f"{r['mb_per_s'] or 0:>7.1f} {r['est_ms']:>8.2f}")
+    for encoding, result in best.items():
+        print(f"Lowest est_ms for {encoding}: level {result['level']}")
+
+if __name__ == '__main__':
+    main()
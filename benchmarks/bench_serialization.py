@@ -0,0 +1,104 @@
+"""
+Micro-benchmark: ORM to_dict() vs. the column-projection serializers in models/serializers.py,
+each encoded with the stdlib json module and with orjson (when installed).
+
+    python benchmarks/bench_serialization.py [--sizes 1000 10000 100000] [--repeat 3] [--json]
+
+Runs against a throwaway SQLite database; nothing in the configured DATABASE_URL is touched.
+Timings are the best of --repeat runs and cover query + serialization + encoding.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import delete, insert
+
+from app_init import create_app, db
+from config import Config
+from json_provider import OrjsonProvider, orjson
+from models.models import Asset, Category, TaskDefinition, TaskInstance
+from models.serializers import instance_row_to_dict, instance_rows
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_serialization.db')
+    SCHEDULER_ENABLED = False
+
+def seed_instances(count, definitions=50):
+    db.session.execute(delete(TaskInstance))
+    if not TaskDefinition.query.count():
+        db.session.add(Category(short_name='Home', icon='H'))
+        asset = Asset(name='House')
+        db.session.add(asset)
+        db.session.flush()
+        db.session.add_all([TaskDefinition(title=f'Task {i}', description='Short description', notes='Longer notes',
+                                           category_short_name='Home', priority='Medium', asset_id=asset.id)
+                            for i in range(definitions)])
+        db.session.flush()
+    definition_ids = [td.id for td in TaskDefinition.query.all()]
+    start = datetime(2020, 1, 1)
+    rows = [{
+        'task_definition_id': definition_ids[i % len(definition_ids)],
+        'due_date': start + timedelta(days=i // len(definition_ids)),
+        'completion_date': start + timedelta(days=i // len(definition_ids)) if i % 3 == 0 else None,
+        'status': 'Completed' if i % 3 == 0 else 'Pending'
+    } for i in range(count)]
+    db.session.execute(insert(TaskInstance), rows)
+    db.session.commit()
+
+def orm_to_dict():
+    return [i.to_dict() for i in TaskInstance.query_with_details().order_by(TaskInstance.due_date, TaskInstance.id)]
+
+def projected():
+    return [instance_row_to_dict(row) for row in instance_rows().order_by(TaskInstance.due_date, TaskInstance.id)]
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        db.session.remove() # Fresh session each run: no identity map left over from the last one
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON instead of a table')
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    encoders = {'json': DefaultJSONProvider(app)}
+    if orjson is not None:
+        encoders['orjson'] = OrjsonProvider(app)
+
+    results = []
+    with app.app_context():
+        db.create_all()
+        for size in args.sizes:
+            seed_instances(size)
+            for path, build in (('to_dict', orm_to_dict), ('projected', projected)):
+                for encoder_name, encoder in encoders.items():
+                    seconds = best_of(args.repeat, lambda: encoder.dumps(build()))
+                    results.append({'instances': size, 'path': path, 'encoder': encoder_name,
+                                    'seconds': round(seconds, 4), 'per_row_us': round(seconds / size * 1e6, 2)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    baseline = {r['instances']: r['seconds'] for r in results if r['path'] == 'to_dict' and r['encoder'] == 'json'}
+    print(f"{'instances':>10} {'path':>10} {'encoder':>8} {'seconds':>9} {'us/row':>8} {'speedup':>8}")
+    for r in results:
+        print(f"{r['instances']:>10} {r['path']:>10} {r['encoder']:>8} {r['seconds']:>9.4f} {r['per_row_us']:>8.2f} "
+              f"{baseline[r['instances']] / r['seconds']:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
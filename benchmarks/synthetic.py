@@ -0,0 +1,92 @@
+"""
+Synthetic dataset generator for the benchmarks: categories, assets, a weekly/monthly mix of
+recurring definitions plus some one-off ones, years of completed history and the usual
+future horizon of pending instances. Deterministic for a given seed.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from app_init import db
+from completion_stats import rebuild_completion_stats
+from models.models import Asset, Category, RecurrenceRule, TaskDefinition, TaskInstance
+from recurrence import Recurrence, due_dates
+from services import generate_task_instances, get_generation_limits
+
+PRIORITIES = ['Urgent', 'High', 'Medium', 'Low']
+
+def seed_dataset(categories=10, assets=50, definitions=500, years=3, monthly_share=0.4,
+                 one_off_share=0.1, completion_rate=0.9, seed=1):
+    """
+    Seeds the current app's database and commits. Returns a dict describing what was created.
+    Must be called inside an app context on an empty schema.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    history_start = today - timedelta(days=365 * years)
+
+    category_names = [f'cat{i}' for i in range(categories)]
+    db.session.add_all([Category(short_name=name, icon='*') for name in category_names])
+    asset_rows = [Asset(name=f'Asset {i}', description=f'Synthetic asset {i}') for i in range(assets)]
+    db.session.add_all(asset_rows)
+    db.session.flush()
+
+    task_defs = []
+    for i in range(definitions):
+        task_def = TaskDefinition(
+            title=f'Task {i}',
+            description=f'Synthetic task {i}',
+            notes='Lorem ipsum dolor sit amet. ' * rng.randint(0, 5),
+            category_short_name=rng.choice(category_names) if category_names else None,
+            priority=rng.choice(PRIORITIES),
+            asset_id=rng.choice(asset_rows).id if asset_rows and rng.random() < 0.7 else None
+        )
+        kind = rng.random()
+        if kind < one_off_share:
+            task_def.due_date = datetime.combine(today + timedelta(days=rng.randint(-30, 180)), datetime.min.time())
+        elif kind < one_off_share + monthly_share:
+            task_def.recurrence_rule = RecurrenceRule(rule_type='monthly', monthly_recurring_day=rng.randint(1, 31))
+        else:
+            task_def.recurrence_rule = RecurrenceRule(rule_type='weekly', weekly_recurring_day=rng.randint(1, 7))
+        task_defs.append(task_def)
+    db.session.add_all(task_defs)
+    db.session.flush()
+
+    # Past occurrences: mostly completed (a day or two late at most), the rest left overdue
+    history = []
+    yesterday = today - timedelta(days=1)
+    for task_def in task_defs:
+        if not task_def.recurrence_rule:
+            continue
+        for due_date in due_dates(Recurrence.from_rule(task_def.recurrence_rule), history_start, yesterday):
+            if rng.random() < completion_rate:
+                history.append({'task_definition_id': task_def.id, 'due_date': due_date, 'occurrence_date': due_date, 'status': 'Completed',
+                                'completion_date': due_date + timedelta(hours=rng.randint(0, 48))})
+            else:
+                history.append({'task_definition_id': task_def.id, 'due_date': due_date, 'occurrence_date': due_date, 'status': 'Overdue',
+                                'completion_date': None})
+    for start in range(0, len(history), 5000):
+        db.session.execute(insert(TaskInstance), history[start:start + 5000])
+
+    # Future horizon, generated the way the API does it
+    limits = get_generation_limits()
+    pending = 0
+    for task_def in task_defs:
+        if task_def.recurrence_rule:
+            pending += generate_task_instances(task_def, limits=limits)
+        elif task_def.due_date:
+            db.session.add(TaskInstance(task_definition_id=task_def.id, due_date=task_def.due_date, status='Pending'))
+            pending += 1
+    rebuild_completion_stats() # History was inserted in bulk, around the incremental updates
+    db.session.commit()
+
+    return {
+        'categories': categories,
+        'assets': assets,
+        'definitions': definitions,
+        'years': years,
+        'seed': seed,
+        'history_instances': len(history),
+        'pending_instances': pending
+    }
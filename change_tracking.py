@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+from sqlalchemy import event, false, inspect, insert, select, update
+from app_init import db
+
+# Tables whose changes are counted; table_version itself is excluded to avoid recursion
+TRACKED_TABLES = {'asset', 'category', 'completion_stat', 'recurrence_rule', 'task_definition', 'task_instance', 'task_instance_history', 'setting'}
+# Tables whose rows carry a change_version stamp and get tombstones on delete (served by /api/changes)
+VERSIONED_TABLES = {'asset', 'category', 'task_definition', 'task_instance', 'setting'}
+GLOBAL_VERSION_ROW = '_global'
+
+def _changed_tables(session):
+    return session.info.setdefault('changed_tables', set())
+
+def _row_key(obj):
+    return str(inspect(obj).identity[0])
+
+def allocate_change_version(session):
+    """
+    Returns the change version for the current transaction, allocating it on first use by bumping
+    the global counter. The UPDATE takes the write lock, so versions are handed out in commit order.
+    """
+    version = session.info.get('change_version')
+    if version is not None:
+        return version
+    from models.models import TableVersion
+    connection = session.connection()
+    result = connection.execute(
+        update(TableVersion.__table__).where(TableVersion.table_name == GLOBAL_VERSION_ROW)
+        .values(version=TableVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(TableVersion.__table__).values(table_name=GLOBAL_VERSION_ROW, version=1))
+    version = connection.execute(
+        select(TableVersion.version).where(TableVersion.table_name == GLOBAL_VERSION_ROW)
+    ).scalar_one()
+    session.info['change_version'] = version
+    return version
+
+def _record_tombstones(session, table_name, row_keys):
+    if not row_keys:
+        return
+    from models.models import ChangeTombstone
+    version = allocate_change_version(session)
+    session.connection().execute(
+        insert(ChangeTombstone.__table__),
+        [{'table_name': table_name, 'row_key': str(key), 'change_version': version} for key in row_keys]
+    )
+
+def _before_flush(session, flush_context, instances):
+    changed = _changed_tables(session)
+    stamped = set()
+    for obj in session.new:
+        changed.add(obj.__table__.name)
+        stamped.add(obj)
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        changed.add(obj.__table__.name)
+        if obj.__table__.name == 'recurrence_rule':
+            # A rule edit is a change to its definition; the nightly job's watermark updates are not
+            modified = {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+            if modified - {'generated_through'} and obj.task_definition is not None:
+                stamped.add(obj.task_definition)
+                changed.add('task_definition')
+        else:
+            stamped.add(obj)
+    deleted_keys = {}
+    for obj in session.deleted:
+        changed.add(obj.__table__.name)
+        if obj.__table__.name in VERSIONED_TABLES:
+            deleted_keys.setdefault(obj.__table__.name, []).append(_row_key(obj))
+    changed &= TRACKED_TABLES
+
+    stamped = [obj for obj in stamped if obj.__table__.name in VERSIONED_TABLES and obj not in session.deleted]
+    if stamped or deleted_keys:
+        version = allocate_change_version(session)
+        for obj in stamped:
+            obj.change_version = version
+        for table_name, keys in deleted_keys.items():
+            _record_tombstones(session, table_name, keys)
+
+def _do_orm_execute(orm_execute_state):
+    # Bulk statements (query.update/delete, Core inserts through the session) bypass the flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    session = orm_execute_state.session
+    statement = orm_execute_state.statement
+    table = statement.table
+    if table.name not in TRACKED_TABLES:
+        return
+    if table.name not in VERSIONED_TABLES or orm_execute_state.is_insert:
+        _changed_tables(session).add(table.name)
+        if table.name in VERSIONED_TABLES:
+            orm_execute_state.statement = statement.values(change_version=allocate_change_version(session))
+        return
+
+    # Look up the rows first: a statement matching nothing (e.g. the day's overdue marking on a
+    # quiet day) must not allocate a version, or a read would report a version that is rolled
+    # back and then reused by the next write. It is then narrowed to match nothing for certain,
+    # so a row written by someone else in between can't be changed without a stamp
+    pk_column = table.primary_key.columns.values()[0]
+    query = select(pk_column)
+    if statement.whereclause is not None:
+        query = query.where(statement.whereclause)
+    if orm_execute_state.is_delete:
+        # Record what is about to disappear so /api/changes can report it
+        keys = session.connection().execute(query).scalars().all()
+        if not keys:
+            orm_execute_state.statement = statement.where(false())
+            return
+        _changed_tables(session).add(table.name)
+        _record_tombstones(session, table.name, keys)
+        return
+    if session.connection().execute(query.limit(1)).first() is None:
+        orm_execute_state.statement = statement.where(false())
+        return
+    _changed_tables(session).add(table.name)
+    orm_execute_state.statement = statement.values(change_version=allocate_change_version(session))
+
+def _before_commit(session):
+    session.flush() # before_commit runs ahead of the final flush; make sure pending objects are counted
+    changed = session.info.pop('changed_tables', None)
+    if not changed:
+        return
+    from models.models import TableVersion
+    version = allocate_change_version(session)
+    now = datetime.now(timezone.utc)
+    connection = session.connection()
+    for table_name in sorted(changed): # Fixed order keeps concurrent writers from deadlocking on non-SQLite backends
+        result = connection.execute(
+            update(TableVersion.__table__).where(TableVersion.table_name == table_name)
+            .values(version=version, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(TableVersion.__table__).values(table_name=table_name, version=version, updated_at=now))
+
+def _reset(session, *args):
+    session.info.pop('changed_tables', None)
+    session.info.pop('change_version', None)
+
+def init_change_tracking():
+    """
+    Registers the session hooks that stamp change versions on rows, keep tombstones for deletes
+    and bump table_version on every commit that changes a tracked table.
+    """
+    if event.contains(db.session, 'before_commit', _before_commit):
+        return
+    event.listen(db.session, 'before_flush', _before_flush)
+    event.listen(db.session, 'do_orm_execute', _do_orm_execute)
+    event.listen(db.session, 'before_commit', _before_commit)
+    event.listen(db.session, 'after_commit', _reset)
+    event.listen(db.session, 'after_rollback', _reset)
+
+def get_table_versions(table_names):
+    """Returns {table_name: (version, updated_at)} for the given tables in a single query."""
+    from models.models import TableVersion
+    rows = db.session.execute(
+        select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.table_name.in_(table_names))
+    )
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+def get_current_version():
+    from models.models import TableVersion
+    return db.session.execute(
+        select(TableVersion.version).where(TableVersion.table_name == GLOBAL_VERSION_ROW)
+    ).scalar() or 0
@@ -0,0 +1,173 @@
+from collections import Counter, defaultdict
+import click
+from sqlalchemy import delete, func, insert, literal, select, union_all, update
+from app_init import db
+from change_tracking import allocate_change_version
+from models.models import CompletionStat, TaskDefinition, TaskInstance, TaskInstanceHistory
+
+PERIODS = ('day', 'month')
+COUNTERS = ('completed', 'on_time', 'late', 'lateness_days', 'skipped')
+GROUP_BY_FIELDS = {'category': CompletionStat.category_short_name, 'asset': CompletionStat.asset_id}
+
+def period_start(period, day):
+    return day if period == 'day' else day.replace(day=1)
+
+def _contribution(status, due_date, completion_date):
+    # What one resolved instance adds to the counters of its periods
+    if status == 'Skipped':
+        return {'skipped': 1}
+    if completion_date is None: # Completed before completion dates were recorded
+        return {'completed': 1}
+    days_late = (completion_date.date() - due_date.date()).days
+    if days_late > 0:
+        return {'completed': 1, 'late': 1, 'lateness_days': days_late}
+    return {'completed': 1, 'on_time': 1}
+
+def _resolved_rows(instance_ids=None, definitions=None):
+    """
+    (category, asset_id, status, due_date, completion_date) of the resolved instances among
+    instance_ids, or of the live and archived instances of the definitions matching the
+    definitions criterion.
+    """
+    live = select(
+        TaskDefinition.category_short_name, TaskDefinition.asset_id, TaskInstance.status,
+        TaskInstance.due_date, TaskInstance.completion_date
+    ).join(TaskDefinition, TaskInstance.task_definition_id == TaskDefinition.id).where(
+        TaskInstance.status.in_(['Completed', 'Skipped'])
+    )
+    if instance_ids is not None:
+        return db.session.execute(live.where(TaskInstance.id.in_(instance_ids)))
+    archived = select(
+        TaskDefinition.category_short_name, TaskDefinition.asset_id, literal('Completed'),
+        TaskInstanceHistory.due_date, TaskInstanceHistory.completion_date
+    ).join(TaskDefinition, TaskInstanceHistory.task_definition_id == TaskDefinition.id)
+    if definitions is not None:
+        live = live.where(definitions)
+        archived = archived.where(definitions)
+    return db.session.execute(union_all(live, archived).execution_options(yield_per=2000))
+
+def aggregate(rows):
+    """Rollup counters of rows, keyed by (period, period_start, category, asset_id)."""
+    totals = defaultdict(Counter)
+    for category, asset_id, status, due_date, completion_date in rows:
+        contribution = _contribution(status, due_date, completion_date)
+        for period in PERIODS:
+            totals[(period, period_start(period, due_date.date()), category, asset_id)].update(contribution)
+    return totals
+
+def _key_filter(period, start, category, asset_id):
+    return (
+        CompletionStat.period == period,
+        CompletionStat.period_start == start,
+        CompletionStat.category_short_name.is_not_distinct_from(category),
+        CompletionStat.asset_id.is_not_distinct_from(asset_id)
+    )
+
+def _apply_deltas(deltas):
+    # Same update-then-insert pattern as the table_version counters: the UPDATE takes SQLite's
+    # write lock, so two requests can't both insert the same row
+    for (period, start, category, asset_id), delta in deltas.items():
+        result = db.session.execute(
+            update(CompletionStat).where(*_key_filter(period, start, category, asset_id))
+            .values({name: getattr(CompletionStat, name) + delta[name] for name in COUNTERS if delta[name]})
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(CompletionStat).values(
+                period=period, period_start=start, category_short_name=category, asset_id=asset_id,
+                **{name: delta[name] for name in COUNTERS}
+            ))
+
+class CompletionStatsChange:
+    """
+    Keeps the rollups in step with a change to some instances: create it before the change
+    (it notes what those instances currently contribute) and call apply() after it, before the
+    commit; only the difference is written. Pass the ids of the instances being changed, or a
+    TaskDefinition criterion for changes to whole definitions (deletes, category/asset moves),
+    which also covers their archived instances.
+    """
+
+    def __init__(self, instance_ids=None, definitions=None):
+        # Take the write lock before reading what the instances contribute: the read, the change
+        # and the counter updates are then one write transaction, so two requests changing the
+        # same instance are serialized instead of both counting from the same before state
+        allocate_change_version(db.session)
+        self.instance_ids = list(instance_ids) if instance_ids is not None else None
+        self.definitions = definitions
+        self.before = aggregate(_resolved_rows(self.instance_ids, self.definitions))
+
+    def apply(self):
+        db.session.flush()
+        after = aggregate(_resolved_rows(self.instance_ids, self.definitions))
+        deltas = {}
+        for key in self.before.keys() | after.keys():
+            delta = Counter(after.get(key, {}))
+            delta.subtract(self.before.get(key, {}))
+            if any(delta.values()):
+                deltas[key] = delta
+        _apply_deltas(deltas)
+        return len(deltas)
+
+def rebuild_completion_stats():
+    """
+    Recomputes every rollup row from the live and archived instances, e.g. after restoring a
+    backup or if the rollups were never built. The caller commits. Returns the rows written.
+    """
+    totals = aggregate(_resolved_rows())
+    db.session.execute(delete(CompletionStat))
+    if totals:
+        db.session.execute(insert(CompletionStat), [
+            {'period': period, 'period_start': start, 'category_short_name': category, 'asset_id': asset_id,
+             **{name: counters[name] for name in COUNTERS}}
+            for (period, start, category, asset_id), counters in totals.items()
+        ])
+    return len(totals)
+
+def _with_rates(row):
+    completed, skipped = row['completed'], row['skipped']
+    row['completion_rate'] = round(completed / (completed + skipped), 4) if completed + skipped else None
+    timed = row['on_time'] + row['late'] # Completions with a known completion date
+    row['on_time_rate'] = round(row['on_time'] / timed, 4) if timed else None
+    row['avg_lateness_days'] = round(row['lateness_days'] / timed, 2) if timed else None
+    return row
+
+def completion_statistics(period, start, end, group_by=()):
+    """
+    Completion statistics for the periods starting between start and end (dates, inclusive),
+    read from the rollups only: 'rows' has one entry per period (and per group_by key),
+    'totals' one per group_by key for the whole range. Rates are over resolved instances:
+    completion_rate = completed / (completed + skipped), on_time_rate = on_time / (on_time + late);
+    avg_lateness_days averages days past due over those completions (on time counts as 0).
+    """
+    keys = [GROUP_BY_FIELDS[field].label(field) for field in group_by]
+    sums = [func.sum(getattr(CompletionStat, name)).label(name) for name in COUNTERS]
+    base = select(*sums).where(
+        CompletionStat.period == period, CompletionStat.period_start >= period_start(period, start),
+        CompletionStat.period_start <= end
+    )
+    resolved = func.sum(CompletionStat.completed + CompletionStat.skipped) > 0 # Rows decremented back to zero stay behind
+    period_key = CompletionStat.period_start.label('period_start')
+    per_period = base.add_columns(period_key, *keys).group_by(period_key, *keys).having(resolved).order_by(period_key, *keys)
+    totals = base.add_columns(*keys).group_by(*keys).having(resolved).order_by(*keys) if keys else base
+
+    def to_dict(row):
+        data = {**row._mapping}
+        if 'period_start' in data:
+            data['period_start'] = data['period_start'].isoformat()
+        return _with_rates({**data, **{name: data[name] or 0 for name in COUNTERS}})
+
+    return {
+        'period': period,
+        'from': period_start(period, start).isoformat(),
+        'to': end.isoformat(),
+        'group_by': list(group_by),
+        'rows': [to_dict(row) for row in db.session.execute(per_period)],
+        'totals': [to_dict(row) for row in db.session.execute(totals)]
+    }
+
+def init_completion_stats(app):
+    @app.cli.command('rebuild-completion-stats')
+    def rebuild_completion_stats_command():
+        """Recomputes the completion statistics rollups from all task instances."""
+        written = rebuild_completion_stats()
+        db.session.commit()
+        click.echo(f"{written} rollup row(s) written")
@@ -0,0 +1,103 @@
+import zlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError: # Optional dependency; without it responses are only gzip-compressed
+    brotli = None
+
+# Worth compressing: text formats. Images, archives etc. are compressed already
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/x-ndjson',
+                      'application/manifest+json', 'application/xml', 'image/svg+xml', 'application/wasm')
+# Server-Sent Events must reach the client as they are written, so they are never compressed
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+def available_encodings():
+    """Content codings this process can produce, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip framing
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks, encoding, level):
+    """
+    Compresses an iterable of byte chunks on the fly. Each chunk is flushed as it is compressed,
+    so a streamed response still reaches the client a chunk at a time rather than all at the end.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, flush, finish = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+    for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+def _levels(config):
+    return {'br': config['COMPRESSION_BROTLI_QUALITY'], 'gzip': config['COMPRESSION_GZIP_LEVEL']}
+
+def _compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith(COMPRESSIBLE_TYPES) and not mimetype.startswith(UNCOMPRESSED_TYPES)
+
+def compress_response(response):
+    """
+    after_request hook: compresses the body with the best coding the client accepts. Left alone:
+    304s and other bodiless or partial responses, bodies already encoded (the pre-compressed
+    static files), non-text types, Cache-Control: no-transform, and bodies under
+    COMPRESSION_MIN_SIZE. Streamed bodies are compressed as they are produced; their size isn't
+    known up front, so the threshold doesn't apply to them.
+    """
+    if (response.status_code < 200 or response.status_code in (204, 206, 304) or request.method == 'HEAD'
+            or 'Content-Encoding' in response.headers or response.cache_control.no_transform
+            or not _compressible(response)):
+        return response
+    config = current_app.config
+    if not response.is_streamed and response.calculate_content_length() < config['COMPRESSION_MIN_SIZE']:
+        return response
+
+    # The body depends on Accept-Encoding from here on, whichever coding is picked
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+    level = _levels(config)[encoding]
+
+    if response.is_streamed:
+        body = response.response
+        response.response = compress_stream(response.iter_encoded(), encoding, level)
+        if hasattr(body, 'close'):
+            # Closing the response closes our generator, not the view's (e.g. stream_with_context's,
+            # which holds the request context until it is closed)
+            response.call_on_close(body.close)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compress(response.get_data(), encoding, level))
+    response.headers['Content-Encoding'] = encoding
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # A strong ETag promises these exact bytes, which no longer holds; the weak form still
+        # validates (If-None-Match uses weak comparison), so conditional requests keep working
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_compression(app):
+    """
+    Negotiated response compression (COMPRESSION_ENABLED). Registered after instrumentation, so its
+    after_request hook runs before the timings are taken and its cost shows up in them.
+    """
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+    levels = _levels(app.config)
+    if not 1 <= levels['gzip'] <= 9:
+        raise ValueError(f"COMPRESSION_GZIP_LEVEL must be between 1 and 9, not {levels['gzip']}")
+    if not 0 <= levels['br'] <= 11:
+        raise ValueError(f"COMPRESSION_BROTLI_QUALITY must be between 0 and 11, not {levels['br']}")
+    app.after_request(compress_response)
@@ -1,8 +1,87 @@
-import os
-
-basedir = os.path.abspath(os.path.dirname(__file__))
-
-class Config:
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-        'sqlite:///app.db' # Will create app.db in the root project directory
-    SQLALCHEMY_TRACK_MODIFICATIONS = False 
\ No newline at end of file
+import os
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+class Config:
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
+        'sqlite:///app.db' # Will create app.db in the root project directory
+    SQLALCHEMY_TRACK_MODIFICATIONS = False 
+
+    # SQLite tuning applied by create_app to file databases. 'production' enables WAL (readers
+    # are not blocked by a writer), relaxes fsync to commit boundaries of the WAL and sizes the
+    # connection pool for a single-writer database; 'default' keeps the driver defaults.
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+    SQLITE_PROFILES = {
+        'default': {
+            'pragmas': {},
+            'engine_options': {}
+        },
+        'production': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL', # Safe with WAL: a power cut can lose the last commits, not corrupt the DB
+                'busy_timeout': 5000, # ms to wait for the write lock instead of failing with 'database is locked'
+                'mmap_size': 64 * 1024 * 1024,
+                'cache_size': -8000, # Negative means KiB: ~8 MB page cache per connection
+                'temp_store': 'MEMORY'
+            },
+            'engine_options': {
+                # Only one writer at a time, so a small pool is enough; extra connections mostly add page caches
+                'pool_size': 4,
+                'max_overflow': 4,
+                'pool_timeout': 10
+            }
+        }
+    }
+
+    # Background scheduler (APScheduler); disable with SCHEDULER_ENABLED=0, e.g. for one-off scripts.
+    # It starts with the first request served, in one process only: the one holding SCHEDULER_LOCK_FILE
+    # (default instance/scheduler.lock), so multiple workers don't run the nightly jobs side by side
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+    SCHEDULER_LOCK_FILE = os.environ.get('SCHEDULER_LOCK_FILE')
+    HORIZON_JOB_HOUR = int(os.environ.get('HORIZON_JOB_HOUR', 3)) # Local hour the nightly top up runs
+    # Definitions whose generated instances end within this many days get topped up
+    GENERATION_HORIZON_LEAD_DAYS = int(os.environ.get('GENERATION_HORIZON_LEAD_DAYS', 14))
+    GENERATION_BATCH_SIZE = 200 # Definitions per transaction in the nightly job
+    # Completed instances older than this move to task_instance_history (nightly, after the top up)
+    ARCHIVE_COMPLETED_AFTER_DAYS = int(os.environ.get('ARCHIVE_COMPLETED_AFTER_DAYS', 365))
+    ARCHIVE_BATCH_SIZE = 500 # Instances per transaction when archiving
+
+    # JSON encoder used by jsonify and streamed responses: 'auto' uses orjson when it is installed
+    # and falls back to the stdlib json module; 'orjson' requires it, 'json' forces the stdlib
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+    # Vite build of the frontend, indexed into memory at startup and served by static_files.py
+    STATIC_ROOT = os.environ.get('STATIC_ROOT') or os.path.join(basedir, 'app', 'dist')
+
+    # Response compression (compression.py), negotiated on Accept-Encoding; brotli is used when the
+    # brotli package is installed and the client accepts it. Levels chosen with benchmarks/bench_compression.py:
+    # gzip 3 shrinks API payloads ~14x (level 9: ~20x) for a third of level 6's CPU time, the lowest
+    # compress-and-send time on a Pi-class CPU over a 10 Mbit/s link
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+    COMPRESSION_MIN_SIZE = 1024 # Bytes; smaller bodies fit in a packet or two anyway
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 3))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+    STREAM_CHUNK_SIZE = 500 # Rows fetched (yield_per) and written per chunk by streamed list responses
+
+    # Opt-in request instrumentation (instrumentation.py): per-request query counts and timings in a
+    # Server-Timing header and a JSON log line, rolling per-route stats at /api/debug/metrics and
+    # a sampling profiler for requests sent with ?_profile=1 or 'X-Profile: 1'. Off by default.
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', '0') == '1'
+    # The metrics and profiler expose routes, timings and code paths: without a token they only answer
+    # requests from this machine; with one, only requests sending it in an X-Debug-Token header
+    INSTRUMENTATION_TOKEN = os.environ.get('INSTRUMENTATION_TOKEN')
+    INSTRUMENTATION_WINDOW = 500 # Most recent requests per route kept for the percentiles
+    INSTRUMENTATION_SLOW_MS = int(os.environ.get('INSTRUMENTATION_SLOW_MS', 500)) # Logged as a warning above this
+    INSTRUMENTATION_PROFILE_INTERVAL_MS = 1 # Sampling profiler interval
+
+    # Full-text search (/api/search): matches ranked per type and query. Beyond this only the newest
+    # matches are scored, which bounds the cost of queries for very common words
+    SEARCH_MAX_CANDIDATES = int(os.environ.get('SEARCH_MAX_CANDIDATES', 2000))
+
+    # Server-Sent Events (/api/events)
+    SSE_QUEUE_SIZE = 100 # Pending events per client before it is told to resync
+    # Idle interval after which a stream sends a keepalive and checks the DB change version,
+    # which is how changes committed by other worker processes reach this process's clients
+    SSE_POLL_SECONDS = int(os.environ.get('SSE_POLL_SECONDS', 15))
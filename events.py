@@ -0,0 +1,67 @@
+import json
+import queue
+import threading
+from flask import current_app
+
+class EventBroadcaster:
+    """
+    In-process fan-out of change events to Server-Sent Events subscribers. Each subscriber gets a
+    bounded queue; a client that falls behind has its backlog replaced by a single 'resync' event
+    instead of growing memory without limit.
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event_type, data):
+        event = (event_type, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Drop the backlog; the client refetches everything when it sees 'resync'
+                while True:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        break
+                # Another publisher may have refilled the queue meanwhile; then the client will
+                # resync from that backlog. Publishing runs after the commit, so it must not raise
+                try:
+                    subscriber.put_nowait(('resync', {'version': data.get('version')}))
+                except queue.Full:
+                    pass
+
+def format_sse(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+def init_events(app):
+    app.extensions['events'] = EventBroadcaster(app.config['SSE_QUEUE_SIZE'])
+
+def get_broadcaster():
+    return current_app.extensions['events']
+
+def publish_event(event_type, **data):
+    """Call after a commit. Stamps the event with the current change version."""
+    from change_tracking import get_current_version
+    data['version'] = get_current_version()
+    get_broadcaster().publish(event_type, data)
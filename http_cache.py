@@ -0,0 +1,51 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import make_response, request
+from change_tracking import get_table_versions
+from streaming import wants_ndjson
+
+def conditional_on(*models, extra=None):
+    """
+    Adds ETag/Last-Modified to a read-only GET view, derived from the table_version counters of
+    the tables it reads. When the client's copy is current a 304 is returned without calling the
+    view, so no rows are queried or serialized.
+    extra is an optional callable for views that depend on more than table contents (e.g.
+    today's date); its value goes into the ETag, and Last-Modified is left out since it can't
+    express it.
+    The list views can also answer with NDJSON, picked by ?stream or the Accept header, so the
+    representation goes into the ETag too and responses carry Vary: Accept; otherwise a JSON
+    ETag would validate a cached NDJSON body and the other way round.
+    """
+    table_names = sorted(model.__table__.name for model in models)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_table_versions(table_names)
+            state = [(name, *versions.get(name, (0, None))) for name in table_names]
+            representation = 'ndjson' if wants_ndjson() else 'json'
+            etag_source = repr((state, representation)) if extra is None else repr((state, representation, extra()))
+            etag = hashlib.sha1(etag_source.encode()).hexdigest()[:20]
+            timestamps = [updated_at for _, _, updated_at in state if updated_at]
+            last_modified = max(timestamps).replace(tzinfo=timezone.utc) if timestamps and extra is None else None
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = bool(last_modified and request.if_modified_since and
+                                    last_modified.replace(microsecond=0) <= request.if_modified_since)
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.vary.add('Accept')
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True # Always revalidate; the check is cheap
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,244 @@
+import hmac
+import json
+import logging
+import math
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from functools import wraps
+from flask import abort, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+logger = logging.getLogger('instrumentation')
+
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list: the smallest value with pct% of the values at or below it."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct * len(sorted_values) / 100) - 1))
+    return sorted_values[index]
+
+class RouteMetrics:
+    """
+    Rolling per-route request samples (the last window requests of each route) for
+    /api/debug/metrics, plus the most recent sampling-profiler reports.
+    """
+
+    def __init__(self, window, profiles_kept=5):
+        self.window = window
+        self._samples = {}
+        self._totals = Counter()
+        self.profiles = deque(maxlen=profiles_kept)
+        self._lock = threading.Lock()
+
+    def record(self, route, total_ms, db_ms, queries):
+        with self._lock:
+            samples = self._samples.get(route)
+            if samples is None:
+                samples = self._samples[route] = deque(maxlen=self.window)
+            samples.append((total_ms, db_ms, queries))
+            self._totals[route] += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = {route: list(values) for route, values in self._samples.items()}
+            totals = dict(self._totals)
+        routes = {}
+        for route, values in samples.items():
+            latencies = sorted(total for total, _, _ in values)
+            db_times = sorted(db for _, db, _ in values)
+            query_counts = sorted(queries for _, _, queries in values)
+            routes[route] = {
+                'requests': totals[route],
+                'window': len(values),
+                'p50_ms': percentile(latencies, 50),
+                'p95_ms': percentile(latencies, 95),
+                'p99_ms': percentile(latencies, 99),
+                'db_p50_ms': percentile(db_times, 50),
+                'db_p95_ms': percentile(db_times, 95),
+                'queries_p50': percentile(query_counts, 50),
+                'queries_max': query_counts[-1]
+            }
+        return routes
+
+class SamplingProfiler:
+    """
+    Minimal wall-clock sampling profiler for one thread: a helper thread looks at the target
+    thread's current stack every interval seconds and counts the functions on it. Cheap enough
+    to run on a single live request, and needs nothing outside the standard library.
+    """
+
+    def __init__(self, thread_id, interval, max_depth=40):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.self_counts = Counter()
+        self.total_counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            seen = set()
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                code = frame.f_code
+                key = f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+                if depth == 0:
+                    self.self_counts[key] += 1
+                if key not in seen: # Count recursive functions once per sample
+                    self.total_counts[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+                depth += 1
+
+    def report(self, top=25):
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'self': [{'function': name, 'samples': count} for name, count in self.self_counts.most_common(top)],
+            'cumulative': [{'function': name, 'samples': count} for name, count in self.total_counts.most_common(top)]
+        }
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info['query_start'] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        started = conn.info.pop('query_start', None)
+        if started is None:
+            return
+        g.db_time = g.get('db_time', 0.0) + (time.perf_counter() - started)
+        g.db_queries = g.get('db_queries', 0) + 1
+
+def _timed(method, phase):
+    # Wraps a JSON provider method so encoding time shows up as its own Server-Timing phase
+    # (response() may call dumps(); only the outermost call is counted)
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if not has_request_context() or g.get('timing_' + phase):
+            return method(*args, **kwargs)
+        setattr(g, 'timing_' + phase, True)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            setattr(g, phase, g.get(phase, 0.0) + (time.perf_counter() - started))
+            setattr(g, 'timing_' + phase, False)
+    return wrapper
+
+def debug_access_allowed():
+    """
+    Whether this request may use /api/debug/metrics and the profiler. With INSTRUMENTATION_TOKEN
+    set, only requests sending it in X-Debug-Token may; otherwise only requests made directly
+    from this machine (loopback, no X-Forwarded-For: a local reverse proxy would make every
+    client look local, so set a token behind one).
+    """
+    token = current_app.config['INSTRUMENTATION_TOKEN']
+    if token:
+        return hmac.compare_digest(request.headers.get('X-Debug-Token', '').encode(), token.encode())
+    return request.remote_addr in LOOPBACK_ADDRESSES and 'X-Forwarded-For' not in request.headers
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    if (request.args.get('_profile') == '1' or request.headers.get('X-Profile') == '1') and debug_access_allowed():
+        profiler = SamplingProfiler(threading.get_ident(), current_app.config['INSTRUMENTATION_PROFILE_INTERVAL_MS'] / 1000)
+        profiler.start()
+        g.profiler = profiler
+
+def _finish_request(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    total_ms = (time.perf_counter() - started) * 1000
+    db_ms = g.get('db_time', 0.0) * 1000
+    json_ms = g.get('json_time', 0.0) * 1000
+    queries = g.get('db_queries', 0)
+    app_ms = max(total_ms - db_ms - json_ms, 0.0) # View code, ORM hydration, to_dict, hooks
+
+    # Streamed bodies are produced after this point, so for them this covers setup only
+    response.headers.add('Server-Timing', f'db;dur={db_ms:.2f};desc="{queries} queries"')
+    response.headers.add('Server-Timing', f'app;dur={app_ms:.2f}')
+    response.headers.add('Server-Timing', f'json;dur={json_ms:.2f}')
+    response.headers.add('Server-Timing', f'total;dur={total_ms:.2f}')
+
+    route = f'{request.method} {request.url_rule.rule}' if request.url_rule else f'{request.method} <unmatched>'
+    metrics = current_app.extensions['instrumentation']
+    metrics.record(route, round(total_ms, 3), round(db_ms, 3), queries)
+
+    record = {
+        'route': route,
+        'path': request.full_path.rstrip('?'),
+        'status': response.status_code,
+        'total_ms': round(total_ms, 2),
+        'db_ms': round(db_ms, 2),
+        'json_ms': round(json_ms, 2),
+        'queries': queries
+    }
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        profile_id = uuid.uuid4().hex[:12]
+        metrics.profiles.append({'id': profile_id, 'route': route, 'path': record['path'],
+                                 'total_ms': record['total_ms'], **profiler.report()})
+        response.headers['X-Profile-Id'] = profile_id
+        record['profile_id'] = profile_id
+
+    slow = total_ms >= current_app.config['INSTRUMENTATION_SLOW_MS']
+    logger.log(logging.WARNING if slow else logging.INFO, json.dumps(record, separators=(',', ':')))
+    return response
+
+def _stop_profiler(exc):
+    # after_request is skipped when a request fails outright; don't leave the sampler running
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+def get_debug_metrics():
+    """Rolling per-route latency and query statistics; ?profiles=1 adds the recent profiler reports."""
+    if not debug_access_allowed():
+        abort(404) # Same answer as for a path that doesn't exist
+    metrics = current_app.extensions['instrumentation']
+    document = {'window': metrics.window, 'routes': metrics.snapshot()}
+    if request.args.get('profiles') == '1':
+        document['profiles'] = list(metrics.profiles)
+    return jsonify(document)
+
+def init_instrumentation(app, db):
+    """
+    Opt-in request instrumentation (INSTRUMENTATION_ENABLED). When disabled nothing is registered,
+    so requests and queries pay no cost at all.
+    """
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+
+    app.extensions['instrumentation'] = RouteMetrics(app.config['INSTRUMENTATION_WINDOW'])
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    app.json.dumps = _timed(app.json.dumps, 'json_time')
+    app.json.response = _timed(app.json.response, 'json_time')
+
+    # Registered first, so the timings cover the app's own before/after_request hooks too
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_stop_profiler)
+    app.add_url_rule('/api/debug/metrics', 'debug_metrics', get_debug_metrics, methods=['GET'])
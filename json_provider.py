@@ -0,0 +1,48 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError: # Optional dependency; the stdlib provider is used without it
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Drop-in replacement for Flask's DefaultJSONProvider backed by orjson. Output stays
+    equivalent (sorted keys, Flask's fallback for dates/decimals/dataclasses via default),
+    only non-ASCII characters are written as UTF-8 instead of \\u escapes.
+    Calls passing json.dumps-specific keyword arguments fall back to the stdlib.
+    """
+
+    def _options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json_provider(app):
+    """Installs the provider selected by JSON_PROVIDER: 'orjson', 'json' (stdlib) or 'auto'."""
+    name = app.config['JSON_PROVIDER']
+    if name not in ('auto', 'orjson', 'json'):
+        raise ValueError(f"Unknown JSON_PROVIDER '{name}'")
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+    if name != 'json' and orjson is not None:
+        app.json = OrjsonProvider(app)
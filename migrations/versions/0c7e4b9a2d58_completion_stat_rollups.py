@@ -0,0 +1,74 @@
+"""completion_stat rollups
+
+Revision ID: 0c7e4b9a2d58
+Revises: f3a8c1d6e925
+Create Date: 2026-10-19 15:33:08.771942
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c7e4b9a2d58'
+down_revision = 'f3a8c1d6e925'
+branch_labels = None
+depends_on = None
+
+# Resolved instances, live and archived, counted once per day and once per month of their due date.
+# Completions without a completion date (older rows) count as completed, neither on time nor late.
+BACKFILL = """
+INSERT INTO completion_stat (period, period_start, category_short_name, asset_id, completed, on_time, late, lateness_days, skipped)
+SELECT period, period_start, category_short_name, asset_id,
+       SUM(CASE WHEN status = 'Completed' THEN 1 ELSE 0 END),
+       SUM(CASE WHEN status = 'Completed' AND days_late <= 0 THEN 1 ELSE 0 END),
+       SUM(CASE WHEN status = 'Completed' AND days_late > 0 THEN 1 ELSE 0 END),
+       SUM(CASE WHEN status = 'Completed' AND days_late > 0 THEN days_late ELSE 0 END),
+       SUM(CASE WHEN status = 'Skipped' THEN 1 ELSE 0 END)
+FROM (
+    SELECT periods.period,
+           CASE periods.period WHEN 'day' THEN date(resolved.due_date) ELSE date(resolved.due_date, 'start of month') END AS period_start,
+           task_definition.category_short_name, task_definition.asset_id, resolved.status,
+           CAST(julianday(date(resolved.completion_date)) - julianday(date(resolved.due_date)) AS INTEGER) AS days_late
+    FROM (
+        SELECT task_definition_id, due_date, completion_date, status FROM task_instance WHERE status IN ('Completed', 'Skipped')
+        UNION ALL
+        SELECT task_definition_id, due_date, completion_date, 'Completed' FROM task_instance_history
+    ) AS resolved
+    JOIN task_definition ON task_definition.id = resolved.task_definition_id
+    CROSS JOIN (SELECT 'day' AS period UNION ALL SELECT 'month') AS periods
+)
+GROUP BY period, period_start, category_short_name, asset_id
+"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    # run.py's db.create_all() may have created the (empty) table before this migration ran
+    if not sa.inspect(bind).has_table('completion_stat'):
+        op.create_table('completion_stat',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('period', sa.String(length=10), nullable=False),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('category_short_name', sa.String(length=50), nullable=True),
+            sa.Column('asset_id', sa.Integer(), nullable=True),
+            sa.Column('completed', sa.Integer(), nullable=False),
+            sa.Column('on_time', sa.Integer(), nullable=False),
+            sa.Column('late', sa.Integer(), nullable=False),
+            sa.Column('lateness_days', sa.Integer(), nullable=False),
+            sa.Column('skipped', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    op.create_index('ix_completion_stat_period_period_start', 'completion_stat', ['period', 'period_start'],
+                    unique=False, if_not_exists=True)
+    if bind.dialect.name == 'sqlite':
+        # Always rebuilt from the instances: a table created early may already hold the rollups of
+        # the few completions made since, which are recomputed here along with all the history
+        op.execute('DELETE FROM completion_stat')
+        op.execute(BACKFILL)
+    # Elsewhere run `flask rebuild-completion-stats` once after upgrading
+
+
+def downgrade():
+    op.drop_index('ix_completion_stat_period_period_start', table_name='completion_stat')
+    op.drop_table('completion_stat')
@@ -0,0 +1,29 @@
+"""task instance query indexes
+
+Revision ID: 3f1c2a9d7b10
+Revises: 
+Create Date: 2026-10-17 09:12:44.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables may already have these indexes when created through db.create_all()
+    with op.batch_alter_table('task_instance', schema=None) as batch_op:
+        batch_op.create_index('ix_task_instance_status_due_date', ['status', 'due_date'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_task_instance_task_definition_id_due_date', ['task_definition_id', 'due_date'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('task_instance', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_instance_task_definition_id_due_date', if_exists=True)
+        batch_op.drop_index('ix_task_instance_status_due_date', if_exists=True)
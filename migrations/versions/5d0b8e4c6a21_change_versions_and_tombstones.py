@@ -0,0 +1,48 @@
+"""change_version stamps and change tombstones
+
+Revision ID: 5d0b8e4c6a21
+Revises: e9a7f3b215c8
+Create Date: 2026-10-17 19:48:32.560917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0b8e4c6a21'
+down_revision = 'e9a7f3b215c8'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ['asset', 'category', 'task_definition', 'task_instance', 'setting']
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table_name in VERSIONED_TABLES:
+        # Skip what db.create_all() already created
+        columns = {c['name'] for c in inspector.get_columns(table_name)}
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            if 'change_version' not in columns:
+                batch_op.add_column(sa.Column('change_version', sa.Integer(), nullable=True))
+            batch_op.create_index(f'ix_{table_name}_change_version', ['change_version'], unique=False, if_not_exists=True)
+
+    if not inspector.has_table('change_tombstone'):
+        op.create_table('change_tombstone',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('table_name', sa.String(length=50), nullable=False),
+            sa.Column('row_key', sa.String(length=120), nullable=False),
+            sa.Column('change_version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    with op.batch_alter_table('change_tombstone', schema=None) as batch_op:
+        batch_op.create_index('ix_change_tombstone_change_version', ['change_version'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table('change_tombstone')
+    for table_name in VERSIONED_TABLES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table_name}_change_version', if_exists=True)
+            batch_op.drop_column('change_version')
@@ -0,0 +1,40 @@
+"""unique task instance per definition and due date
+
+Revision ID: 8b4e61c0d2a7
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 11:40:03.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e61c0d2a7'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate (task_definition_id, due_date) rows first, keeping a completed one if there is one,
+    # otherwise the oldest row
+    op.execute("""
+        DELETE FROM task_instance WHERE id IN (
+            SELECT t.id FROM task_instance t
+            JOIN task_instance o
+              ON o.task_definition_id = t.task_definition_id AND o.due_date = t.due_date AND o.id <> t.id
+            WHERE (CASE WHEN o.status = 'Completed' THEN 1 ELSE 0 END) > (CASE WHEN t.status = 'Completed' THEN 1 ELSE 0 END)
+               OR ((CASE WHEN o.status = 'Completed' THEN 1 ELSE 0 END) = (CASE WHEN t.status = 'Completed' THEN 1 ELSE 0 END)
+                   AND o.id < t.id)
+        )
+    """)
+    with op.batch_alter_table('task_instance', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_instance_task_definition_id_due_date', if_exists=True)
+        batch_op.create_index('uq_task_instance_task_definition_id_due_date', ['task_definition_id', 'due_date'], unique=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('task_instance', schema=None) as batch_op:
+        batch_op.drop_index('uq_task_instance_task_definition_id_due_date', if_exists=True)
+        batch_op.create_index('ix_task_instance_task_definition_id_due_date', ['task_definition_id', 'due_date'], unique=False, if_not_exists=True)
@@ -0,0 +1,35 @@
+"""task_instance_history archive table
+
+Revision ID: a7c3e5f90b62
+Revises: 5d0b8e4c6a21
+Create Date: 2026-10-18 09:21:37.004851
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5f90b62'
+down_revision = '5d0b8e4c6a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table('task_instance_history'): # Skip if db.create_all() made it
+        op.create_table('task_instance_history',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('instance_id', sa.Integer(), nullable=False),
+            sa.Column('task_definition_id', sa.Integer(), nullable=False),
+            sa.Column('due_date', sa.DateTime(), nullable=False),
+            sa.Column('completion_date', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['task_definition_id'], ['task_definition.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    with op.batch_alter_table('task_instance_history', schema=None) as batch_op:
+        batch_op.create_index('ix_task_instance_history_task_definition_id_completion_date', ['task_definition_id', 'completion_date'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table('task_instance_history')
@@ -0,0 +1,40 @@
+"""recurrence rule interval, weekdays, month and date bounds
+
+Revision ID: b6d41f2e9c03
+Revises: a7c3e5f90b62
+Create Date: 2026-10-18 16:02:11.418027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d41f2e9c03'
+down_revision = 'a7c3e5f90b62'
+branch_labels = None
+depends_on = None
+
+
+NEW_COLUMNS = [
+    sa.Column('interval', sa.Integer(), nullable=False, server_default='1'),
+    sa.Column('weekdays', sa.String(length=20), nullable=True),
+    sa.Column('month_of_year', sa.Integer(), nullable=True),
+    sa.Column('start_date', sa.DateTime(), nullable=True),
+    sa.Column('end_date', sa.DateTime(), nullable=True),
+]
+
+
+def upgrade():
+    # Skip columns db.create_all() already created
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('recurrence_rule')}
+    with op.batch_alter_table('recurrence_rule', schema=None) as batch_op:
+        for column in NEW_COLUMNS:
+            if column.name not in columns:
+                batch_op.add_column(column)
+
+
+def downgrade():
+    with op.batch_alter_table('recurrence_rule', schema=None) as batch_op:
+        for column in reversed(NEW_COLUMNS):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,31 @@
+"""recurrence rule generated_through watermark
+
+Revision ID: c52d9e07a3f4
+Revises: 8b4e61c0d2a7
+Create Date: 2026-10-17 14:05:51.774630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d9e07a3f4'
+down_revision = '8b4e61c0d2a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Skip the column if db.create_all() already created it
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('recurrence_rule')}
+    with op.batch_alter_table('recurrence_rule', schema=None) as batch_op:
+        if 'generated_through' not in columns:
+            batch_op.add_column(sa.Column('generated_through', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_recurrence_rule_generated_through', ['generated_through'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('recurrence_rule', schema=None) as batch_op:
+        batch_op.drop_index('ix_recurrence_rule_generated_through', if_exists=True)
+        batch_op.drop_column('generated_through')
@@ -0,0 +1,38 @@
+"""task_instance occurrence_date
+
+Revision ID: d18f5a3c7e24
+Revises: b6d41f2e9c03
+Create Date: 2026-10-18 19:47:05.230611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd18f5a3c7e24'
+down_revision = 'b6d41f2e9c03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Skip the column if db.create_all() already created it
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('task_instance')}
+    if 'occurrence_date' not in columns:
+        with op.batch_alter_table('task_instance', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('occurrence_date', sa.DateTime(), nullable=True))
+        # Instances of recurring definitions were generated on their occurrence dates; rescheduled
+        # ones can't be told apart any more and keep their current date
+        op.execute(
+            'UPDATE task_instance SET occurrence_date = due_date WHERE task_definition_id IN '
+            '(SELECT task_definition_id FROM recurrence_rule)'
+        )
+    op.create_index('ix_task_instance_task_definition_id_occurrence_date', 'task_instance',
+                    ['task_definition_id', 'occurrence_date'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_task_instance_task_definition_id_occurrence_date', table_name='task_instance', if_exists=True)
+    with op.batch_alter_table('task_instance', schema=None) as batch_op:
+        batch_op.drop_column('occurrence_date')
@@ -0,0 +1,31 @@
+"""table_version change counters
+
+Revision ID: e9a7f3b215c8
+Revises: c52d9e07a3f4
+Create Date: 2026-10-17 16:27:10.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9a7f3b215c8'
+down_revision = 'c52d9e07a3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('table_version'):
+        return # Already created by db.create_all()
+    op.create_table('table_version',
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,54 @@
+"""full-text search index
+
+Revision ID: f3a8c1d6e925
+Revises: d18f5a3c7e24
+Create Date: 2026-10-19 10:12:44.508317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c1d6e925'
+down_revision = 'd18f5a3c7e24'
+branch_labels = None
+depends_on = None
+
+# FTS5 index per source table, kept in sync by triggers (see search.py)
+SOURCES = {
+    'task_definition': ('task_definition_search', ('title', 'description', 'notes')),
+    'asset': ('asset_search', ('name', 'description'))
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return # FTS5 is SQLite only; search falls back to LIKE queries elsewhere
+    existing = set(sa.inspect(bind).get_table_names())
+    for table, (fts, columns) in SOURCES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        delete_old = f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+        insert_new = f'INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});'
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, content='{table}', "
+            f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END')
+        op.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END')
+        op.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} '
+                   f'BEGIN {delete_old} {insert_new} END')
+        if fts not in existing: # Index the rows that are already there
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for fts, _ in SOURCES.values():
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+        op.execute(f'DROP TABLE IF EXISTS {fts}')
@@ -1,6 +1,6 @@
-# This file makes the 'models' directory a Python package.
-# You can expose specific models here if needed, e.g.:
-# from .models import TaskDefinition
-
-# Or allow importing submodules like 'from models import models'
+# This file makes the 'models' directory a Python package.
+# You can expose specific models here if needed, e.g.:
+# from .models import TaskDefinition
+
+# Or allow importing submodules like 'from models import models'
 # by ensuring 'models.py' (the file) is accessible. 
\ No newline at end of file
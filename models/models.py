@@ -1,154 +1,313 @@
-from app_init import db # Import db from app_init.py in the root
-from datetime import datetime, timedelta # Import timedelta
-
-# Ensure enums or choices are defined if used, or handle as strings/integers directly
-# For simplicity, we'll use integers for day of week/month directly as requested.
-
-class Asset(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
-    description = db.Column(db.Text, nullable=True)
-    # task_definitions backref will be created by TaskDefinition.asset relationship
-
-    def __repr__(self):
-        return f'<Asset {self.name}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'task_definitions': [td.to_dict(include_asset=False) for td in self.task_definitions] # Avoid circular to_dict calls
-        }
-
-class Category(db.Model):
-    short_name = db.Column(db.String(50), primary_key=True)
-    icon = db.Column(db.String(50), nullable=True) # e.g., emoji or icon class
-
-    def __repr__(self):
-        return f'<Category {self.short_name}>'
-
-    def to_dict(self):
-        return {
-            'short_name': self.short_name,
-            'icon': self.icon
-        }
-
-class RecurrenceRule(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    task_definition_id = db.Column(db.Integer, db.ForeignKey('task_definition.id'), unique=True, nullable=False)
-    # rule_type helps distinguish: 'weekly', 'monthly' (future: 'daily', 'annually')
-    rule_type = db.Column(db.String(50), nullable=False)
-    
-    # For weekly recurrence: 1 (Monday) to 7 (Sunday)
-    weekly_recurring_day = db.Column(db.Integer, nullable=True) 
-    # For monthly recurrence: 1 to 31
-    monthly_recurring_day = db.Column(db.Integer, nullable=True)
-    # We can add start_date and end_date for recurrence later if needed
-
-    def __repr__(self):
-        return f'<RecurrenceRule {self.id} for TaskDef {self.task_definition_id} - Type: {self.rule_type}>'
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'task_definition_id': self.task_definition_id,
-            'rule_type': self.rule_type,
-            'weekly_recurring_day': self.weekly_recurring_day,
-            'monthly_recurring_day': self.monthly_recurring_day
-        }
-
-class TaskDefinition(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(120), nullable=False) # New: Task Title
-    description = db.Column(db.String(255), nullable=True) # New: Short description
-    notes = db.Column(db.Text, nullable=True) # Old description, now for detailed notes
-    
-    category_short_name = db.Column(db.String(50), db.ForeignKey('category.short_name'), nullable=True)
-    defined_category = db.relationship('Category', backref=db.backref('task_definitions', lazy=True))
-    
-    priority = db.Column(db.String(50)) # e.g., Urgent, High, Medium, Low
-    
-    # For one-off tasks
-    due_date = db.Column(db.DateTime, nullable=True)
-    
-    # For recurring tasks - establishes a one-to-one with RecurrenceRule
-    recurrence_rule = db.relationship('RecurrenceRule', backref='task_definition', uselist=False, cascade="all, delete-orphan")
-
-    # Link to Asset
-    asset_id = db.Column(db.Integer, db.ForeignKey('asset.id'), nullable=True)
-    asset = db.relationship('Asset', backref=db.backref('task_definitions', lazy='dynamic')) # Use lazy='dynamic' for querying
-
-    # Relationship to TaskInstances
-    # If a TaskDefinition is deleted, its instances are also deleted.
-    instances = db.relationship('TaskInstance', backref='defined_task', lazy=True, cascade="all, delete-orphan") # Changed backref name slightly
-
-    def __repr__(self):
-        return f'<TaskDefinition {self.title}>'
-
-    def to_dict(self, include_asset=True): # Added include_asset to prevent recursion from Asset.to_dict
-        cat_data = self.defined_category.to_dict() if self.defined_category else None
-        data = {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'notes': self.notes,
-            'category_short_name': self.category_short_name,
-            'category': cat_data, # Full category object
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'recurrence_rule': self.recurrence_rule.to_dict() if self.recurrence_rule else None,
-            'asset_id': self.asset_id
-        }
-        if include_asset and self.asset: # Add asset info if requested and available
-            data['asset'] = { 'id': self.asset.id, 'name': self.asset.name } # Basic asset info
-        return data
-
-class TaskInstance(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    # Changed ForeignKey to match new backref in TaskDefinition
-    task_definition_id = db.Column(db.Integer, db.ForeignKey('task_definition.id'), nullable=False)
-    # defined_task is available via backref from TaskDefinition.instances
-    
-    due_date = db.Column(db.DateTime, nullable=False)
-    completion_date = db.Column(db.DateTime, nullable=True)
-    status = db.Column(db.String(50), nullable=False, default='Pending') # e.g., Pending, Completed, Overdue
-
-    def __repr__(self):
-        return f'<TaskInstance {self.id} for TaskDef {self.task_definition_id} - Status: {self.status}>'
-
-    def to_dict(self):
-        category_details = None
-        if self.defined_task and self.defined_task.defined_category:
-            category_details = self.defined_task.defined_category.to_dict()
-        
-        asset_details = None
-        if self.defined_task and self.defined_task.asset:
-            asset_details = { 'id': self.defined_task.asset.id, 'name': self.defined_task.asset.name }
-
-        return {
-            'id': self.id,
-            'task_definition_id': self.task_definition_id,
-            'task_definition_title': self.defined_task.title if self.defined_task else 'N/A',
-            'task_definition_description': self.defined_task.description if self.defined_task else None,
-            'task_definition_notes': self.defined_task.notes if self.defined_task else None,
-            'task_definition_category_details': category_details, # Contains short_name and icon
-            'task_definition_priority': self.defined_task.priority if self.defined_task else None,
-            'asset_details': asset_details, # Basic details of linked asset
-            'due_date': self.due_date.isoformat(),
-            'completion_date': self.completion_date.isoformat() if self.completion_date else None,
-            'status': self.status
-        }
-
-class Setting(db.Model):
-    key = db.Column(db.String(50), primary_key=True)
-    value = db.Column(db.String(255), nullable=False)
-
-    def __repr__(self):
-        return f'<Setting {self.key}={self.value}>'
-
-    def to_dict(self):
-        return {
-            'key': self.key,
-            'value': self.value
-        } 
\ No newline at end of file
+from app_init import db # Import db from app_init.py in the root
+from datetime import datetime, timedelta # Import timedelta
+from sqlalchemy.orm import joinedload
+
+# Ensure enums or choices are defined if used, or handle as strings/integers directly
+# For simplicity, we'll use integers for day of week/month directly as requested.
+
+class Asset(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    # task_definitions backref will be created by TaskDefinition.asset relationship
+    change_version = db.Column(db.Integer, nullable=True, index=True) # Stamped by change_tracking on every write
+
+    def __repr__(self):
+        return f'<Asset {self.name}>'
+
+    def to_dict(self, include_task_definitions=True, task_definitions=None, summary=None):
+        # task_definitions: the asset's definitions if the caller already loaded them (with their
+        # category and rule), instead of querying them here
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description
+        }
+        if include_task_definitions:
+            if task_definitions is None:
+                task_definitions = self.task_definitions
+            data['task_definitions'] = [td.to_dict(include_asset=False) for td in task_definitions] # Avoid circular to_dict calls
+        if summary is not None:
+            data['summary'] = summary
+        return data
+
+class Category(db.Model):
+    short_name = db.Column(db.String(50), primary_key=True)
+    icon = db.Column(db.String(50), nullable=True) # e.g., emoji or icon class
+    change_version = db.Column(db.Integer, nullable=True, index=True) # Stamped by change_tracking on every write
+
+    def __repr__(self):
+        return f'<Category {self.short_name}>'
+
+    def to_dict(self):
+        return {
+            'short_name': self.short_name,
+            'icon': self.icon
+        }
+
+class RecurrenceRule(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    task_definition_id = db.Column(db.Integer, db.ForeignKey('task_definition.id'), unique=True, nullable=False)
+    # rule_type: 'daily', 'weekly', 'monthly' or 'annual'; expanded by recurrence.py
+    rule_type = db.Column(db.String(50), nullable=False)
+    # Every interval days/weeks/months/years, counted from start_date (or a fixed epoch)
+    interval = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # For weekly recurrence: 1 (Monday) to 7 (Sunday)
+    weekly_recurring_day = db.Column(db.Integer, nullable=True) 
+    # Weekly rules on several days: comma separated 1-7 (weekly_recurring_day is then unused)
+    weekdays = db.Column(db.String(20), nullable=True)
+    # For monthly and annual recurrence: 1 to 31 (clamped to shorter months), or -1 for the last day
+    monthly_recurring_day = db.Column(db.Integer, nullable=True)
+    # For annual recurrence: 1 (January) to 12
+    month_of_year = db.Column(db.Integer, nullable=True)
+    # Optional bounds of the series, inclusive
+    start_date = db.Column(db.DateTime, nullable=True)
+    end_date = db.Column(db.DateTime, nullable=True)
+
+    # Last due date up to which instances have been generated; the nightly job only
+    # revisits rules whose watermark is getting close to today
+    generated_through = db.Column(db.DateTime, nullable=True, index=True)
+
+    def __repr__(self):
+        return f'<RecurrenceRule {self.id} for TaskDef {self.task_definition_id} - Type: {self.rule_type}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'task_definition_id': self.task_definition_id,
+            'rule_type': self.rule_type,
+            'interval': self.interval,
+            'weekly_recurring_day': self.weekly_recurring_day,
+            'weekdays': [int(day) for day in self.weekdays.split(',')] if self.weekdays else None,
+            'monthly_recurring_day': self.monthly_recurring_day,
+            'month_of_year': self.month_of_year,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None
+            # generated_through is the nightly job's internal watermark and isn't part of the API
+        }
+
+class TaskDefinition(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(120), nullable=False) # New: Task Title
+    description = db.Column(db.String(255), nullable=True) # New: Short description
+    notes = db.Column(db.Text, nullable=True) # Old description, now for detailed notes
+    
+    category_short_name = db.Column(db.String(50), db.ForeignKey('category.short_name'), nullable=True)
+    defined_category = db.relationship('Category', backref=db.backref('task_definitions', lazy=True))
+    
+    priority = db.Column(db.String(50)) # e.g., Urgent, High, Medium, Low
+    
+    # For one-off tasks
+    due_date = db.Column(db.DateTime, nullable=True)
+    
+    # For recurring tasks - establishes a one-to-one with RecurrenceRule
+    recurrence_rule = db.relationship('RecurrenceRule', backref='task_definition', uselist=False, cascade="all, delete-orphan")
+
+    # Link to Asset
+    asset_id = db.Column(db.Integer, db.ForeignKey('asset.id'), nullable=True)
+    asset = db.relationship('Asset', backref=db.backref('task_definitions', lazy='dynamic')) # Use lazy='dynamic' for querying
+
+    # Relationship to TaskInstances
+    # If a TaskDefinition is deleted, its instances are also deleted.
+    instances = db.relationship('TaskInstance', backref='defined_task', lazy=True, cascade="all, delete-orphan") # Changed backref name slightly
+
+    change_version = db.Column(db.Integer, nullable=True, index=True) # Stamped by change_tracking on every write (incl. rule edits)
+
+    def __repr__(self):
+        return f'<TaskDefinition {self.title}>'
+
+    def to_dict(self, include_asset=True, include_category=True): # Added include_asset to prevent recursion from Asset.to_dict
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'notes': self.notes,
+            'category_short_name': self.category_short_name,
+            'priority': self.priority,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'recurrence_rule': self.recurrence_rule.to_dict() if self.recurrence_rule else None,
+            'asset_id': self.asset_id
+        }
+        if include_category: # Full category object; callers sending categories separately skip it
+            data['category'] = self.defined_category.to_dict() if self.defined_category else None
+        if include_asset and self.asset: # Add asset info if requested and available
+            data['asset'] = { 'id': self.asset.id, 'name': self.asset.name } # Basic asset info
+        return data
+
+    @classmethod
+    def query_with_details(cls):
+        # Eager-load everything to_dict() touches so list endpoints don't issue a query per row
+        return cls.query.options(
+            joinedload(cls.defined_category),
+            joinedload(cls.recurrence_rule),
+            joinedload(cls.asset)
+        )
+
+def definition_details(task_def):
+    # Definition fields embedded in instance payloads (live and archived instances share them)
+    category_details = None
+    if task_def and task_def.defined_category:
+        category_details = task_def.defined_category.to_dict()
+
+    asset_details = None
+    if task_def and task_def.asset:
+        asset_details = { 'id': task_def.asset.id, 'name': task_def.asset.name }
+
+    return {
+        'task_definition_title': task_def.title if task_def else 'N/A',
+        'task_definition_description': task_def.description if task_def else None,
+        'task_definition_notes': task_def.notes if task_def else None,
+        'task_definition_category_details': category_details, # Contains short_name and icon
+        'task_definition_priority': task_def.priority if task_def else None,
+        'asset_details': asset_details # Basic details of linked asset
+    }
+
+class TaskInstance(db.Model):
+    __table_args__ = (
+        # Back the dashboard's status/date-window filters and per-definition lookups
+        db.Index('ix_task_instance_status_due_date', 'status', 'due_date'),
+        # One instance per definition and due date; keeps concurrent generation idempotent
+        db.Index('uq_task_instance_task_definition_id_due_date', 'task_definition_id', 'due_date', unique=True),
+        # Which rule occurrences a definition already has rows for (calendar, generation)
+        db.Index('ix_task_instance_task_definition_id_occurrence_date', 'task_definition_id', 'occurrence_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Changed ForeignKey to match new backref in TaskDefinition
+    task_definition_id = db.Column(db.Integer, db.ForeignKey('task_definition.id'), nullable=False)
+    # defined_task is available via backref from TaskDefinition.instances
+    
+    due_date = db.Column(db.DateTime, nullable=False)
+    # Rule occurrence this instance was materialized for; unlike due_date it doesn't move when the
+    # instance is rescheduled. NULL for one-off instances.
+    occurrence_date = db.Column(db.DateTime, nullable=True)
+    completion_date = db.Column(db.DateTime, nullable=True)
+    status = db.Column(db.String(50), nullable=False, default='Pending') # e.g., Pending, Completed, Overdue, Skipped
+    change_version = db.Column(db.Integer, nullable=True, index=True) # Stamped by change_tracking on every write
+
+    def __repr__(self):
+        return f'<TaskInstance {self.id} for TaskDef {self.task_definition_id} - Status: {self.status}>'
+
+    def to_dict(self, include_definition=True):
+        if not include_definition: # Only the instance's own columns; definition referenced by id
+            return {
+                'id': self.id,
+                'task_definition_id': self.task_definition_id,
+                'due_date': self.due_date.isoformat(),
+                'completion_date': self.completion_date.isoformat() if self.completion_date else None,
+                'status': self.status
+            }
+
+        return {
+            'id': self.id,
+            'task_definition_id': self.task_definition_id,
+            **definition_details(self.defined_task),
+            'due_date': self.due_date.isoformat(),
+            'completion_date': self.completion_date.isoformat() if self.completion_date else None,
+            'status': self.status
+        }
+
+    @classmethod
+    def query_with_details(cls):
+        # Loads instance -> definition -> category/asset in a single joined SELECT instead of lazy loads per row
+        return cls.query.options(
+            joinedload(cls.defined_task).joinedload(TaskDefinition.defined_category),
+            joinedload(cls.defined_task).joinedload(TaskDefinition.asset)
+        )
+
+class TaskInstanceHistory(db.Model):
+    # Append-only archive of completed instances moved out of task_instance by the archival job,
+    # keeping the hot table small. Only the columns history views need.
+    __tablename__ = 'task_instance_history'
+    __table_args__ = (
+        db.Index('ix_task_instance_history_task_definition_id_completion_date', 'task_definition_id', 'completion_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    instance_id = db.Column(db.Integer, nullable=False) # id the row had in task_instance
+    task_definition_id = db.Column(db.Integer, db.ForeignKey('task_definition.id'), nullable=False)
+    due_date = db.Column(db.DateTime, nullable=False)
+    completion_date = db.Column(db.DateTime, nullable=False)
+
+    defined_task = db.relationship('TaskDefinition')
+
+    def __repr__(self):
+        return f'<TaskInstanceHistory {self.instance_id} for TaskDef {self.task_definition_id}>'
+
+    def to_dict(self):
+        # Same shape as TaskInstance.to_dict so clients can't tell archived and live instances apart
+        return {
+            'id': self.instance_id,
+            'task_definition_id': self.task_definition_id,
+            **definition_details(self.defined_task),
+            'due_date': self.due_date.isoformat(),
+            'completion_date': self.completion_date.isoformat(),
+            'status': 'Completed',
+            'archived': True
+        }
+
+    @classmethod
+    def query_with_details(cls):
+        return cls.query.options(
+            joinedload(cls.defined_task).joinedload(TaskDefinition.defined_category),
+            joinedload(cls.defined_task).joinedload(TaskDefinition.asset)
+        )
+
+class CompletionStat(db.Model):
+    # Rollup of resolved (completed or skipped) task instances, live and archived, per period of
+    # their due date and per category/asset of their definition. Kept up to date by
+    # completion_stats.py as instances change, so statistics never have to scan instance history.
+    __tablename__ = 'completion_stat'
+    __table_args__ = (
+        db.Index('ix_completion_stat_period_period_start', 'period', 'period_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False) # 'day' or 'month'
+    period_start = db.Column(db.Date, nullable=False) # The day, or the first day of the month
+    category_short_name = db.Column(db.String(50), nullable=True)
+    asset_id = db.Column(db.Integer, nullable=True)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    on_time = db.Column(db.Integer, nullable=False, default=0) # Completed on or before the due date
+    late = db.Column(db.Integer, nullable=False, default=0)
+    lateness_days = db.Column(db.Integer, nullable=False, default=0) # Total days past due of the late ones
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CompletionStat {self.period} {self.period_start} {self.category_short_name}/{self.asset_id}>'
+
+class Setting(db.Model):
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.String(255), nullable=False)
+    change_version = db.Column(db.Integer, nullable=True, index=True) # Stamped by change_tracking on every write
+
+    def __repr__(self):
+        return f'<Setting {self.key}={self.value}>'
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'value': self.value
+        } 
+
+class TableVersion(db.Model):
+    # Per-table change counter, set to the transaction's change version by any commit that touches the table.
+    # Read-only endpoints derive their ETag/Last-Modified from it (see change_tracking.py).
+    # The '_global' row holds the latest change version handed out.
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}={self.version}>'
+
+class ChangeTombstone(db.Model):
+    # Records deleted rows of versioned tables so /api/changes can report deletions
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_key = db.Column(db.String(120), nullable=False) # Primary key of the deleted row, as a string
+    change_version = db.Column(db.Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<ChangeTombstone {self.table_name}:{self.row_key}@{self.change_version}>'
@@ -0,0 +1,119 @@
+# Column-projection serializers for the large list endpoints.
+# Instead of hydrating ORM objects (identity map, instrumentation, relationship loading) and
+# calling to_dict() attribute by attribute, these select exactly the columns a payload needs and
+# turn each result row into the same dict shape with a single tuple unpack.
+# Keep them in step with the corresponding to_dict() methods in models.py.
+from app_init import db
+from .models import Asset, Category, RecurrenceRule, TaskDefinition, TaskInstance
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+INSTANCE_COLUMNS = (
+    TaskInstance.id,
+    TaskInstance.task_definition_id,
+    TaskInstance.due_date,
+    TaskInstance.completion_date,
+    TaskInstance.status,
+    TaskDefinition.id.label('definition_id'),
+    TaskDefinition.title,
+    TaskDefinition.description,
+    TaskDefinition.notes,
+    TaskDefinition.priority,
+    Category.short_name.label('category_short_name'),
+    Category.icon.label('category_icon'),
+    Asset.id.label('asset_id'),
+    Asset.name.label('asset_name'),
+)
+
+def instance_rows():
+    """
+    Query of INSTANCE_COLUMNS joined the way TaskInstance.query_with_details() loads them.
+    Filter and order it on TaskInstance columns as usual; rows expose id and due_date, so
+    keyset cursors work on them too.
+    """
+    return db.session.query(*INSTANCE_COLUMNS).select_from(TaskInstance) \
+        .outerjoin(TaskDefinition, TaskInstance.task_definition_id == TaskDefinition.id) \
+        .outerjoin(Category, TaskDefinition.category_short_name == Category.short_name) \
+        .outerjoin(Asset, TaskDefinition.asset_id == Asset.id)
+
+def instance_row_to_dict(row):
+    """Same payload as TaskInstance.to_dict() for a row of instance_rows()."""
+    (id, task_definition_id, due_date, completion_date, status, definition_id, title, description,
+     notes, priority, category_short_name, category_icon, asset_id, asset_name) = row
+    has_definition = definition_id is not None
+    return {
+        'id': id,
+        'task_definition_id': task_definition_id,
+        'task_definition_title': title if has_definition else 'N/A',
+        'task_definition_description': description,
+        'task_definition_notes': notes,
+        'task_definition_category_details': {'short_name': category_short_name, 'icon': category_icon} if category_short_name is not None else None,
+        'task_definition_priority': priority,
+        'asset_details': {'id': asset_id, 'name': asset_name} if asset_id is not None else None,
+        'due_date': due_date.isoformat(),
+        'completion_date': _iso(completion_date),
+        'status': status
+    }
+
+DEFINITION_COLUMNS = (
+    TaskDefinition.id,
+    TaskDefinition.title,
+    TaskDefinition.description,
+    TaskDefinition.notes,
+    TaskDefinition.category_short_name,
+    TaskDefinition.priority,
+    TaskDefinition.due_date,
+    TaskDefinition.asset_id,
+    Category.short_name.label('category_short_name_joined'),
+    Category.icon.label('category_icon'),
+    Asset.name.label('asset_name'),
+    RecurrenceRule.id.label('rule_id'),
+    RecurrenceRule.rule_type,
+    RecurrenceRule.interval,
+    RecurrenceRule.weekly_recurring_day,
+    RecurrenceRule.weekdays,
+    RecurrenceRule.monthly_recurring_day,
+    RecurrenceRule.month_of_year,
+    RecurrenceRule.start_date,
+    RecurrenceRule.end_date,
+)
+
+def definition_rows():
+    """Query of DEFINITION_COLUMNS joined the way TaskDefinition.query_with_details() loads them."""
+    return db.session.query(*DEFINITION_COLUMNS).select_from(TaskDefinition) \
+        .outerjoin(Category, TaskDefinition.category_short_name == Category.short_name) \
+        .outerjoin(Asset, TaskDefinition.asset_id == Asset.id) \
+        .outerjoin(RecurrenceRule, RecurrenceRule.task_definition_id == TaskDefinition.id)
+
+def definition_row_to_dict(row):
+    """Same payload as TaskDefinition.to_dict() for a row of definition_rows()."""
+    (id, title, description, notes, category_short_name, priority, due_date, asset_id, joined_category,
+     category_icon, asset_name, rule_id, rule_type, interval, weekly_recurring_day, weekdays,
+     monthly_recurring_day, month_of_year, start_date, end_date) = row
+    data = {
+        'id': id,
+        'title': title,
+        'description': description,
+        'notes': notes,
+        'category_short_name': category_short_name,
+        'priority': priority,
+        'due_date': _iso(due_date),
+        'recurrence_rule': {
+            'id': rule_id,
+            'task_definition_id': id,
+            'rule_type': rule_type,
+            'interval': interval,
+            'weekly_recurring_day': weekly_recurring_day,
+            'weekdays': [int(day) for day in weekdays.split(',')] if weekdays else None,
+            'monthly_recurring_day': monthly_recurring_day,
+            'month_of_year': month_of_year,
+            'start_date': _iso(start_date),
+            'end_date': _iso(end_date)
+        } if rule_id is not None else None,
+        'asset_id': asset_id,
+        'category': {'short_name': joined_category, 'icon': category_icon} if joined_category is not None else None
+    }
+    if asset_name is not None: # name is NOT NULL, so this means the asset row exists
+        data['asset'] = {'id': asset_id, 'name': asset_name}
+    return data
@@ -0,0 +1,254 @@
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import count, islice
+from types import SimpleNamespace
+
+RULE_TYPES = ('daily', 'weekly', 'monthly', 'annual')
+LAST_DAY_OF_MONTH = -1 # monthly_recurring_day value meaning "the month's last day"
+
+# Interval anchor for rules without a start date, so "every 2 weeks" means the same weeks no
+# matter when the expansion window starts. A Monday, in January. Interval rules saved through the
+# API get a start date (see parse_recurrence_fields), so this only phases legacy rows.
+EPOCH = date(2000, 1, 3)
+
+class RecurrenceError(ValueError):
+    """Raised for recurrence rule payloads that can't be expanded."""
+
+@dataclass(frozen=True)
+class Recurrence:
+    """
+    Immutable, hashable description of a recurrence rule; what the expansion functions and their
+    cache work on. Build it from a RecurrenceRule row with from_rule() or from request data via
+    parse_recurrence_fields().
+      daily:   every interval days
+      weekly:  the ISO weekdays (1=Mon..7=Sun) of every interval-th week
+      monthly: day month_day (or LAST_DAY_OF_MONTH) of every interval-th month; days past the
+               end of a shorter month fall on its last day
+      annual:  month/month_day every interval years (29 Feb falls on the 28th in other years)
+    start and end bound the series (inclusive) and anchor the interval.
+    """
+    rule_type: str
+    interval: int = 1
+    weekdays: tuple = ()
+    month_day: int = None
+    month: int = None
+    start: date = None
+    end: date = None
+
+    @classmethod
+    def from_rule(cls, rule):
+        return cls(
+            rule_type=rule.rule_type,
+            interval=rule.interval or 1,
+            weekdays=rule_weekdays(rule),
+            month_day=rule.monthly_recurring_day,
+            month=rule.month_of_year,
+            start=rule.start_date.date() if rule.start_date else None,
+            end=rule.end_date.date() if rule.end_date else None
+        )
+
+def rule_weekdays(rule):
+    # Multi-day weekly rules store all days in weekdays; single-day ones only weekly_recurring_day
+    if rule.weekdays:
+        return tuple(int(day) for day in rule.weekdays.split(','))
+    if rule.weekly_recurring_day:
+        return (rule.weekly_recurring_day,)
+    return ()
+
+def _days_in_month(year, month):
+    return calendar.monthrange(year, month)[1]
+
+def add_months(day, months):
+    """day shifted by whole calendar months, clamped to the end of shorter months."""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    return date(year, month + 1, min(day.day, _days_in_month(year, month + 1)))
+
+def _daily(rec, start, end):
+    anchor = rec.start or EPOCH
+    day = start + timedelta(days=(anchor - start).days % rec.interval)
+    step = timedelta(days=rec.interval)
+    while end is None or day <= end:
+        yield day
+        day += step
+
+def _weekly(rec, start, end):
+    offsets = sorted(set(day - 1 for day in rec.weekdays))
+    anchor_week = (rec.start or EPOCH) - timedelta(days=(rec.start or EPOCH).weekday())
+    week = ((start - timedelta(days=start.weekday())) - anchor_week).days // 7
+    week += (-week) % rec.interval # First week of the series on or after start's week
+    for week in count(week, rec.interval):
+        monday = anchor_week + timedelta(weeks=week)
+        for offset in offsets:
+            day = monday + timedelta(days=offset)
+            if day < start:
+                continue
+            if end is not None and day > end:
+                return
+            yield day
+
+def _monthly(rec, start, end):
+    anchor = rec.start or EPOCH
+    anchor_index = anchor.year * 12 + anchor.month - 1
+    index = start.year * 12 + start.month - 1
+    index += (anchor_index - index) % rec.interval # Jump straight to the first month of the series
+    for index in count(index, rec.interval):
+        year, month = divmod(index, 12)
+        last = _days_in_month(year, month + 1)
+        day = date(year, month + 1, last if rec.month_day == LAST_DAY_OF_MONTH else min(rec.month_day, last))
+        if day < start:
+            continue
+        if end is not None and day > end:
+            return
+        yield day
+
+def _annual(rec, start, end):
+    anchor_year = (rec.start or EPOCH).year
+    year = start.year + (anchor_year - start.year) % rec.interval
+    for year in count(year, rec.interval):
+        last = _days_in_month(year, rec.month)
+        day = date(year, rec.month, last if rec.month_day == LAST_DAY_OF_MONTH else min(rec.month_day, last))
+        if day < start:
+            continue
+        if end is not None and day > end:
+            return
+        yield day
+
+def _is_complete(rec):
+    if rec.rule_type == 'weekly':
+        return bool(rec.weekdays)
+    if rec.rule_type == 'monthly':
+        return rec.month_day is not None
+    if rec.rule_type == 'annual':
+        return rec.month_day is not None and rec.month is not None
+    return rec.rule_type == 'daily'
+
+_EXPANDERS = {'daily': _daily, 'weekly': _weekly, 'monthly': _monthly, 'annual': _annual}
+
+def occurrences(rec, start, end=None):
+    """
+    Lazily yields the rule's dates from start to end (inclusive, None for open ended), in order.
+    Each kind computes its first date in the window directly and then steps by its interval,
+    so the cost is the same per occurrence whatever the window or rule.
+    """
+    if not _is_complete(rec): # e.g. legacy rows missing their day; they never produced dates
+        return iter(())
+    if rec.start and start < rec.start:
+        start = rec.start
+    if rec.end and (end is None or end > rec.end):
+        end = rec.end
+    if end is not None and end < start:
+        return iter(())
+    return _EXPANDERS[rec.rule_type](rec, start, end)
+
+# The cache holds whole-month windows of at most this many months, MAX_CACHED_WINDOWS of them:
+# bounded at a few MB even for daily rules (a year of dates is ~15 KB), while the nightly job's
+# windows, which shift by a day at a time, keep hitting the same month-aligned entry
+MAX_CACHED_WINDOW_MONTHS = 24
+MAX_CACHED_WINDOWS = 256
+
+@lru_cache(maxsize=MAX_CACHED_WINDOWS)
+def _month_window(rec, first_month, last_month):
+    """All of the rule's dates from first_month's first day to last_month's last day."""
+    end = date(last_month.year, last_month.month, _days_in_month(last_month.year, last_month.month))
+    return tuple(occurrences(rec, first_month, end))
+
+def expand(rec, start, end, limit=None):
+    """
+    occurrences() for a (rule, window) as a tuple of at most limit dates. Many definitions
+    share a rule and the nightly job asks for much the same window for all of them, so windows
+    up to MAX_CACHED_WINDOW_MONTHS are served from a cache of whole months; open ended and
+    longer windows are computed each time.
+    """
+    first_month = start.replace(day=1)
+    if end is None or end < start or add_months(first_month, MAX_CACHED_WINDOW_MONTHS) <= end:
+        return tuple(islice(occurrences(rec, start, end), limit))
+    days = (day for day in _month_window(rec, first_month, end.replace(day=1)) if start <= day <= end)
+    return tuple(islice(days, limit))
+
+def due_dates(rec, start, end, limit=None):
+    """expand() as the midnight datetimes task instances use for due dates."""
+    return [datetime(day.year, day.month, day.day) for day in expand(rec, start, end, limit)]
+
+def _int_field(data, key, low, high, allow=()):
+    value = data.get(key)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise RecurrenceError(f'{key} must be an integer.')
+    if value not in allow and not low <= value <= high:
+        raise RecurrenceError(f'{key} must be between {low} and {high}.')
+    return value
+
+def _date_field(data, key):
+    value = data.get(key)
+    if value in (None, ''):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise RecurrenceError(f'Invalid {key} format.')
+    return datetime(parsed.year, parsed.month, parsed.day)
+
+def parse_recurrence_fields(data, default_start=None):
+    """
+    Validates a recurrence_rule payload and returns the RecurrenceRule column values for it.
+    Only the fields the rule type uses are kept (the rest are cleared), so a payload carrying
+    leftovers from a previous rule type still produces a clean rule. Rules with an interval
+    above 1 and no start_date start on default_start (e.g. today for a new rule), so "every
+    2 weeks" counts from when it was set up rather than from EPOCH. Raises RecurrenceError.
+    """
+    rule_type = data.get('rule_type')
+    if rule_type == 'annually':
+        rule_type = 'annual'
+    if not rule_type:
+        raise RecurrenceError('Recurrence rule_type is required.')
+    if rule_type not in RULE_TYPES:
+        raise RecurrenceError(f"Unknown rule_type '{rule_type}'; expected one of {', '.join(RULE_TYPES)}.")
+
+    fields = {
+        'rule_type': rule_type,
+        'interval': _int_field(data, 'interval', 1, 1000) or 1,
+        'weekly_recurring_day': None,
+        'weekdays': None,
+        'monthly_recurring_day': None,
+        'month_of_year': None,
+        'start_date': _date_field(data, 'start_date'),
+        'end_date': _date_field(data, 'end_date')
+    }
+    if fields['start_date'] is None and fields['interval'] > 1:
+        fields['start_date'] = default_start
+    if fields['start_date'] and fields['end_date'] and fields['end_date'] < fields['start_date']:
+        raise RecurrenceError('end_date must not be before start_date.')
+
+    if rule_type == 'weekly':
+        days = data.get('weekdays')
+        if isinstance(days, str):
+            days = [day for day in days.split(',') if day.strip()]
+        days = sorted(set(_int_field({'weekdays': day}, 'weekdays', 1, 7) for day in days or []))
+        single = _int_field(data, 'weekly_recurring_day', 1, 7)
+        if len(days) > 1:
+            fields['weekdays'] = ','.join(str(day) for day in days)
+        elif days or single:
+            fields['weekly_recurring_day'] = days[0] if days else single
+        else:
+            raise RecurrenceError('Weekly rules need weekly_recurring_day or weekdays (1=Mon..7=Sun).')
+    elif rule_type in ('monthly', 'annual'):
+        month_day = _int_field(data, 'monthly_recurring_day', 1, 31, allow=(LAST_DAY_OF_MONTH,))
+        if month_day is None:
+            raise RecurrenceError(f'{rule_type.capitalize()} rules need monthly_recurring_day (1-31, or -1 for the last day).')
+        fields['monthly_recurring_day'] = month_day
+        if rule_type == 'annual':
+            month = _int_field(data, 'month_of_year', 1, 12)
+            if month is None:
+                raise RecurrenceError('Annual rules need month_of_year (1-12).')
+            fields['month_of_year'] = month
+    return fields
+
+def recurrence_from_fields(fields):
+    """Recurrence for parse_recurrence_fields() output, e.g. to preview a rule before saving it."""
+    return Recurrence.from_rule(SimpleNamespace(**fields))
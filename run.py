@@ -1,438 +1,1056 @@
-from app_init import create_app, db # Import from app_init.py in root
-from models.models import TaskDefinition, TaskInstance, RecurrenceRule, Setting, Category, Asset # Import Asset
-from services import generate_task_instances, DEFAULT_MAX_INSTANCES_TO_GENERATE, DEFAULT_MAX_ADVANCE_GENERATION_MONTHS # Import the service and defaults
-from flask import jsonify, request, send_from_directory # Keep send_from_directory
-import os
-from datetime import datetime, timezone # Import datetime and timezone
-
-app = create_app() # Create app instance using the factory
-
-# The /api/hello endpoint can be removed or kept for testing
-@app.route('/api/hello')
-def hello():
-    return jsonify(message="Hello from updated Flask app!")
-
-# --- Category API Endpoints ---
-@app.route('/api/categories', methods=['GET'])
-def get_categories():
-    categories = Category.query.order_by(Category.short_name).all()
-    return jsonify([cat.to_dict() for cat in categories])
-
-@app.route('/api/categories', methods=['POST'])
-def create_category():
-    data = request.get_json() or {}
-    if not data.get('short_name'):
-        return jsonify({'error': 'Short name is required'}), 400
-    
-    # Prevent changing short_name (PK) via POST, should be via specific endpoint if ever needed
-    # For now, we assume short_name is immutable once created.
-    if db.session.get(Category, data['short_name']):
-         return jsonify({'error': 'Category with this short name already exists'}), 409
-
-    new_category = Category(short_name=data['short_name'], icon=data.get('icon'))
-    db.session.add(new_category)
-    db.session.commit()
-    return jsonify(new_category.to_dict()), 201
-
-@app.route('/api/categories/<string:short_name>', methods=['PUT'])
-def update_category(short_name):
-    category = db.session.get(Category, short_name)
-    if not category:
-        return jsonify({'error': 'Category not found'}), 404
-    data = request.get_json() or {}
-    # Only icon is updatable for now, short_name is PK and shouldn't be changed here.
-    # If short_name were to be changed, it would be a more complex operation (new record, update FKs, delete old).
-    if 'icon' in data:
-        category.icon = data['icon']
-    # Add other updatable fields here if necessary
-    db.session.commit()
-    return jsonify(category.to_dict())
-
-@app.route('/api/categories/<string:short_name>', methods=['DELETE'])
-def delete_category(short_name):
-    if short_name in ['Default', 'Maintenance']:
-        return jsonify({'error': f'Category "{short_name}" is protected and cannot be deleted.'}), 403 # Forbidden
-
-    category = db.session.get(Category, short_name)
-    if not category:
-        return jsonify({'error': 'Category not found'}), 404
-    
-    if category.task_definitions:
-        return jsonify({'error': 'Category is in use and cannot be deleted. Please reassign tasks first.'}), 400
-
-    db.session.delete(category)
-    db.session.commit()
-    return jsonify({'message': 'Category deleted'}), 200
-
-# --- Asset API Endpoints ---
-@app.route('/api/assets', methods=['POST'])
-def create_asset():
-    data = request.get_json() or {}
-    if not data.get('name'):
-        return jsonify({'error': 'Asset name is required'}), 400
-    
-    asset = Asset(name=data['name'], description=data.get('description'))
-    db.session.add(asset)
-    db.session.commit()
-    return jsonify(asset.to_dict()), 201
-
-@app.route('/api/assets', methods=['GET'])
-def get_assets():
-    assets = Asset.query.order_by(Asset.name).all()
-    return jsonify([asset.to_dict() for asset in assets])
-
-@app.route('/api/assets/<int:id>', methods=['GET'])
-def get_asset(id):
-    asset = db.session.get(Asset, id)
-    if asset is None:
-        return jsonify({'error': 'Asset not found'}), 404
-    return jsonify(asset.to_dict())
-
-@app.route('/api/assets/<int:id>', methods=['PUT'])
-def update_asset(id):
-    asset = db.session.get(Asset, id)
-    if asset is None:
-        return jsonify({'error': 'Asset not found'}), 404
-    data = request.get_json() or {}
-    if 'name' in data and not data['name']:
-        return jsonify({'error': 'Asset name cannot be empty'}), 400
-
-    asset.name = data.get('name', asset.name)
-    asset.description = data.get('description', asset.description)
-    # Add other updatable fields for Asset here if necessary
-    db.session.commit()
-    return jsonify(asset.to_dict())
-
-@app.route('/api/assets/<int:id>', methods=['DELETE'])
-def delete_asset(id):
-    asset = db.session.get(Asset, id)
-    if asset is None:
-        return jsonify({'error': 'Asset not found'}), 404
-    
-    # Check if asset is linked to any task definitions
-    if asset.task_definitions.first(): # Using lazy='dynamic' allows .first()
-        return jsonify({'error': 'Asset is linked to task definitions and cannot be deleted. Please remove links first.'}), 400
-
-    db.session.delete(asset)
-    db.session.commit()
-    return jsonify({'message': 'Asset deleted'}), 200
-
-@app.route('/api/assets/<int:asset_id>/completed_task_instances', methods=['GET'])
-def get_completed_task_instances_for_asset(asset_id):
-    asset = db.session.get(Asset, asset_id)
-    if not asset:
-        return jsonify({'error': 'Asset not found'}), 404
-
-    completed_instances = TaskInstance.query.join(TaskDefinition).filter(
-        TaskDefinition.asset_id == asset_id,
-        TaskInstance.status == 'Completed'
-    ).order_by(TaskInstance.completion_date.desc()).all()
-    
-    return jsonify([instance.to_dict() for instance in completed_instances])
-
-# --- TaskDefinition CRUD API Endpoints ---
-
-@app.route('/api/task_definitions', methods=['POST'])
-def create_task_definition():
-    data = request.get_json() or {}
-    if 'title' not in data or not data['title']:
-        return jsonify({'error': 'Title is required'}), 400
-
-    category_short_name = data.get('category_short_name')
-    if category_short_name:
-        category_obj = db.session.get(Category, category_short_name)
-        if not category_obj:
-            return jsonify({'error': f'Category "{category_short_name}" not found.'}), 400
-    
-    asset_id = data.get('asset_id')
-    if asset_id:
-        asset_obj = db.session.get(Asset, asset_id)
-        if not asset_obj:
-            return jsonify({'error': f'Asset "{asset_id}" not found.'}), 400
-
-    due_date_str = data.get('due_date')
-    recurrence_data = data.get('recurrence_rule')
-    if due_date_str and recurrence_data:
-        return jsonify({'error': 'Cannot have both due_date and recurrence_rule.'}), 400
-    due_date_obj = None
-    if due_date_str:
-        try:
-            due_date_obj = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
-            if due_date_obj.tzinfo is None: due_date_obj = due_date_obj.replace(tzinfo=timezone.utc)
-        except ValueError: return jsonify({'error': 'Invalid due_date format.'}), 400
-
-    task_def = TaskDefinition(
-        title=data['title'],
-        description=data.get('description'),
-        notes=data.get('notes'),
-        category_short_name=category_short_name,
-        priority=data.get('priority'),
-        due_date=due_date_obj,
-        asset_id=asset_id
-    )
-    db.session.add(task_def)
-    # db.session.flush() # Flush to get task_def.id before creating rule/instance
-
-    if recurrence_data:
-        rule_type = recurrence_data.get('rule_type')
-        if not rule_type: return jsonify({'error': 'Recurrence rule_type is required.'}), 400
-        new_recurrence_rule = RecurrenceRule(task_definition=task_def, rule_type=rule_type, weekly_recurring_day=recurrence_data.get('weekly_recurring_day'), monthly_recurring_day=recurrence_data.get('monthly_recurring_day'))
-        db.session.add(new_recurrence_rule)
-        # task_def.recurrence_rule = new_recurrence_rule # This is handled by backref if task_definition=task_def used
-        db.session.flush() # Ensure rule is associated and task_def.id is available
-        generate_task_instances(task_def, is_new_definition=True)
-    elif due_date_obj: # One-off task instance creation
-        db.session.flush() # Ensure task_def.id is available
-        instance = TaskInstance(
-            task_definition_id=task_def.id,
-            due_date=due_date_obj,
-            status='Pending'
-        )
-        db.session.add(instance)
-    
-    db.session.commit()
-    return jsonify(task_def.to_dict()), 201
-
-@app.route('/api/task_definitions', methods=['GET'])
-def get_task_definitions():
-    tasks = TaskDefinition.query.all()
-    return jsonify([task.to_dict() for task in tasks])
-
-@app.route('/api/task_definitions/<int:id>', methods=['GET'])
-def get_task_definition(id):
-    task_def = db.session.get(TaskDefinition, id) # Use db.session.get for SQLAlchemy 2.0+
-    if task_def is None:
-        return jsonify({'error': 'Task definition not found'}), 404
-    return jsonify(task_def.to_dict())
-
-@app.route('/api/task_definitions/<int:id>', methods=['PUT'])
-def update_task_definition(id):
-    task_def = db.session.get(TaskDefinition, id)
-    if task_def is None:
-        return jsonify({'error': 'Task definition not found'}), 404
-    
-    data = request.get_json() or {}
-    if 'title' in data and not data['title']:
-         return jsonify({'error': 'Title cannot be empty'}), 400
-
-    task_def.title = data.get('title', task_def.title)
-    task_def.description = data.get('description', task_def.description) # Update short description
-    task_def.notes = data.get('notes', task_def.notes)                   # Update notes
-    task_def.priority = data.get('priority', task_def.priority)
-
-    if 'category_short_name' in data:
-        new_cat_short_name = data['category_short_name']
-        if new_cat_short_name:
-            category_obj = db.session.get(Category, new_cat_short_name)
-            if not category_obj:
-                return jsonify({'error': f'Category "{new_cat_short_name}" not found.'}), 400
-            task_def.category_short_name = new_cat_short_name
-            task_def.defined_category = category_obj # Ensure relationship is updated if accessed before commit
-        else: # explicitly setting category to null
-            task_def.category_short_name = None
-            task_def.defined_category = None # Ensure relationship is updated
-            
-    if 'asset_id' in data:
-        new_asset_id = data['asset_id']
-        if new_asset_id:
-            asset_obj = db.session.get(Asset, new_asset_id)
-            if not asset_obj:
-                return jsonify({'error': f'Asset "{new_asset_id}" not found.'}), 400
-            task_def.asset_id = new_asset_id
-            # task_def.asset = asset_obj # Relationship will be updated by FK assignment
-        else: # explicitly setting asset_id to null
-            task_def.asset_id = None
-
-    due_date_str = data.get('due_date')
-    recurrence_data = data.get('recurrence_rule')
-
-    if due_date_str and recurrence_data:
-        return jsonify({'error': 'Cannot have both due_date and recurrence_rule for update.'}), 400
-
-    # Handle Due Date Update (clearing or setting new)
-    if 'due_date' in data: # Check if key exists, even if value is null
-        if due_date_str:
-            try:
-                due_date_obj = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
-                if due_date_obj.tzinfo is None: due_date_obj = due_date_obj.replace(tzinfo=timezone.utc)
-                task_def.due_date = due_date_obj
-                if task_def.recurrence_rule: # If it was recurring, now it's one-off
-                    db.session.delete(task_def.recurrence_rule)
-                    task_def.recurrence_rule = None
-                    # Potentially delete old future instances and create one new one
-                    TaskInstance.query.filter(TaskInstance.task_definition_id == task_def.id, TaskInstance.due_date > datetime.utcnow(), TaskInstance.status == 'Pending').delete(synchronize_session=False)
-                    instance = TaskInstance(task_definition_id=task_def.id, due_date=due_date_obj, status='Pending')
-                    db.session.add(instance)
-
-            except ValueError:
-                return jsonify({'error': 'Invalid due_date format for update.'}), 400
-        else: # due_date is explicitly set to null/empty, clear it
-            task_def.due_date = None
-            # If it becomes neither one-off nor recurring, handle as needed (maybe error or clear instances)
-
-    # Handle Recurrence Rule Update
-    if 'recurrence_rule' in data:
-        if recurrence_data: # If new recurrence data is provided
-            task_def.due_date = None # Cannot be a one-off task anymore
-            # Clear existing future instances before generating new ones
-            TaskInstance.query.filter(TaskInstance.task_definition_id == task_def.id, TaskInstance.due_date > datetime.utcnow(), TaskInstance.status == 'Pending').delete(synchronize_session=False)
-            
-            if task_def.recurrence_rule:
-                # Update existing rule
-                task_def.recurrence_rule.rule_type = recurrence_data.get('rule_type', task_def.recurrence_rule.rule_type)
-                task_def.recurrence_rule.weekly_recurring_day = recurrence_data.get('weekly_recurring_day')
-                task_def.recurrence_rule.monthly_recurring_day = recurrence_data.get('monthly_recurring_day')
-            else:
-                # Create new rule
-                new_rule = RecurrenceRule(
-                    task_definition=task_def,
-                    rule_type=recurrence_data.get('rule_type'),
-                    weekly_recurring_day=recurrence_data.get('weekly_recurring_day'),
-                    monthly_recurring_day=recurrence_data.get('monthly_recurring_day')
-                )
-                db.session.add(new_rule)
-                # task_def.recurrence_rule = new_rule # Handled by backref
-            db.session.flush() # Important: ensure rule is associated
-            generate_task_instances(task_def, is_new_definition=False) # Regenerate based on new/updated rule
-        else: # Recurrence rule is explicitly set to null (remove recurrence)
-            if task_def.recurrence_rule:
-                db.session.delete(task_def.recurrence_rule)
-                task_def.recurrence_rule = None
-                # Also delete future pending instances for this task def
-                TaskInstance.query.filter(TaskInstance.task_definition_id == task_def.id, TaskInstance.due_date > datetime.utcnow(), TaskInstance.status == 'Pending').delete(synchronize_session=False)
-
-    db.session.commit()
-    return jsonify(task_def.to_dict())
-
-@app.route('/api/task_definitions/<int:id>', methods=['DELETE'])
-def delete_task_definition(id):
-    task_def = db.session.get(TaskDefinition, id)
-    if task_def is None:
-        return jsonify({'error': 'Task definition not found'}), 404
-    db.session.delete(task_def)
-    db.session.commit()
-    return jsonify({'message': 'Task definition deleted'}), 200
-
-# --- TaskInstance API Endpoints ---
-
-@app.route('/api/task_instances', methods=['GET'])
-def get_task_instances():
-    instances = TaskInstance.query.order_by(TaskInstance.due_date).all()
-    return jsonify([instance.to_dict() for instance in instances])
-
-@app.route('/api/task_instances/<int:id>', methods=['GET'])
-def get_task_instance(id):
-    instance = db.session.get(TaskInstance, id)
-    if instance is None:
-        return jsonify({'error': 'Task instance not found'}), 404
-    return jsonify(instance.to_dict())
-
-@app.route('/api/task_instances/<int:id>/complete', methods=['PUT'])
-def complete_task_instance(id):
-    instance = db.session.get(TaskInstance, id)
-    if instance is None:
-        return jsonify({'error': 'Task instance not found'}), 404
-    
-    # Idempotency: if already completed, do nothing or return current state with 200 OK
-    if instance.status == 'Completed':
-        return jsonify(instance.to_dict()), 200 
-
-    instance.completion_date = datetime.now(timezone.utc) # Use timezone-aware datetime
-    instance.status = 'Completed'
-    db.session.commit()
-    return jsonify(instance.to_dict())
-
-# --- Settings API Endpoints ---
-@app.route('/api/settings', methods=['GET'])
-def get_settings():
-    settings_db = Setting.query.all()
-    settings_map = {s.key: s.value for s in settings_db}
-    # Ensure defaults are present if not in DB for the frontend
-    if 'MAX_INSTANCES_TO_GENERATE' not in settings_map:
-        settings_map['MAX_INSTANCES_TO_GENERATE'] = str(DEFAULT_MAX_INSTANCES_TO_GENERATE)
-    if 'MAX_ADVANCE_GENERATION_MONTHS' not in settings_map:
-        settings_map['MAX_ADVANCE_GENERATION_MONTHS'] = str(DEFAULT_MAX_ADVANCE_GENERATION_MONTHS)
-    return jsonify(settings_map)
-
-@app.route('/api/settings', methods=['POST'])
-def update_settings():
-    data = request.get_json() or {}
-    if not data:
-        return jsonify({'error': 'No data provided'}), 400
-
-    allowed_keys = {'MAX_INSTANCES_TO_GENERATE', 'MAX_ADVANCE_GENERATION_MONTHS'} # Use a set for efficient lookup
-    updated_settings = []
-    errors = [] 
-
-    for key, value in data.items():
-        if key in allowed_keys:
-            try:
-                val_int = int(value)
-                if val_int < 0:
-                    errors.append(f'Invalid value for {key}: must be a non-negative integer.')
-                    continue 
-                value_str = str(val_int) # Store as string, but validated as int
-            except ValueError:
-                errors.append(f'Invalid value for {key}: must be an integer.')
-                continue
-            
-            setting = db.session.get(Setting, key)
-            if setting:
-                setting.value = value_str
-            else:
-                setting = Setting(key=key, value=value_str)
-                db.session.add(setting)
-            updated_settings.append(key) # Keep track of what was processed
-        else:
-            # It might be better to collect all unknown keys and report once
-            errors.append(f'Unknown or not-allowed setting key: {key}')
-    
-    if errors:
-        return jsonify({'error': 'Failed to update settings.', 'details': errors}), 400
-
-    if updated_settings:
-        db.session.commit()
-        return jsonify({'message': f'{len(updated_settings)} setting(s) updated successfully: {", ".join(updated_settings)}'}), 200
-    else:
-        return jsonify({'message': 'No valid settings were provided for update.'}), 200 # Or 400 if no valid keys were sent
-
-# Function to bootstrap settings
-def bootstrap_settings():
-    defaults = {
-        'MAX_INSTANCES_TO_GENERATE': str(DEFAULT_MAX_INSTANCES_TO_GENERATE),
-        'MAX_ADVANCE_GENERATION_MONTHS': str(DEFAULT_MAX_ADVANCE_GENERATION_MONTHS)
-    }
-    for key, value_str in defaults.items():
-        setting = db.session.get(Setting, key)
-        if not setting:
-            new_setting = Setting(key=key, value=value_str)
-            db.session.add(new_setting)
-    
-    # Bootstrap Default Category
-    if not db.session.get(Category, 'Default'):
-        db.session.add(Category(short_name='Default', icon='📑'))
-    # Bootstrap Maintenance Category
-    if not db.session.get(Category, 'Maintenance'):
-        db.session.add(Category(short_name='Maintenance', icon='🔧')) # Wrench icon
-
-    db.session.commit()
-
-# --- Static File Serving (for Preact frontend) ---
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve_static(path):
-    if path != "" and app.static_folder and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    elif app.static_folder and os.path.exists(os.path.join(app.static_folder, 'index.html')): # Check for index.html explicitly
-        return send_from_directory(app.static_folder, 'index.html')
-    else:
-        # Consider a more specific error or a custom 404 page if index.html itself is missing
-        app.logger.error(f"Static file not found: {path}. Static folder: {app.static_folder}")
-        return jsonify(error="Resource not found or application not fully initialized."), 404
-
-
-if __name__ == '__main__':
-    with app.app_context(): # Ensure db operations have app context
-        db.create_all() # Creates the database table if it doesn't exist
-        bootstrap_settings() # Call bootstrap function
+from app_init import create_app, db # Import from app_init.py in root
+from models.models import TaskDefinition, TaskInstance, TaskInstanceHistory, RecurrenceRule, Setting, Category, Asset, ChangeTombstone, CompletionStat, definition_details # Import Asset
+from models.serializers import instance_rows, instance_row_to_dict, definition_rows, definition_row_to_dict
+from services import generate_task_instances, reconcile_task_instances, asset_summaries, ensure_overdue_marked, status_for_due_date, get_generation_limits, materialize_occurrence, unmaterialized_occurrences, DEFAULT_MAX_INSTANCES_TO_GENERATE, DEFAULT_MAX_ADVANCE_GENERATION_MONTHS # Import the service and defaults
+from recurrence import Recurrence, RecurrenceError, add_months, expand, parse_recurrence_fields, recurrence_from_fields
+from settings_cache import get_settings_cache
+from http_cache import conditional_on
+from change_tracking import get_current_version
+from events import format_sse, get_broadcaster, publish_event
+from streaming import stream_json, wants_stream, yield_rows
+from search import search, MAX_SEARCH_RESULTS, SEARCH_TYPES
+from completion_stats import CompletionStatsChange, GROUP_BY_FIELDS, PERIODS, completion_statistics
+from flask import Response, jsonify, request, stream_with_context
+import queue
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+import base64
+import heapq
+from datetime import date, datetime, timedelta, timezone # Import datetime and timezone
+
+app = create_app() # Create app instance using the factory
+
+@app.before_request
+def refresh_overdue_statuses():
+    # Lazily apply the daily Pending -> Overdue transition before any API read (and its ETag check)
+    if request.method == 'GET' and request.path.startswith('/api/'):
+        ensure_overdue_marked()
+
+# The /api/hello endpoint can be removed or kept for testing
+@app.route('/api/hello')
+def hello():
+    return jsonify(message="Hello from updated Flask app!")
+
+# --- Category API Endpoints ---
+@app.route('/api/categories', methods=['GET'])
+@conditional_on(Category)
+def get_categories():
+    categories = Category.query.order_by(Category.short_name).all()
+    return jsonify([cat.to_dict() for cat in categories])
+
+@app.route('/api/categories', methods=['POST'])
+def create_category():
+    data = request.get_json() or {}
+    if not data.get('short_name'):
+        return jsonify({'error': 'Short name is required'}), 400
+    
+    # Prevent changing short_name (PK) via POST, should be via specific endpoint if ever needed
+    # For now, we assume short_name is immutable once created.
+    if db.session.get(Category, data['short_name']):
+         return jsonify({'error': 'Category with this short name already exists'}), 409
+
+    new_category = Category(short_name=data['short_name'], icon=data.get('icon'))
+    db.session.add(new_category)
+    db.session.commit()
+    return jsonify(new_category.to_dict()), 201
+
+@app.route('/api/categories/<string:short_name>', methods=['PUT'])
+def update_category(short_name):
+    category = db.session.get(Category, short_name)
+    if not category:
+        return jsonify({'error': 'Category not found'}), 404
+    data = request.get_json() or {}
+    # Only icon is updatable for now, short_name is PK and shouldn't be changed here.
+    # If short_name were to be changed, it would be a more complex operation (new record, update FKs, delete old).
+    if 'icon' in data:
+        category.icon = data['icon']
+    # Add other updatable fields here if necessary
+    db.session.commit()
+    return jsonify(category.to_dict())
+
+@app.route('/api/categories/<string:short_name>', methods=['DELETE'])
+def delete_category(short_name):
+    if short_name in ['Default', 'Maintenance']:
+        return jsonify({'error': f'Category "{short_name}" is protected and cannot be deleted.'}), 403 # Forbidden
+
+    category = db.session.get(Category, short_name)
+    if not category:
+        return jsonify({'error': 'Category not found'}), 404
+    
+    if category.task_definitions:
+        return jsonify({'error': 'Category is in use and cannot be deleted. Please reassign tasks first.'}), 400
+
+    db.session.delete(category)
+    db.session.commit()
+    return jsonify({'message': 'Category deleted'}), 200
+
+# --- Asset API Endpoints ---
+@app.route('/api/assets', methods=['POST'])
+def create_asset():
+    data = request.get_json() or {}
+    if not data.get('name'):
+        return jsonify({'error': 'Asset name is required'}), 400
+    
+    asset = Asset(name=data['name'], description=data.get('description'))
+    db.session.add(asset)
+    db.session.commit()
+    return jsonify(asset.to_dict()), 201
+
+EMPTY_ASSET_SUMMARY = {'last_completed': None, 'next_due': None, 'overdue_count': 0}
+
+def asset_dicts(assets):
+    """
+    to_dict() of the assets with their definitions and a summary (last completion, next pending
+    due date, overdue count), in three queries however many assets and definitions there are.
+    """
+    asset_ids = [asset.id for asset in assets]
+    definitions = {}
+    for task_def in TaskDefinition.query.options(
+        joinedload(TaskDefinition.defined_category), joinedload(TaskDefinition.recurrence_rule)
+    ).filter(TaskDefinition.asset_id.in_(asset_ids)).order_by(TaskDefinition.id):
+        definitions.setdefault(task_def.asset_id, []).append(task_def)
+    summaries = asset_summaries(asset_ids)
+    return [asset.to_dict(task_definitions=definitions.get(asset.id, []),
+                          summary=summaries.get(asset.id, EMPTY_ASSET_SUMMARY)) for asset in assets]
+
+@app.route('/api/assets', methods=['GET'])
+@conditional_on(Asset, TaskDefinition, Category, RecurrenceRule, TaskInstance, TaskInstanceHistory)
+def get_assets():
+    assets = Asset.query.order_by(Asset.name).all()
+    return jsonify(asset_dicts(assets))
+
+@app.route('/api/assets/<int:id>', methods=['GET'])
+def get_asset(id):
+    asset = db.session.get(Asset, id)
+    if asset is None:
+        return jsonify({'error': 'Asset not found'}), 404
+    return jsonify(asset_dicts([asset])[0])
+
+@app.route('/api/assets/<int:id>', methods=['PUT'])
+def update_asset(id):
+    asset = db.session.get(Asset, id)
+    if asset is None:
+        return jsonify({'error': 'Asset not found'}), 404
+    data = request.get_json() or {}
+    if 'name' in data and not data['name']:
+        return jsonify({'error': 'Asset name cannot be empty'}), 400
+
+    asset.name = data.get('name', asset.name)
+    asset.description = data.get('description', asset.description)
+    # Add other updatable fields for Asset here if necessary
+    db.session.commit()
+    return jsonify(asset.to_dict())
+
+@app.route('/api/assets/<int:id>', methods=['DELETE'])
+def delete_asset(id):
+    asset = db.session.get(Asset, id)
+    if asset is None:
+        return jsonify({'error': 'Asset not found'}), 404
+    
+    # Check if asset is linked to any task definitions
+    if asset.task_definitions.first(): # Using lazy='dynamic' allows .first()
+        return jsonify({'error': 'Asset is linked to task definitions and cannot be deleted. Please remove links first.'}), 400
+
+    db.session.delete(asset)
+    db.session.commit()
+    return jsonify({'message': 'Asset deleted'}), 200
+
+MAX_ASSET_HISTORY_PAGE_SIZE = 500
+
+@app.route('/api/assets/<int:asset_id>/completed_task_instances', methods=['GET'])
+@conditional_on(TaskInstance, TaskInstanceHistory, TaskDefinition, Category, Asset)
+def get_completed_task_instances_for_asset(asset_id):
+    """
+    The asset's completed instances, live and archived, most recently completed first.
+    Passing limit enables keyset pagination: the next page is requested with the cursor
+    returned in the X-Next-Cursor header. Without limit, ?stream=1 / ?stream=ndjson stream
+    the full history instead of buffering it.
+    """
+    asset = db.session.get(Asset, asset_id)
+    if not asset:
+        return jsonify({'error': 'Asset not found'}), 404
+
+    # Instances completed before completion dates were recorded have none; they sort by due date
+    live_completed_at = func.coalesce(TaskInstance.completion_date, TaskInstance.due_date)
+    completed_at = lambda instance: instance.completion_date or instance.due_date
+    completed_instances = TaskInstance.query_with_details().join(TaskDefinition).filter(
+        TaskDefinition.asset_id == asset_id,
+        TaskInstance.status == 'Completed'
+    ).order_by(live_completed_at.desc())
+    # Older completions live in the archive table; merge them in transparently
+    archived_instances = TaskInstanceHistory.query_with_details().join(TaskDefinition).filter(
+        TaskDefinition.asset_id == asset_id
+    ).order_by(TaskInstanceHistory.completion_date.desc())
+
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        # Page through both tables by (completion_date, id), descending; archived rows keep the
+        # id they had as live instances, so the key is unique across the two
+        completed_instances = completed_instances.order_by(TaskInstance.id.desc())
+        archived_instances = archived_instances.order_by(TaskInstanceHistory.instance_id.desc())
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_completed, cursor_id = decode_cursor(cursor)
+            except (ValueError, UnicodeDecodeError):
+                return jsonify({'error': 'Invalid cursor.'}), 400
+            completed_instances = completed_instances.filter(
+                tuple_(live_completed_at, TaskInstance.id) < tuple_(cursor_completed, cursor_id))
+            archived_instances = archived_instances.filter(
+                tuple_(TaskInstanceHistory.completion_date, TaskInstanceHistory.instance_id) < tuple_(cursor_completed, cursor_id))
+        limit = max(1, min(limit, MAX_ASSET_HISTORY_PAGE_SIZE))
+        by_key = lambda instance: (completed_at(instance), getattr(instance, 'instance_id', instance.id))
+        # One extra row from each side tells whether another page exists
+        page = list(heapq.merge(completed_instances.limit(limit + 1).all(), archived_instances.limit(limit + 1).all(),
+                                key=by_key, reverse=True))[:limit + 1]
+        response = jsonify([instance.to_dict() for instance in page[:limit]])
+        if len(page) > limit:
+            response.headers['X-Next-Cursor'] = encode_cursor(*by_key(page[limit - 1]))
+        return response
+
+    if wants_stream(): # Both queries are already ordered, so they can be merged lazily
+        return stream_json(lambda: heapq.merge(yield_rows(completed_instances), yield_rows(archived_instances),
+                                               key=completed_at, reverse=True),
+                           lambda instance: instance.to_dict())
+
+    history = sorted(completed_instances.all() + archived_instances.all(), key=completed_at, reverse=True)
+    return jsonify([instance.to_dict() for instance in history])
+
+# --- TaskDefinition CRUD API Endpoints ---
+def start_of_today():
+    # Default anchor for new interval rules (recurrence start dates are midnights)
+    return datetime.combine(date.today(), datetime.min.time())
+
+@app.route('/api/task_definitions', methods=['POST'])
+def create_task_definition():
+    data = request.get_json() or {}
+    if 'title' not in data or not data['title']:
+        return jsonify({'error': 'Title is required'}), 400
+
+    category_short_name = data.get('category_short_name')
+    if category_short_name:
+        category_obj = db.session.get(Category, category_short_name)
+        if not category_obj:
+            return jsonify({'error': f'Category "{category_short_name}" not found.'}), 400
+    
+    asset_id = data.get('asset_id')
+    if asset_id:
+        asset_obj = db.session.get(Asset, asset_id)
+        if not asset_obj:
+            return jsonify({'error': f'Asset "{asset_id}" not found.'}), 400
+
+    due_date_str = data.get('due_date')
+    recurrence_data = data.get('recurrence_rule')
+    if due_date_str and recurrence_data:
+        return jsonify({'error': 'Cannot have both due_date and recurrence_rule.'}), 400
+    due_date_obj = None
+    if due_date_str:
+        try:
+            due_date_obj = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
+            if due_date_obj.tzinfo is None: due_date_obj = due_date_obj.replace(tzinfo=timezone.utc)
+        except ValueError: return jsonify({'error': 'Invalid due_date format.'}), 400
+
+    task_def = TaskDefinition(
+        title=data['title'],
+        description=data.get('description'),
+        notes=data.get('notes'),
+        category_short_name=category_short_name,
+        priority=data.get('priority'),
+        due_date=due_date_obj,
+        asset_id=asset_id
+    )
+    db.session.add(task_def)
+    # db.session.flush() # Flush to get task_def.id before creating rule/instance
+    generated_count = 0
+
+    if recurrence_data:
+        try:
+            rule_fields = parse_recurrence_fields(recurrence_data, default_start=start_of_today())
+        except RecurrenceError as e:
+            return jsonify({'error': str(e)}), 400
+        new_recurrence_rule = RecurrenceRule(task_definition=task_def, **rule_fields)
+        db.session.add(new_recurrence_rule)
+        # task_def.recurrence_rule = new_recurrence_rule # This is handled by backref if task_definition=task_def used
+        db.session.flush() # Ensure rule is associated and task_def.id is available
+        generated_count = generate_task_instances(task_def, is_new_definition=True)
+    elif due_date_obj: # One-off task instance creation
+        db.session.flush() # Ensure task_def.id is available
+        instance = TaskInstance(
+            task_definition_id=task_def.id,
+            due_date=due_date_obj,
+            status=status_for_due_date(due_date_obj)
+        )
+        db.session.add(instance)
+        generated_count = 1
+    
+    db.session.commit()
+    publish_event('definition_created', id=task_def.id)
+    if generated_count:
+        publish_event('instances_generated', task_definition_id=task_def.id, count=generated_count)
+    return jsonify(task_def.to_dict()), 201
+
+@app.route('/api/task_definitions', methods=['GET'])
+@conditional_on(TaskDefinition, Category, RecurrenceRule, Asset)
+def get_task_definitions():
+    query = definition_rows().order_by(TaskDefinition.id) # Plain column rows; see models/serializers.py
+    if wants_stream():
+        return stream_json(lambda: yield_rows(query), definition_row_to_dict)
+    return jsonify([definition_row_to_dict(row) for row in query])
+
+@app.route('/api/task_definitions/<int:id>', methods=['GET'])
+def get_task_definition(id):
+    task_def = db.session.get(TaskDefinition, id) # Use db.session.get for SQLAlchemy 2.0+
+    if task_def is None:
+        return jsonify({'error': 'Task definition not found'}), 404
+    return jsonify(task_def.to_dict())
+
+@app.route('/api/task_definitions/<int:id>', methods=['PUT'])
+def update_task_definition(id):
+    task_def = db.session.get(TaskDefinition, id)
+    if task_def is None:
+        return jsonify({'error': 'Task definition not found'}), 404
+    
+    data = request.get_json() or {}
+    if 'title' in data and not data['title']:
+         return jsonify({'error': 'Title cannot be empty'}), 400
+    generated_count = 0
+
+    # Statistics are kept per category/asset; moving the definition moves its history with it
+    stats_change = None
+    if 'category_short_name' in data or 'asset_id' in data:
+        stats_change = CompletionStatsChange(definitions=TaskDefinition.id == task_def.id)
+
+    task_def.title = data.get('title', task_def.title)
+    task_def.description = data.get('description', task_def.description) # Update short description
+    task_def.notes = data.get('notes', task_def.notes)                   # Update notes
+    task_def.priority = data.get('priority', task_def.priority)
+
+    if 'category_short_name' in data:
+        new_cat_short_name = data['category_short_name']
+        if new_cat_short_name:
+            category_obj = db.session.get(Category, new_cat_short_name)
+            if not category_obj:
+                return jsonify({'error': f'Category "{new_cat_short_name}" not found.'}), 400
+            task_def.category_short_name = new_cat_short_name
+            task_def.defined_category = category_obj # Ensure relationship is updated if accessed before commit
+        else: # explicitly setting category to null
+            task_def.category_short_name = None
+            task_def.defined_category = None # Ensure relationship is updated
+            
+    if 'asset_id' in data:
+        new_asset_id = data['asset_id']
+        if new_asset_id:
+            asset_obj = db.session.get(Asset, new_asset_id)
+            if not asset_obj:
+                return jsonify({'error': f'Asset "{new_asset_id}" not found.'}), 400
+            task_def.asset_id = new_asset_id
+            # task_def.asset = asset_obj # Relationship will be updated by FK assignment
+        else: # explicitly setting asset_id to null
+            task_def.asset_id = None
+
+    due_date_str = data.get('due_date')
+    recurrence_data = data.get('recurrence_rule')
+
+    if due_date_str and recurrence_data:
+        return jsonify({'error': 'Cannot have both due_date and recurrence_rule for update.'}), 400
+
+    # Handle Due Date Update (clearing or setting new)
+    if 'due_date' in data: # Check if key exists, even if value is null
+        if due_date_str:
+            try:
+                due_date_obj = datetime.fromisoformat(due_date_str.replace('Z', '+00:00'))
+                if due_date_obj.tzinfo is None: due_date_obj = due_date_obj.replace(tzinfo=timezone.utc)
+            except ValueError:
+                return jsonify({'error': 'Invalid due_date format for update.'}), 400
+            task_def.due_date = due_date_obj
+            if task_def.recurrence_rule: # If it was recurring, now it's one-off
+                db.session.delete(task_def.recurrence_rule)
+                task_def.recurrence_rule = None
+        else: # due_date is explicitly set to null/empty, clear it
+            task_def.due_date = None
+            # If it becomes neither one-off nor recurring, handle as needed (maybe error or clear instances)
+
+    # Handle Recurrence Rule Update
+    if 'recurrence_rule' in data:
+        if recurrence_data: # If new recurrence data is provided
+            try:
+                # An edited rule keeps its anchor; legacy rules without one stay on EPOCH
+                existing_rule = task_def.recurrence_rule
+                default_start = existing_rule.start_date if existing_rule else start_of_today()
+                rule_fields = parse_recurrence_fields(recurrence_data, default_start=default_start)
+            except RecurrenceError as e:
+                return jsonify({'error': str(e)}), 400
+            task_def.due_date = None # Cannot be a one-off task anymore
+            if task_def.recurrence_rule:
+                # Update existing rule
+                for field, value in rule_fields.items():
+                    setattr(task_def.recurrence_rule, field, value)
+            else:
+                # Create new rule
+                new_rule = RecurrenceRule(task_definition=task_def, **rule_fields)
+                db.session.add(new_rule)
+                # task_def.recurrence_rule = new_rule # Handled by backref
+        else: # Recurrence rule is explicitly set to null (remove recurrence)
+            if task_def.recurrence_rule:
+                db.session.delete(task_def.recurrence_rule)
+                task_def.recurrence_rule = None
+
+    # Bring existing instances in line with the new schedule, changing only what differs
+    instance_changes = None
+    if 'due_date' in data or 'recurrence_rule' in data:
+        db.session.flush() # Important: ensure rule changes are visible to the reconciler
+        instance_changes = reconcile_task_instances(task_def)
+        generated_count = instance_changes['inserted']
+    if stats_change:
+        stats_change.apply()
+
+    db.session.commit()
+    publish_event('definition_updated', id=task_def.id)
+    if generated_count:
+        publish_event('instances_generated', task_definition_id=task_def.id, count=generated_count)
+    if instance_changes and (instance_changes['deleted'] or instance_changes['rescheduled']):
+        publish_event('instances_updated', completed=0, skipped=0, rescheduled=instance_changes['rescheduled'], deleted=instance_changes['deleted'])
+    response = task_def.to_dict()
+    if instance_changes:
+        response['instance_changes'] = instance_changes # What the edit did to the task's instances
+    return jsonify(response)
+
+MAX_PREVIEW_OCCURRENCES = 500
+
+def occurrence_window():
+    """(from, to, limit) for the occurrence previews; defaults to the generation horizon from today."""
+    start = parse_datetime_param(request.args['from']).date() if request.args.get('from') else date.today()
+    if request.args.get('to'):
+        end = parse_datetime_param(request.args['to']).date()
+    else:
+        end = add_months(start, get_generation_limits()[1])
+    limit = max(1, min(request.args.get('limit', 50, type=int), MAX_PREVIEW_OCCURRENCES))
+    return start, end, limit
+
+@app.route('/api/task_definitions/<int:id>/occurrences', methods=['GET'])
+def get_task_definition_occurrences(id):
+    """Dates the definition's rule produces in [from, to] (ISO dates, inclusive). Read-only: nothing is materialized."""
+    task_def = db.session.get(TaskDefinition, id)
+    if task_def is None:
+        return jsonify({'error': 'Task definition not found'}), 404
+    if not task_def.recurrence_rule:
+        return jsonify({'error': 'Task definition is not recurring.'}), 400
+    try:
+        start, end, limit = occurrence_window()
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to format.'}), 400
+    dates = expand(Recurrence.from_rule(task_def.recurrence_rule), start, end, limit)
+    return jsonify({'occurrences': [day.isoformat() for day in dates]})
+
+@app.route('/api/recurrence/preview', methods=['POST'])
+def preview_recurrence():
+    """Expands an unsaved recurrence_rule payload (same shape as on task definitions) for ?from=&to=&limit=."""
+    data = request.get_json() or {}
+    try:
+        rule = recurrence_from_fields(parse_recurrence_fields(data.get('recurrence_rule') or {}, default_start=start_of_today()))
+        start, end, limit = occurrence_window()
+    except RecurrenceError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to format.'}), 400
+    return jsonify({'occurrences': [day.isoformat() for day in expand(rule, start, end, limit)]})
+
+OCCURRENCE_ACTIONS = {'complete', 'skip'}
+
+@app.route('/api/task_definitions/<int:id>/occurrences/<string:day>', methods=['POST'])
+def materialize_task_occurrence(id, day):
+    """
+    Materializes the definition's occurrence on day (YYYY-MM-DD), typically a virtual calendar
+    entry the user is acting on, and returns its instance: 201 if it was created, 200 if it
+    already existed. An optional body {"action": "complete" | "skip"} applies that in the same
+    transaction; anything else (reschedule, delete) goes through the instance endpoints.
+    """
+    task_def = db.session.get(TaskDefinition, id)
+    if task_def is None:
+        return jsonify({'error': 'Task definition not found'}), 404
+    if not task_def.recurrence_rule:
+        return jsonify({'error': 'Task definition is not recurring.'}), 400
+    try:
+        occurrence_day = date.fromisoformat(day)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format; expected YYYY-MM-DD.'}), 400
+    if not expand(Recurrence.from_rule(task_def.recurrence_rule), occurrence_day, occurrence_day):
+        return jsonify({'error': f'The task does not occur on {day}.'}), 400
+    action = (request.get_json(silent=True) or {}).get('action')
+    if action is not None and action not in OCCURRENCE_ACTIONS:
+        return jsonify({'error': f'action must be one of {sorted(OCCURRENCE_ACTIONS)}.'}), 400
+
+    instance, created = materialize_occurrence(task_def, occurrence_day)
+    stats_change = CompletionStatsChange(instance_ids=[instance.id]) # Holds the write lock from here on
+    db.session.refresh(instance) # A concurrent request may have changed it since it was read
+    if action == 'complete' and instance.status != 'Completed':
+        instance.completion_date = datetime.now(timezone.utc)
+        instance.status = 'Completed'
+    elif action == 'skip' and instance.status not in ('Completed', 'Skipped'):
+        instance.status = 'Skipped'
+    else:
+        action = None # Nothing to change
+    if action:
+        stats_change.apply()
+    db.session.commit()
+
+    if created:
+        publish_event('instances_generated', task_definition_id=task_def.id, count=1)
+    if action == 'complete':
+        publish_event('instance_completed', id=instance.id, task_definition_id=task_def.id)
+    elif action == 'skip':
+        publish_event('instances_updated', completed=0, skipped=1, rescheduled=0, deleted=0)
+    return jsonify(instance.to_dict()), 201 if created else 200
+
+@app.route('/api/task_definitions/<int:id>', methods=['DELETE'])
+def delete_task_definition(id):
+    task_def = db.session.get(TaskDefinition, id)
+    if task_def is None:
+        return jsonify({'error': 'Task definition not found'}), 404
+    stats_change = CompletionStatsChange(definitions=TaskDefinition.id == id)
+    TaskInstanceHistory.query.filter_by(task_definition_id=id).delete(synchronize_session=False)
+    db.session.delete(task_def)
+    stats_change.apply()
+    db.session.commit()
+    publish_event('definition_deleted', id=id)
+    return jsonify({'message': 'Task definition deleted'}), 200
+
+# --- TaskInstance API Endpoints ---
+
+MAX_TASK_INSTANCES_PAGE_SIZE = 1000
+
+def parse_datetime_param(value):
+    # Accepts the same ISO formats as the definition endpoints; returns naive UTC to match stored values
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def encode_cursor(moment, id):
+    # Opaque keyset pagination cursor: the (datetime, id) sort key of a page's last row
+    raw = f'{moment.replace(tzinfo=None).isoformat()}|{id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    moment_str, id_str = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    return datetime.fromisoformat(moment_str), int(id_str)
+
+@app.route('/api/task_instances', methods=['GET'])
+@conditional_on(TaskInstance, TaskDefinition, Category, Asset)
+def get_task_instances():
+    """
+    Lists task instances ordered by (due_date, id).
+    Optional filters: status (comma separated), due_after (inclusive), due_before (exclusive),
+    category, asset_id, task_definition_id. Passing limit enables keyset pagination: the
+    next page is requested with the cursor returned in the X-Next-Cursor header.
+    Without limit, ?stream=1 / ?stream=ndjson stream the full result instead of buffering it.
+    """
+    query = instance_rows() # Plain column rows; see models/serializers.py
+
+    statuses = [s for s in request.args.get('status', '').split(',') if s]
+    if statuses:
+        query = query.filter(TaskInstance.status.in_(statuses))
+
+    try:
+        if request.args.get('due_after'):
+            query = query.filter(TaskInstance.due_date >= parse_datetime_param(request.args['due_after']))
+        if request.args.get('due_before'):
+            query = query.filter(TaskInstance.due_date < parse_datetime_param(request.args['due_before']))
+    except ValueError:
+        return jsonify({'error': 'Invalid due_after/due_before format.'}), 400
+
+    task_definition_id = request.args.get('task_definition_id', type=int)
+    if task_definition_id is not None:
+        query = query.filter(TaskInstance.task_definition_id == task_definition_id)
+
+    # Category/asset live on the definition; filter through an id subquery so the
+    # (task_definition_id, due_date) index stays usable
+    definition_filters = []
+    if request.args.get('category'):
+        definition_filters.append(TaskDefinition.category_short_name == request.args['category'])
+    asset_id = request.args.get('asset_id', type=int)
+    if asset_id is not None:
+        definition_filters.append(TaskDefinition.asset_id == asset_id)
+    if definition_filters:
+        query = query.filter(TaskInstance.task_definition_id.in_(select(TaskDefinition.id).where(*definition_filters)))
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_due_date, cursor_id = decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({'error': 'Invalid cursor.'}), 400
+        query = query.filter(tuple_(TaskInstance.due_date, TaskInstance.id) > tuple_(cursor_due_date, cursor_id))
+
+    query = query.order_by(TaskInstance.due_date, TaskInstance.id)
+
+    limit = request.args.get('limit', type=int)
+    if limit is None and wants_stream():
+        return stream_json(lambda: yield_rows(query), instance_row_to_dict)
+    if limit is None:
+        return jsonify([instance_row_to_dict(row) for row in query])
+
+    limit = max(1, min(limit, MAX_TASK_INSTANCES_PAGE_SIZE))
+    instances = query.limit(limit + 1).all() # Fetch one extra row to know whether another page exists
+    response = jsonify([instance_row_to_dict(row) for row in instances[:limit]])
+    if len(instances) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(instances[limit - 1].due_date, instances[limit - 1].id)
+    return response
+
+@app.route('/api/task_instances/<int:id>', methods=['GET'])
+def get_task_instance(id):
+    instance = db.session.get(TaskInstance, id)
+    if instance is None:
+        return jsonify({'error': 'Task instance not found'}), 404
+    return jsonify(instance.to_dict())
+
+@app.route('/api/task_instances/<int:id>/complete', methods=['PUT'])
+def complete_task_instance(id):
+    instance = db.session.get(TaskInstance, id)
+    if instance is None:
+        return jsonify({'error': 'Task instance not found'}), 404
+    
+    # Idempotency: if already completed, do nothing or return current state with 200 OK
+    if instance.status == 'Completed':
+        return jsonify(instance.to_dict()), 200 
+
+    stats_change = CompletionStatsChange(instance_ids=[instance.id]) # Holds the write lock from here on
+    db.session.refresh(instance)
+    if instance.status == 'Completed': # Completed by a concurrent request in the meantime
+        db.session.rollback()
+        return jsonify(instance.to_dict()), 200
+    instance.completion_date = datetime.now(timezone.utc) # Use timezone-aware datetime
+    instance.status = 'Completed'
+    stats_change.apply() # Incremental rollup update for /api/statistics/completions
+    db.session.commit()
+    publish_event('instance_completed', id=instance.id, task_definition_id=instance.task_definition_id)
+    return jsonify(instance.to_dict())
+
+# --- Calendar Endpoint ---
+MAX_CALENDAR_DAYS = 731
+
+def virtual_instance_dict(task_def, day):
+    # Same shape as TaskInstance.to_dict() for an occurrence that has no row yet
+    return {
+        'id': None,
+        'task_definition_id': task_def.id,
+        **definition_details(task_def),
+        'due_date': datetime(day.year, day.month, day.day).isoformat(),
+        'completion_date': None,
+        'status': 'Pending',
+        'virtual': True
+    }
+
+@app.route('/api/calendar', methods=['GET'])
+@conditional_on(TaskInstance, TaskDefinition, RecurrenceRule, Category, Asset, extra=lambda: date.today().isoformat())
+def get_calendar():
+    """
+    Everything due between from and to (ISO dates, inclusive, at most MAX_CALENDAR_DAYS apart),
+    ordered by due date: the materialized task instances plus, from today on, the occurrences of
+    recurring definitions that have no instance yet, computed from their rules. Those virtual
+    entries have "virtual": true and no id; acting on one goes through
+    POST /api/task_definitions/<id>/occurrences/<date>. Optional filters: category, asset_id.
+    """
+    try:
+        start = parse_datetime_param(request.args['from']).date()
+        end = parse_datetime_param(request.args['to']).date()
+    except (KeyError, ValueError):
+        return jsonify({'error': 'from and to are required ISO dates.'}), 400
+    if end < start or (end - start).days > MAX_CALENDAR_DAYS:
+        return jsonify({'error': f'to must be on or after from and at most {MAX_CALENDAR_DAYS} days later.'}), 400
+
+    definition_filters = []
+    if request.args.get('category'):
+        definition_filters.append(TaskDefinition.category_short_name == request.args['category'])
+    asset_id = request.args.get('asset_id', type=int)
+    if asset_id is not None:
+        definition_filters.append(TaskDefinition.asset_id == asset_id)
+
+    instances = instance_rows().filter(
+        TaskInstance.due_date >= datetime(start.year, start.month, start.day),
+        TaskInstance.due_date < datetime(end.year, end.month, end.day) + timedelta(days=1)
+    )
+    if definition_filters:
+        instances = instances.filter(TaskInstance.task_definition_id.in_(select(TaskDefinition.id).where(*definition_filters)))
+    entries = [instance_row_to_dict(row) for row in instances]
+
+    recurring = TaskDefinition.query_with_details().filter(TaskDefinition.recurrence_rule.has(), *definition_filters).all()
+    for task_def, day in unmaterialized_occurrences(recurring, max(start, date.today()), end):
+        entries.append(virtual_instance_dict(task_def, day))
+    entries.sort(key=lambda entry: (entry['due_date'], entry['task_definition_id'], entry['id'] or 0))
+    return jsonify(entries)
+
+MAX_BATCH_OPERATIONS = 1000
+BATCH_OPERATIONS = {'complete', 'skip', 'reschedule', 'delete'}
+
+@app.route('/api/task_instances/batch', methods=['POST'])
+def batch_update_task_instances():
+    """
+    Applies many instance operations in one transaction:
+    {"operations": [{"id": 1, "op": "complete"}, {"id": 2, "op": "skip"},
+                    {"id": 3, "op": "reschedule", "due_date": "..."}, {"id": 4, "op": "delete"}]}
+    Operations are grouped and applied with one set-based UPDATE/DELETE per group. Returns a
+    result per item: 'ok', 'unchanged' (e.g. completing an already completed instance, same as
+    the single complete endpoint), 'not_found' or 'error' with a message. Invalid items don't
+    stop the valid ones from being applied.
+    """
+    data = request.get_json() or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list.'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch.'}), 400
+
+    results = []
+    valid = [] # (result, id, op, parsed due_date)
+    seen_ids = set()
+    for item in operations:
+        item = item if isinstance(item, dict) else {}
+        result = {'id': item.get('id'), 'op': item.get('op')}
+        results.append(result)
+        # bool is an int subclass; True/False must not pass for ids 1/0
+        if not isinstance(result['id'], int) or isinstance(result['id'], bool) or result['op'] not in BATCH_OPERATIONS:
+            result.update(result='error', error=f'Each operation needs an integer id and an op in {sorted(BATCH_OPERATIONS)}.')
+            continue
+        if result['id'] in seen_ids:
+            result.update(result='error', error='Only one operation per instance is allowed in a batch.')
+            continue
+        seen_ids.add(result['id'])
+        due_date_obj = None
+        if result['op'] == 'reschedule':
+            try:
+                if not isinstance(item.get('due_date'), str):
+                    raise ValueError('due_date must be a string')
+                due_date_obj = parse_datetime_param(item['due_date'])
+            except ValueError:
+                result.update(result='error', error='reschedule needs a valid due_date.')
+                continue
+        valid.append((result, result['id'], result['op'], due_date_obj))
+
+    instances = {row.id: row for row in db.session.execute(
+        select(TaskInstance.id, TaskInstance.status, TaskInstance.task_definition_id, TaskInstance.due_date)
+        .where(TaskInstance.id.in_([v[1] for v in valid]))
+    )} if valid else {}
+
+    complete_ids, skip_ids, delete_ids = [], [], []
+    reschedule_candidates = [] # (result, id, (task_definition_id, new due_date))
+    for result, instance_id, op, due_date_obj in valid:
+        instance = instances.get(instance_id)
+        status = instance.status if instance else None
+        if status is None:
+            result['result'] = 'not_found'
+        elif op == 'complete':
+            if status == 'Completed':
+                result['result'] = 'unchanged' # Idempotent, like PUT /api/task_instances/<id>/complete
+            else:
+                complete_ids.append(instance_id)
+                result['result'] = 'ok'
+        elif op == 'skip':
+            if status in ('Completed', 'Skipped'):
+                result['result'] = 'unchanged'
+            else:
+                skip_ids.append(instance_id)
+                result['result'] = 'ok'
+        elif op == 'reschedule':
+            if status == 'Completed':
+                result.update(result='error', error='Completed instances cannot be rescheduled.')
+            else:
+                reschedule_candidates.append((result, instance_id, (instance.task_definition_id, due_date_obj)))
+        else: # delete
+            delete_ids.append(instance_id)
+            result['result'] = 'ok'
+
+    # A task has at most one instance per due date: a reschedule onto a date its task already
+    # uses (by an instance this batch doesn't delete, or by an earlier reschedule in the batch)
+    # fails on its own instead of failing the whole batch on the unique index
+    occupied = {}
+    if reschedule_candidates:
+        targets = list({target for _, _, target in reschedule_candidates})
+        deleted = set(delete_ids)
+        occupied = {(row.task_definition_id, row.due_date): row.id for row in db.session.execute(
+            select(TaskInstance.id, TaskInstance.task_definition_id, TaskInstance.due_date)
+            .where(tuple_(TaskInstance.task_definition_id, TaskInstance.due_date).in_(targets))
+        ) if row.id not in deleted}
+    reschedules = {} # due_date -> [ids]
+    for result, instance_id, target in reschedule_candidates:
+        if occupied.get(target, instance_id) != instance_id:
+            result.update(result='error', error='The task already has an instance due on that date.')
+            continue
+        occupied[target] = instance_id
+        reschedules.setdefault(target[1], []).append(instance_id)
+        result['result'] = 'ok'
+
+    applied = len(complete_ids) + len(skip_ids) + len(delete_ids) + sum(len(ids) for ids in reschedules.values())
+    if applied:
+        changed_ids = complete_ids + skip_ids + delete_ids + [i for ids in reschedules.values() for i in ids]
+        stats_change = CompletionStatsChange(instance_ids=changed_ids) # e.g. rescheduling a skipped instance un-skips it
+        try:
+            if complete_ids:
+                TaskInstance.query.filter(TaskInstance.id.in_(complete_ids)).update(
+                    {TaskInstance.status: 'Completed', TaskInstance.completion_date: datetime.now(timezone.utc)}, synchronize_session=False)
+            if skip_ids:
+                TaskInstance.query.filter(TaskInstance.id.in_(skip_ids)).update(
+                    {TaskInstance.status: 'Skipped'}, synchronize_session=False)
+            if delete_ids: # Before the reschedules, which may move instances onto the dates freed here
+                TaskInstance.query.filter(TaskInstance.id.in_(delete_ids)).delete(synchronize_session=False)
+            for due_date_obj, ids in reschedules.items():
+                TaskInstance.query.filter(TaskInstance.id.in_(ids)).update({
+                    TaskInstance.due_date: due_date_obj,
+                    TaskInstance.status: status_for_due_date(due_date_obj)
+                }, synchronize_session=False)
+            stats_change.apply()
+            db.session.commit()
+        except IntegrityError: # Only when a concurrent write took one of the dates after the check above
+            db.session.rollback()
+            return jsonify({'error': 'Rescheduling would give a task two instances on the same due date; nothing was applied.'}), 409
+        publish_event('instances_updated', completed=len(complete_ids), skipped=len(skip_ids),
+                      rescheduled=applied - len(complete_ids) - len(skip_ids) - len(delete_ids), deleted=len(delete_ids))
+    return jsonify({'applied': applied, 'results': results})
+
+# --- Search Endpoint ---
+@app.route('/api/search', methods=['GET'])
+@conditional_on(TaskDefinition, Asset)
+def search_all():
+    """
+    Full-text search over task definitions (title, description, notes) and assets (name,
+    description), best matches first. Every word of q must match, as a prefix. Optional:
+    type (comma separated: task_definition, asset) and limit (default 20, at most
+    MAX_SEARCH_RESULTS). title_html/snippet_html are escaped HTML with the hits in <mark>.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'q is required.'}), 400
+    types = [t for t in request.args.get('type', '').split(',') if t] or list(SEARCH_TYPES)
+    unknown = [t for t in types if t not in SEARCH_TYPES]
+    if unknown:
+        return jsonify({'error': f"Unknown type '{unknown[0]}'; expected one of {', '.join(SEARCH_TYPES)}."}), 400
+    limit = request.args.get('limit', 20, type=int)
+    if limit < 1 or limit > MAX_SEARCH_RESULTS:
+        return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_RESULTS}.'}), 400
+    return jsonify(search(q, types=types, limit=limit))
+
+# --- Statistics Endpoint ---
+MAX_STATISTICS_DAYS = 731 # For period=day
+
+@app.route('/api/statistics/completions', methods=['GET'])
+@conditional_on(CompletionStat)
+def get_completion_statistics():
+    """
+    Completion rate, on-time rate and average lateness per period (day or month, by due date),
+    answered from the completion_stat rollups, so the cost doesn't grow with instance history.
+    Optional: period (default month), from/to (ISO dates; default the last 12 months, or
+    30 days for period=day) and group_by (comma separated: category, asset).
+    See completion_stats.completion_statistics() for the response.
+    """
+    period = request.args.get('period', 'month')
+    if period not in PERIODS:
+        return jsonify({'error': f"period must be one of {', '.join(PERIODS)}."}), 400
+    group_by = [field for field in request.args.get('group_by', '').split(',') if field]
+    unknown = [field for field in group_by if field not in GROUP_BY_FIELDS]
+    if unknown or len(set(group_by)) != len(group_by):
+        return jsonify({'error': f"group_by must list distinct fields out of {', '.join(GROUP_BY_FIELDS)}."}), 400
+    try:
+        end = parse_datetime_param(request.args['to']).date() if request.args.get('to') else date.today()
+        if request.args.get('from'):
+            start = parse_datetime_param(request.args['from']).date()
+        else:
+            start = end - timedelta(days=29) if period == 'day' else add_months(end, -11)
+    except ValueError:
+        return jsonify({'error': 'Invalid from/to format.'}), 400
+    if end < start:
+        return jsonify({'error': 'to must be on or after from.'}), 400
+    if period == 'day' and (end - start).days > MAX_STATISTICS_DAYS:
+        return jsonify({'error': f'period=day covers at most {MAX_STATISTICS_DAYS} days.'}), 400
+    return jsonify(completion_statistics(period, start, end, group_by))
+
+# --- Dashboard Bootstrap Endpoint ---
+@app.route('/api/bootstrap', methods=['GET'])
+@conditional_on(Category, Asset, TaskDefinition, RecurrenceRule, TaskInstance, Setting)
+def get_bootstrap():
+    """
+    Everything the dashboard needs for first paint in one normalized document.
+    Categories and assets appear once, keyed by id; definitions and instances refer to them
+    (and instances to their definition) by id instead of embedding copies.
+    """
+    version = get_current_version() # Read first: rows may be newer than this, never older
+    categories = Category.query.order_by(Category.short_name).all()
+    assets = Asset.query.order_by(Asset.name).all()
+    task_defs = TaskDefinition.query.options(joinedload(TaskDefinition.recurrence_rule)).order_by(TaskDefinition.id).all()
+    instances = TaskInstance.query.order_by(TaskInstance.due_date, TaskInstance.id).all()
+    return jsonify({
+        'version': version, # Pass to /api/changes?since= to fetch only what changed afterwards
+        'categories': {cat.short_name: cat.to_dict() for cat in categories},
+        'assets': {asset.id: asset.to_dict(include_task_definitions=False) for asset in assets},
+        'task_definitions': [td.to_dict(include_asset=False, include_category=False) for td in task_defs],
+        'task_instances': [instance.to_dict(include_definition=False) for instance in instances],
+        'settings': settings_with_defaults()
+    })
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+    Rows changed after change version `since`, in the same normalized shape as /api/bootstrap,
+    plus the keys of rows deleted since then. Clients should apply the deletions before merging
+    the changed rows (SQLite can reuse a deleted row's id). Every lookup is on an indexed
+    change_version column, so the cost follows the amount of change rather than the size of the tables.
+    """
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'error': 'since must be a non-negative integer change version.'}), 400
+
+    version = get_current_version()
+    changed = lambda model: model.query.filter(model.change_version > since)
+    tombstones = ChangeTombstone.query.filter(ChangeTombstone.change_version > since).order_by(ChangeTombstone.change_version)
+    deleted = {}
+    for tombstone in tombstones:
+        deleted.setdefault(tombstone.table_name, []).append(tombstone.row_key)
+
+    return jsonify({
+        'since': since,
+        'version': version,
+        'categories': {cat.short_name: cat.to_dict() for cat in changed(Category)},
+        'assets': {asset.id: asset.to_dict(include_task_definitions=False) for asset in changed(Asset)},
+        'task_definitions': [td.to_dict(include_asset=False, include_category=False)
+                             for td in changed(TaskDefinition).options(joinedload(TaskDefinition.recurrence_rule))],
+        'task_instances': [instance.to_dict(include_definition=False)
+                           for instance in changed(TaskInstance).order_by(TaskInstance.due_date, TaskInstance.id)],
+        'settings': {setting.key: setting.value for setting in changed(Setting)},
+        'deleted': deleted # {table_name: [primary keys as strings]}
+    })
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of compact change notifications (instance_completed,
+    instances_generated, instances_updated, definition_created/updated/deleted). Each event's id is the change
+    version, so clients can follow up with /api/changes?since=. When idle, the stream sends a
+    keepalive and checks the DB change version; a 'changed' event then covers writes made by
+    other worker processes, which the in-process broadcaster never sees.
+    Each open stream (one per browser tab) occupies a worker thread for as long as it is open, so
+    the server must run threaded (the Flask dev server, gunicorn --threads / gthread, or gevent);
+    with sync workers a few open tabs take every worker.
+    """
+    broadcaster = get_broadcaster()
+    poll_seconds = app.config['SSE_POLL_SECONDS']
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+    def generate():
+        subscriber = broadcaster.subscribe()
+        try:
+            last_version = get_current_version()
+            db.session.close() # Don't hold a read transaction open while idle
+            if last_event_id is not None and last_event_id < last_version: # Reconnected after missing events
+                yield format_sse('changed', {'version': last_version}, last_version)
+            else:
+                yield ': connected\n\n'
+            while True:
+                try:
+                    event_type, data = subscriber.get(timeout=poll_seconds)
+                except queue.Empty:
+                    version = get_current_version()
+                    db.session.close()
+                    if version > last_version:
+                        last_version = version
+                        yield format_sse('changed', {'version': version}, version)
+                    else:
+                        yield ': keepalive\n\n'
+                    continue
+                last_version = max(last_version, data.get('version') or 0)
+                yield format_sse(event_type, data, data.get('version'))
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Settings API Endpoints ---
+@app.route('/api/settings', methods=['GET'])
+@conditional_on(Setting)
+def get_settings():
+    return jsonify(settings_with_defaults())
+
+def settings_with_defaults():
+    settings_map = dict(get_settings_cache().all())
+    # Ensure defaults are present if not in DB for the frontend
+    if 'MAX_INSTANCES_TO_GENERATE' not in settings_map:
+        settings_map['MAX_INSTANCES_TO_GENERATE'] = str(DEFAULT_MAX_INSTANCES_TO_GENERATE)
+    if 'MAX_ADVANCE_GENERATION_MONTHS' not in settings_map:
+        settings_map['MAX_ADVANCE_GENERATION_MONTHS'] = str(DEFAULT_MAX_ADVANCE_GENERATION_MONTHS)
+    return settings_map
+
+@app.route('/api/settings', methods=['POST'])
+def update_settings():
+    data = request.get_json() or {}
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+
+    allowed_keys = {'MAX_INSTANCES_TO_GENERATE', 'MAX_ADVANCE_GENERATION_MONTHS'} # Use a set for efficient lookup
+    updated_settings = []
+    errors = [] 
+
+    for key, value in data.items():
+        if key in allowed_keys:
+            try:
+                val_int = int(value)
+                if val_int < 0:
+                    errors.append(f'Invalid value for {key}: must be a non-negative integer.')
+                    continue 
+                value_str = str(val_int) # Store as string, but validated as int
+            except ValueError:
+                errors.append(f'Invalid value for {key}: must be an integer.')
+                continue
+            
+            setting = db.session.get(Setting, key)
+            if setting:
+                setting.value = value_str
+            else:
+                setting = Setting(key=key, value=value_str)
+                db.session.add(setting)
+            updated_settings.append(key) # Keep track of what was processed
+        else:
+            # It might be better to collect all unknown keys and report once
+            errors.append(f'Unknown or not-allowed setting key: {key}')
+    
+    if errors:
+        return jsonify({'error': 'Failed to update settings.', 'details': errors}), 400
+
+    if updated_settings:
+        # Generation limits changed: let the nightly job re-evaluate every recurring definition's horizon
+        RecurrenceRule.query.update({RecurrenceRule.generated_through: None}, synchronize_session=False)
+        db.session.commit()
+        get_settings_cache().invalidate()
+        return jsonify({'message': f'{len(updated_settings)} setting(s) updated successfully: {", ".join(updated_settings)}'}), 200
+    else:
+        return jsonify({'message': 'No valid settings were provided for update.'}), 200 # Or 400 if no valid keys were sent
+
+# Function to bootstrap settings
+def bootstrap_settings():
+    defaults = {
+        'MAX_INSTANCES_TO_GENERATE': str(DEFAULT_MAX_INSTANCES_TO_GENERATE),
+        'MAX_ADVANCE_GENERATION_MONTHS': str(DEFAULT_MAX_ADVANCE_GENERATION_MONTHS)
+    }
+    for key, value_str in defaults.items():
+        setting = db.session.get(Setting, key)
+        if not setting:
+            new_setting = Setting(key=key, value=value_str)
+            db.session.add(new_setting)
+    
+    # Bootstrap Default Category
+    if not db.session.get(Category, 'Default'):
+        db.session.add(Category(short_name='Default', icon='📑'))
+    # Bootstrap Maintenance Category
+    if not db.session.get(Category, 'Maintenance'):
+        db.session.add(Category(short_name='Maintenance', icon='🔧')) # Wrench icon
+
+    db.session.commit()
+    get_settings_cache().invalidate()
+
+# Static files (the Preact frontend build) are served by static_files.py
+
+if __name__ == '__main__':
+    with app.app_context(): # Ensure db operations have app context
+        db.create_all() # Creates the database table if it doesn't exist
+        bootstrap_settings() # Call bootstrap function
     app.run(debug=True) 
\ No newline at end of file
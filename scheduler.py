@@ -0,0 +1,119 @@
+from apscheduler.schedulers.background import BackgroundScheduler
+from datetime import date
+import os
+import time
+import click
+from app_init import db
+
+try:
+    import fcntl
+except ImportError: # Not on Windows; there every serving process runs the jobs
+    fcntl = None
+
+# A single background scheduler per process; jobs get the app passed in so they can push an app context
+scheduler = BackgroundScheduler(daemon=True)
+LOCK_RETRY_SECONDS = 60 # How often a serving process checks whether the scheduler's owner went away
+
+def extend_horizons_job(app):
+    from services import extend_generation_horizons # Imported lazily: services imports the models
+    with app.app_context():
+        try:
+            processed, created = extend_generation_horizons()
+            app.logger.info(f"Horizon extension: {processed} definition(s) checked, {created} instance(s) created")
+        except Exception:
+            app.logger.exception("Horizon extension job failed")
+            raise
+
+def mark_overdue_job(app):
+    from services import mark_overdue_instances
+    with app.app_context():
+        try:
+            marked = mark_overdue_instances()
+            db.session.commit()
+            app.extensions['overdue_marked_on'] = date.today()
+            app.logger.info(f"Overdue pass: {marked} instance(s) marked overdue")
+        except Exception:
+            app.logger.exception("Overdue pass failed")
+            raise
+
+def archive_completed_job(app):
+    from services import archive_completed_instances
+    with app.app_context():
+        try:
+            archived = archive_completed_instances()
+            app.logger.info(f"Archival: {archived} completed instance(s) moved to history")
+        except Exception:
+            app.logger.exception("Archival job failed")
+            raise
+
+def init_scheduler(app):
+    @app.cli.command('extend-horizons')
+    def extend_horizons_command():
+        """Top up recurring task instances now (same work as the nightly job)."""
+        from services import extend_generation_horizons
+        processed, created = extend_generation_horizons()
+        click.echo(f"{processed} definition(s) checked, {created} instance(s) created")
+
+    @app.cli.command('archive-completed')
+    @click.option('--older-than-days', type=int, default=None, help='Defaults to ARCHIVE_COMPLETED_AFTER_DAYS.')
+    def archive_completed_command(older_than_days):
+        """Move old completed task instances into the history table now."""
+        from services import archive_completed_instances
+        archived = archive_completed_instances(older_than_days)
+        click.echo(f"{archived} completed instance(s) archived")
+
+    if not app.config.get('SCHEDULER_ENABLED'):
+        return
+
+    # Started on the first request rather than here: create_app also runs in `flask` CLI commands
+    # (flask db upgrade...) and in the reloader's watcher process, which never serve requests.
+    # Of the processes that do (e.g. several gunicorn workers) only the one holding the lock file
+    # runs the jobs; the others retry now and then in case it exits.
+    next_attempt = 0
+
+    @app.before_request
+    def start_scheduler_once():
+        nonlocal next_attempt
+        if scheduler.running or time.monotonic() < next_attempt:
+            return
+        next_attempt = time.monotonic() + LOCK_RETRY_SECONDS
+        lock_file = acquire_scheduler_lock(app.config['SCHEDULER_LOCK_FILE'] or os.path.join(app.instance_path, 'scheduler.lock'))
+        if lock_file is None:
+            return
+        app.extensions['scheduler_lock'] = lock_file # Held, and the lock with it, for the life of the process
+        start_scheduler(app)
+
+def acquire_scheduler_lock(path):
+    """
+    Takes a non-blocking exclusive lock on path and returns the open file, or None if another
+    process holds it. The OS releases the lock when the process exits, however it exits.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, 'a')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def start_scheduler(app):
+    scheduler.add_job(
+        extend_horizons_job, 'cron', args=[app],
+        id='extend_horizons', hour=app.config['HORIZON_JOB_HOUR'], minute=0,
+        replace_existing=True, coalesce=True, max_instances=1
+    )
+    scheduler.add_job(
+        mark_overdue_job, 'cron', args=[app],
+        id='mark_overdue', hour=0, minute=1,
+        replace_existing=True, coalesce=True, max_instances=1
+    )
+    scheduler.add_job(
+        archive_completed_job, 'cron', args=[app],
+        id='archive_completed', hour=app.config['HORIZON_JOB_HOUR'], minute=30,
+        replace_existing=True, coalesce=True, max_instances=1
+    )
+    if not scheduler.running:
+        scheduler.start()
@@ -0,0 +1,154 @@
+import html
+import click
+from flask import current_app
+from sqlalchemy import event, or_, text
+from app_init import db
+
+# One external-content FTS5 table per searchable table: the index holds only the tokens and reads
+# the text (for snippets) from the source rows by rowid, so nothing is stored twice. Triggers on
+# the source tables keep it in sync with every write, ORM or not.
+SEARCH_SOURCES = {
+    'task_definition': ('task_definition_search', ('title', 'description', 'notes')),
+    'asset': ('asset_search', ('name', 'description'))
+}
+# bm25 column weights: a hit in the title counts most, one in long-form notes least
+SEARCH_WEIGHTS = {'title': 10.0, 'name': 10.0, 'description': 4.0, 'notes': 1.0}
+SEARCH_TYPES = tuple(SEARCH_SOURCES)
+MAX_SEARCH_RESULTS = 100
+
+# Highlight markers used inside SQL; swapped for <mark> tags once the text has been HTML-escaped
+_OPEN, _CLOSE = '\ue000', '\ue001'
+
+def is_search_table(name):
+    """True for the FTS tables (and the shadow tables SQLite keeps for them)."""
+    return any(name == fts or name.startswith(fts + '_') for fts, _ in SEARCH_SOURCES.values())
+
+def search_index_ddl(table, fts, columns):
+    """CREATE statements for table's FTS index and the triggers that keep it in sync."""
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f'INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values});'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END',
+        # Only text edits touch the index; change_version stamps and the like don't
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} '
+        f'BEGIN {delete_old} {insert_new} END'
+    ]
+
+def search_supported(connection):
+    return connection.dialect.name == 'sqlite'
+
+def create_search_index(connection, rebuild=False):
+    """
+    Creates any missing FTS tables and triggers. Newly created indexes (and all of them when
+    rebuild is True) are filled from the existing rows.
+    """
+    if not search_supported(connection):
+        return
+    existing = set(connection.scalars(text("SELECT name FROM sqlite_master WHERE type = 'table'")))
+    for table, (fts, columns) in SEARCH_SOURCES.items():
+        created = fts not in existing
+        for statement in search_index_ddl(table, fts, columns):
+            connection.execute(text(statement))
+        if created or rebuild:
+            connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def _after_create(metadata, connection, **kw):
+    # db.create_all() builds the ORM tables; the FTS tables and triggers aren't in the metadata
+    create_search_index(connection)
+
+def parse_search_query(q):
+    """
+    FTS5 query for free text typed by a user: every word must match, each as a prefix (so
+    results show up while typing). Words are quoted, so FTS operators and punctuation in the
+    input are taken literally. Returns None if nothing searchable is left.
+    """
+    terms = ['"' + word.replace('"', '""') + '"*' for word in q.split() if any(ch.isalnum() for ch in word)]
+    if not terms:
+        return None
+    return ' '.join(terms)
+
+def _marked_html(value):
+    if value is None:
+        return None
+    return html.escape(value).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+def _fts_select(table, snippet_tokens):
+    fts, columns = SEARCH_SOURCES[table]
+    weights = ', '.join(str(SEARCH_WEIGHTS[column]) for column in columns)
+    # bm25 is computed for every row that matches, so very common words would make a query as
+    # slow as the table is big; past max_candidates matches only the newest ones are ranked.
+    # Finding the cut-off rowid walks the match list without scoring it, which is cheap.
+    return (
+        f"SELECT '{table}' AS type, rowid AS id, {columns[0]} AS title, "
+        f"highlight({fts}, 0, :open, :close) AS title_html, "
+        f"snippet({fts}, -1, :open, :close, '…', {snippet_tokens}) AS snippet_html, "
+        f'bm25({fts}, {weights}) AS score '
+        f'FROM {fts} WHERE {fts} MATCH :query AND rowid >= coalesce('
+        f'(SELECT rowid FROM {fts} WHERE {fts} MATCH :query ORDER BY rowid DESC LIMIT 1 OFFSET :max_candidates), 0)'
+    )
+
+def search(q, types=SEARCH_TYPES, limit=20, snippet_tokens=12):
+    """
+    Ranked search over task definitions (title, description, notes) and assets (name,
+    description). Returns dicts with type, id, title and HTML-escaped title_html/snippet_html
+    where the matched words are wrapped in <mark>; lower scores rank better.
+    Only the FTS indexes (and the source rows of the results, for snippets) are read, and at
+    most SEARCH_MAX_CANDIDATES matches per type are ranked, so lookups stay fast however
+    large the tables get.
+    """
+    query = parse_search_query(q)
+    if query is None or not types:
+        return []
+    if not search_supported(db.session.connection()):
+        return _search_like(q, types, limit)
+    statement = ' UNION ALL '.join(_fts_select(table, snippet_tokens) for table in types)
+    rows = db.session.execute(
+        text(f'{statement} ORDER BY score LIMIT :limit'),
+        {'query': query, 'open': _OPEN, 'close': _CLOSE, 'limit': limit,
+         'max_candidates': current_app.config['SEARCH_MAX_CANDIDATES']}
+    )
+    return [{
+        'type': row.type,
+        'id': row.id,
+        'title': row.title,
+        'title_html': _marked_html(row.title_html),
+        'snippet_html': _marked_html(row.snippet_html),
+        'score': row.score
+    } for row in rows]
+
+def _search_like(q, types, limit):
+    # Databases without FTS5: unranked substring matches, every word in one of the columns
+    from models.models import Asset, TaskDefinition
+    models = {'task_definition': TaskDefinition, 'asset': Asset}
+    results = []
+    for table in types:
+        model = models[table]
+        _, columns = SEARCH_SOURCES[table]
+        conditions = [or_(*(getattr(model, column).ilike(f'%{word}%') for column in columns)) for word in q.split()]
+        remaining = limit - len(results)
+        if remaining <= 0:
+            break
+        for item in model.query.filter(*conditions).order_by(getattr(model, columns[0])).limit(remaining):
+            value = getattr(item, columns[0])
+            results.append({'type': table, 'id': item.id, 'title': value, 'title_html': html.escape(value),
+                            'snippet_html': html.escape(getattr(item, columns[1]) or ''), 'score': None})
+    return results
+
+def init_search(app):
+    event.listen(db.metadata, 'after_create', _after_create)
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Recreates the full-text search index from the task definitions and assets."""
+        with db.engine.begin() as connection:
+            if not search_supported(connection):
+                click.echo('Full-text search needs SQLite; nothing to rebuild.')
+                return
+            create_search_index(connection, rebuild=True)
+        click.echo('Search index rebuilt.')
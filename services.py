@@ -1,133 +1,349 @@
-from datetime import datetime, timedelta, date
-from models.models import TaskInstance, RecurrenceRule, Setting # Import Setting
-from app_init import db # Assuming db is initialized in app_init.py
-
-# Default values, to be overridden by DB settings if they exist
-DEFAULT_MAX_INSTANCES_TO_GENERATE = 4
-DEFAULT_MAX_ADVANCE_GENERATION_MONTHS = 13
-
-def get_setting_value(key, default_value):
-    setting = db.session.get(Setting, key)
-    if setting:
-        try:
-            return int(setting.value) # Assuming numeric settings for now
-        except ValueError:
-            return default_value # Fallback if value is not an int
-    return default_value
-
-def generate_task_instances(task_def, is_new_definition=True):
-    """
-    Generates future TaskInstances for a given TaskDefinition based on its RecurrenceRule.
-    If is_new_definition is True, it generates all initial instances.
-    If False (e.g., for a nightly job), it might only generate upcoming ones or fill gaps.
-    """
-    max_instances = get_setting_value('MAX_INSTANCES_TO_GENERATE', DEFAULT_MAX_INSTANCES_TO_GENERATE)
-    max_advance_months = get_setting_value('MAX_ADVANCE_GENERATION_MONTHS', DEFAULT_MAX_ADVANCE_GENERATION_MONTHS)
-
-    if not task_def.recurrence_rule:
-        return # Not a recurring task
-
-    # For now, let's clear existing future instances if we are re-generating for an existing definition.
-    # A more sophisticated approach would be to only add new ones or update existing ones if their definition changed.
-    # This simple clear and regenerate is easier for now, but be mindful of completed tasks.
-    # We should only delete PENDING instances.
-    if not is_new_definition:
-        TaskInstance.query.filter(
-            TaskInstance.task_definition_id == task_def.id,
-            TaskInstance.due_date > datetime.utcnow(), # Only future instances
-            TaskInstance.status == 'Pending'
-        ).delete(synchronize_session=False)
-        # db.session.commit() # Commit deletions if any
-
-    rule = task_def.recurrence_rule
-    generated_count = 0
-    today = date.today()
-    # Ensure we don't generate too far into the future, e.g., 13 months from today
-    # This is a simple way to cap generation for all rule types for now.
-    # For annual tasks specifically, we'd only generate one if it falls within this window.
-    overall_end_date_cap = today + timedelta(days=max_advance_months * 30) # Approximate
-
-    current_check_date = today
-
-    if rule.rule_type == 'weekly':
-        # weekly_recurring_day: 1 (Monday) to 7 (Sunday)
-        # Python's weekday(): Monday is 0 and Sunday is 6
-        target_weekday = rule.weekly_recurring_day - 1 
-        
-        # Start checking from today
-        # Find the first occurrence on or after today
-        days_ahead = target_weekday - current_check_date.weekday()
-        if days_ahead < 0: # Target day already passed this week
-            days_ahead += 7
-        next_due_date_dt = datetime(current_check_date.year, current_check_date.month, current_check_date.day) + timedelta(days=days_ahead)
-
-        while generated_count < max_instances and next_due_date_dt.date() <= overall_end_date_cap:
-            # Check if an instance for this due date already exists (e.g. if not is_new_definition)
-            exists = TaskInstance.query.filter_by(task_definition_id=task_def.id, due_date=next_due_date_dt).first()
-            if not exists:
-                instance = TaskInstance(
-                    task_definition_id=task_def.id,
-                    due_date=next_due_date_dt, # Store as datetime
-                    status='Pending'
-                )
-                db.session.add(instance)
-                generated_count += 1
-            next_due_date_dt += timedelta(weeks=1)
-            
-    elif rule.rule_type == 'monthly':
-        # monthly_recurring_day: 1 to 31
-        target_day_of_month = rule.monthly_recurring_day
-        
-        # Start checking from the current month
-        check_month_dt = datetime(current_check_date.year, current_check_date.month, 1)
-        
-        processed_months = 0
-        # Limit how many months we iterate to avoid infinite loops with invalid day (e.g. 31st in Feb)
-        # and to respect overall_end_date_cap
-        max_months_to_check = max_advance_months + 2 # a little buffer
-
-        while generated_count < max_instances and processed_months < max_months_to_check:
-            year, month = check_month_dt.year, check_month_dt.month
-            try:
-                # Attempt to create the date for the target day in the current check_month_dt
-                next_due_date_dt = datetime(year, month, target_day_of_month)
-            except ValueError: # Day is invalid for the month (e.g., Feb 30th)
-                # Skip this month, move to the first day of the next month
-                if month == 12:
-                    check_month_dt = datetime(year + 1, 1, 1)
-                else:
-                    check_month_dt = datetime(year, month + 1, 1)
-                processed_months += 1
-                continue
-
-            if next_due_date_dt.date() < today:
-                 # If this calculated date is in the past for the current month, try for next month's occurrence
-                if month == 12:
-                    check_month_dt = datetime(year + 1, 1, 1)
-                else:
-                    check_month_dt = datetime(year, month + 1, 1)
-                processed_months += 1
-                continue
-
-            if next_due_date_dt.date() > overall_end_date_cap:
-                break # Exceeded overall cap
-
-            exists = TaskInstance.query.filter_by(task_definition_id=task_def.id, due_date=next_due_date_dt).first()
-            if not exists:
-                instance = TaskInstance(
-                    task_definition_id=task_def.id,
-                    due_date=next_due_date_dt,
-                    status='Pending'
-                )
-                db.session.add(instance)
-                generated_count += 1
-            
-            # Move to the first day of the next month for the next iteration
-            if month == 12:
-                check_month_dt = datetime(year + 1, 1, 1)
-            else:
-                check_month_dt = datetime(year, month + 1, 1)
-            processed_months += 1
-
-    # No explicit db.session.commit() here; assume it's handled by the caller (e.g., after API endpoint finishes)
-    # However, if this service function is called from a background job, it might need to commit. 
\ No newline at end of file
+from datetime import datetime, timedelta, date
+from flask import current_app
+from sqlalchemy import case, func, insert, literal, or_, select, union_all
+from sqlalchemy.orm import contains_eager
+from models.models import TaskDefinition, TaskInstance, TaskInstanceHistory, RecurrenceRule
+from app_init import db # Assuming db is initialized in app_init.py
+from settings_cache import get_settings_cache
+from recurrence import Recurrence, add_months, due_dates, expand
+
+# Default values, to be overridden by DB settings if they exist
+DEFAULT_MAX_INSTANCES_TO_GENERATE = 4
+DEFAULT_MAX_ADVANCE_GENERATION_MONTHS = 13
+
+def get_setting_value(key, default_value):
+    # Served from the in-process settings cache; no DB round trip once loaded
+    return get_settings_cache().get_int(key, default_value)
+
+def get_generation_limits():
+    """
+    Returns (max_instances, max_advance_months).
+    Batch callers should fetch this once and pass it to generate_task_instances.
+    """
+    return (
+        get_setting_value('MAX_INSTANCES_TO_GENERATE', DEFAULT_MAX_INSTANCES_TO_GENERATE),
+        get_setting_value('MAX_ADVANCE_GENERATION_MONTHS', DEFAULT_MAX_ADVANCE_GENERATION_MONTHS)
+    )
+
+def insert_ignoring_conflicts(model):
+    """
+    INSERT statement for model that skips rows violating a unique constraint,
+    so concurrent generators can't create duplicate instances.
+    """
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(model) # No portable ON CONFLICT; the unique constraint still guards against duplicates
+    return dialect_insert(model).on_conflict_do_nothing()
+
+def generate_task_instances(task_def, is_new_definition=True, limits=None):
+    """
+    Generates future TaskInstances for a given TaskDefinition based on its RecurrenceRule.
+    If is_new_definition is True, it only adds the occurrences missing from the horizon, so it is
+    also what the nightly job uses to top definitions up.
+    If False (the rule was changed), the definition's instances are reconciled with the rule
+    first; see reconcile_task_instances().
+
+    All candidate dates are computed up front, existing ones are found with a single IN query
+    and the missing ones are written with one bulk INSERT. The rule's generated_through
+    watermark is moved to the end of the new horizon. limits is an optional
+    (max_instances, max_advance_months) tuple from get_generation_limits().
+    Returns the number of instances inserted.
+    """
+    if not is_new_definition:
+        return reconcile_task_instances(task_def, limits)['inserted']
+    return len(_fill_horizon(task_def, limits))
+
+def _fill_horizon(task_def, limits=None):
+    # Inserts the horizon occurrences that have no instance yet; returns their due dates
+    if not task_def.recurrence_rule:
+        return [] # Not a recurring task
+
+    max_instances, max_advance_months = limits or get_generation_limits()
+
+    today = date.today()
+    # Ensure we don't generate too far into the future, e.g., 13 calendar months from today.
+    # For annual tasks specifically, we'd only generate one if it falls within this window.
+    overall_end_date_cap = add_months(today, max_advance_months)
+
+    # The horizon is the next max_instances occurrences; anything already materialized in it
+    # (e.g. a completed instance) counts towards it, so repeated calls only top it up.
+    # Expansion is cached per (rule, whole-month window), so definitions sharing a rule compute it once.
+    horizon = due_dates(Recurrence.from_rule(task_def.recurrence_rule), today, overall_end_date_cap, max(max_instances, 0))
+    if len(horizon) == max_instances and horizon:
+        task_def.recurrence_rule.generated_through = horizon[-1]
+    else: # Cut short by the advance cap: every occurrence up to the cap is covered
+        task_def.recurrence_rule.generated_through = datetime(overall_end_date_cap.year, overall_end_date_cap.month, overall_end_date_cap.day)
+    if not horizon:
+        return []
+
+    # An occurrence is covered by an instance due on it or by one generated for it and rescheduled since
+    existing = set()
+    for due_date, occurrence_date in db.session.execute(
+        select(TaskInstance.due_date, TaskInstance.occurrence_date).where(
+            TaskInstance.task_definition_id == task_def.id,
+            or_(TaskInstance.due_date.in_(horizon), TaskInstance.occurrence_date.in_(horizon))
+        )
+    ):
+        existing.update((due_date, occurrence_date))
+    missing = [due_date for due_date in horizon if due_date not in existing]
+    if not missing:
+        return []
+
+    db.session.execute(
+        insert_ignoring_conflicts(TaskInstance),
+        [{'task_definition_id': task_def.id, 'due_date': due_date, 'occurrence_date': due_date, 'status': 'Pending'}
+         for due_date in missing]
+    )
+    # No explicit db.session.commit() here; assume it's handled by the caller (e.g., after API endpoint finishes)
+    # However, if this service function is called from a background job, it might need to commit.
+    return missing
+
+def reconcile_task_instances(task_def, limits=None):
+    """
+    Brings a definition's open instances in line with its current schedule after an edit,
+    touching only what changed instead of deleting and regenerating everything:
+      - recurring: future Pending instances whose occurrence the rule no longer produces are
+        deleted, missing horizon occurrences are inserted, the rest are left alone (ids,
+        reschedules and all);
+      - one-off: its open instance (even if overdue) is moved to the new due date, or created,
+        and any other future Pending ones are deleted; overdue instances left over from a
+        previous recurring schedule are kept, like today's and overdue ones of a recurring rule;
+      - neither: future Pending instances are deleted.
+    Completed and skipped instances are never touched. Runs in the caller's transaction.
+    Returns a report: counts of inserted/deleted/rescheduled/unchanged instances and the
+    affected dates.
+    """
+    now = datetime.utcnow()
+    rule = task_def.recurrence_rule
+    target = task_def.due_date.replace(tzinfo=None) if task_def.due_date and not rule else None
+
+    # Only future pending instances are candidates; today's and overdue ones stay as they are.
+    # A one-off's own open instance (it has no occurrence_date, unlike generated ones) is a
+    # candidate too, overdue or not, so editing its due date moves it instead of adding a second.
+    open_filter = (TaskInstance.status == 'Pending') & (TaskInstance.due_date > now)
+    if target:
+        open_filter = open_filter | (TaskInstance.status.in_(['Pending', 'Overdue']) & TaskInstance.occurrence_date.is_(None))
+    candidates = db.session.execute(
+        select(TaskInstance.id, TaskInstance.due_date, TaskInstance.occurrence_date).where(
+            TaskInstance.task_definition_id == task_def.id, open_filter
+        ).order_by(TaskInstance.due_date, TaskInstance.id)
+    ).all()
+
+    obsolete = []
+    rescheduled = []
+    if rule:
+        occurrence_of = {row.id: (row.occurrence_date or row.due_date).date() for row in candidates}
+        valid = set()
+        if occurrence_of:
+            valid = set(expand(Recurrence.from_rule(rule), min(occurrence_of.values()), max(occurrence_of.values())))
+        obsolete = [row for row in candidates if occurrence_of[row.id] not in valid]
+    elif target:
+        keep = next((row for row in candidates if row.due_date == target), None)
+        # A completed/skipped instance may already sit on the new date
+        target_taken = keep is not None or TaskInstance.query.filter_by(task_definition_id=task_def.id, due_date=target).count() > 0
+        if not target_taken and candidates:
+            keep = candidates[0] # Move the existing instance rather than replacing it
+            TaskInstance.query.filter(TaskInstance.id == keep.id).update(
+                {TaskInstance.due_date: target, TaskInstance.occurrence_date: None,
+                 TaskInstance.status: status_for_due_date(target)}, synchronize_session=False)
+            rescheduled.append(target)
+        obsolete = [row for row in candidates if row is not keep]
+    else:
+        obsolete = list(candidates)
+
+    if obsolete:
+        TaskInstance.query.filter(TaskInstance.id.in_([row.id for row in obsolete])).delete(synchronize_session=False)
+
+    if rule:
+        inserted = _fill_horizon(task_def, limits)
+    elif target and not target_taken and not candidates:
+        db.session.add(TaskInstance(task_definition_id=task_def.id, due_date=target, status=status_for_due_date(target)))
+        inserted = [target]
+    else:
+        inserted = []
+
+    return {
+        'inserted': len(inserted),
+        'deleted': len(obsolete),
+        'rescheduled': len(rescheduled),
+        'unchanged': len(candidates) - len(obsolete) - len(rescheduled),
+        'inserted_dates': [due_date.isoformat() for due_date in inserted],
+        'deleted_dates': [row.due_date.isoformat() for row in obsolete],
+        'rescheduled_dates': [due_date.isoformat() for due_date in rescheduled]
+    }
+
+def extend_generation_horizons(batch_size=None, lead_days=None):
+    """
+    Tops up instances for every recurring definition whose generated_through watermark falls
+    within lead_days of today (or was never set). Definitions are processed in id order, in
+    chunks of batch_size, committing after each chunk so the SQLite write lock is only held briefly.
+    Returns (definitions_processed, instances_created).
+    """
+    batch_size = batch_size or current_app.config['GENERATION_BATCH_SIZE']
+    lead_days = lead_days if lead_days is not None else current_app.config['GENERATION_HORIZON_LEAD_DAYS']
+    limits = get_generation_limits()
+    threshold = datetime.combine(date.today() + timedelta(days=lead_days), datetime.min.time())
+
+    processed = created = 0
+    last_rule_id = 0
+    while True:
+        task_defs = TaskDefinition.query.join(TaskDefinition.recurrence_rule).options(
+            contains_eager(TaskDefinition.recurrence_rule)
+        ).filter(
+            RecurrenceRule.id > last_rule_id,
+            or_(RecurrenceRule.generated_through.is_(None), RecurrenceRule.generated_through < threshold)
+        ).order_by(RecurrenceRule.id).limit(batch_size).all()
+        if not task_defs:
+            break
+        for task_def in task_defs:
+            created += generate_task_instances(task_def, limits=limits)
+        last_rule_id = task_defs[-1].recurrence_rule.id
+        processed += len(task_defs)
+        db.session.commit()
+    return processed, created
+
+def unmaterialized_occurrences(task_defs, start, end):
+    """
+    (task_def, date) pairs for the occurrences of the given recurring definitions between start
+    and end (dates, inclusive) that have no TaskInstance yet: neither one due on that date nor
+    one generated for it and rescheduled. Computed from the rules; nothing is written.
+    """
+    if not task_defs or end < start:
+        return []
+    window_start = datetime(start.year, start.month, start.day)
+    window_end = datetime(end.year, end.month, end.day) + timedelta(days=1)
+    taken = set()
+    for task_definition_id, due_date, occurrence_date in db.session.execute(
+        select(TaskInstance.task_definition_id, TaskInstance.due_date, TaskInstance.occurrence_date).where(
+            TaskInstance.task_definition_id.in_([task_def.id for task_def in task_defs]),
+            or_(
+                TaskInstance.due_date.between(window_start, window_end),
+                TaskInstance.occurrence_date.between(window_start, window_end)
+            )
+        )
+    ):
+        taken.add((task_definition_id, due_date.date()))
+        if occurrence_date:
+            taken.add((task_definition_id, occurrence_date.date()))
+
+    pairs = []
+    for task_def in task_defs:
+        for day in expand(Recurrence.from_rule(task_def.recurrence_rule), start, end):
+            if (task_def.id, day) not in taken:
+                pairs.append((task_def, day))
+    return pairs
+
+def materialize_occurrence(task_def, day):
+    """
+    Returns the TaskInstance for the definition's occurrence on day (a date), creating it if it
+    isn't materialized yet, and whether it was created. The caller commits.
+    """
+    occurrence = datetime(day.year, day.month, day.day)
+    instance = TaskInstance.query.filter(
+        TaskInstance.task_definition_id == task_def.id,
+        or_(TaskInstance.occurrence_date == occurrence, TaskInstance.due_date == occurrence)
+    ).order_by(TaskInstance.id).first()
+    if instance is not None:
+        return instance, False
+    db.session.execute(
+        insert_ignoring_conflicts(TaskInstance),
+        [{'task_definition_id': task_def.id, 'due_date': occurrence, 'occurrence_date': occurrence,
+          'status': status_for_due_date(occurrence)}]
+    )
+    instance = TaskInstance.query.filter_by(task_definition_id=task_def.id, due_date=occurrence).one()
+    return instance, True
+
+def asset_summaries(asset_ids=None):
+    """
+    {asset_id: {'last_completed', 'next_due', 'overdue_count'}} for the given assets (all when
+    None), from one grouped query over the live and archived instances of their definitions.
+    Assets without instances are absent.
+    """
+    resolved = union_all(
+        select(TaskInstance.task_definition_id, TaskInstance.status, TaskInstance.due_date, TaskInstance.completion_date),
+        select(TaskInstanceHistory.task_definition_id, literal('Completed'), TaskInstanceHistory.due_date, TaskInstanceHistory.completion_date)
+    ).subquery()
+    query = select(
+        TaskDefinition.asset_id,
+        func.max(case((resolved.c.status == 'Completed', resolved.c.completion_date))).label('last_completed'),
+        func.min(case((resolved.c.status == 'Pending', resolved.c.due_date))).label('next_due'),
+        func.count(case((resolved.c.status == 'Overdue', 1))).label('overdue_count')
+    ).join(resolved, resolved.c.task_definition_id == TaskDefinition.id).group_by(TaskDefinition.asset_id)
+    if asset_ids is None:
+        query = query.where(TaskDefinition.asset_id.is_not(None))
+    else:
+        query = query.where(TaskDefinition.asset_id.in_(asset_ids))
+    return {
+        row.asset_id: {
+            'last_completed': row.last_completed.isoformat() if row.last_completed else None,
+            'next_due': row.next_due.isoformat() if row.next_due else None,
+            'overdue_count': row.overdue_count
+        }
+        for row in db.session.execute(query)
+    }
+
+def status_for_due_date(due_date):
+    """Status a not-yet-completed instance should have for its due date."""
+    start_of_today = datetime.combine(date.today(), datetime.min.time())
+    return 'Overdue' if due_date.replace(tzinfo=None) < start_of_today else 'Pending'
+
+def mark_overdue_instances():
+    """
+    Moves Pending instances due before today to Overdue with a single UPDATE, which the
+    (status, due_date) index turns into a range scan. Returns the number of rows changed.
+    """
+    start_of_today = datetime.combine(date.today(), datetime.min.time())
+    return TaskInstance.query.filter(
+        TaskInstance.status == 'Pending',
+        TaskInstance.due_date < start_of_today
+    ).update({TaskInstance.status: 'Overdue'}, synchronize_session=False)
+
+def ensure_overdue_marked():
+    """
+    Runs mark_overdue_instances at most once per day per process, so reads can apply the
+    transition lazily (e.g. after the Pi was off at midnight) at the cost of a date comparison.
+    """
+    today = date.today()
+    if current_app.extensions.get('overdue_marked_on') == today:
+        return
+    if mark_overdue_instances():
+        db.session.commit()
+    else:
+        db.session.rollback() # Nothing to mark; don't carry the UPDATE's transaction into the request
+    current_app.extensions['overdue_marked_on'] = today
+
+def archive_completed_instances(older_than_days=None, batch_size=None):
+    """
+    Moves instances completed more than older_than_days ago from task_instance into
+    task_instance_history, batch_size rows per transaction (INSERT ... SELECT, then DELETE).
+    Returns the number of instances archived.
+    """
+    older_than_days = older_than_days if older_than_days is not None else current_app.config['ARCHIVE_COMPLETED_AFTER_DAYS']
+    batch_size = batch_size or current_app.config['ARCHIVE_BATCH_SIZE']
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    archived = 0
+    while True:
+        ids = db.session.execute(
+            select(TaskInstance.id).where(
+                TaskInstance.status == 'Completed',
+                TaskInstance.completion_date < cutoff
+            ).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(
+            insert(TaskInstanceHistory).from_select(
+                ['instance_id', 'task_definition_id', 'due_date', 'completion_date'],
+                select(TaskInstance.id, TaskInstance.task_definition_id, TaskInstance.due_date, TaskInstance.completion_date)
+                .where(TaskInstance.id.in_(ids))
+            )
+        )
+        TaskInstance.query.filter(TaskInstance.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        archived += len(ids)
+    return archived
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from flask import current_app
+
+class SettingsCache:
+    """
+    Process-local copy of the Setting table. The table is read once and values are served from
+    memory afterwards. Writers call invalidate() after committing; besides dropping this copy it
+    touches a version file whose mtime every process checks (a stat, no DB query) before serving,
+    so all gunicorn workers pick the change up on their next read.
+    """
+
+    def __init__(self, version_file):
+        self.version_file = version_file
+        self._values = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _file_version(self):
+        try:
+            return os.stat(self.version_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        from models.models import Setting # Imported lazily: models import app_init
+        version = self._file_version() # Read before loading so a concurrent write forces another reload
+        self._values = {s.key: s.value for s in Setting.query.all()}
+        self._version = version
+
+    def all(self):
+        """Returns the raw {key: value} string map."""
+        values = self._values
+        if values is None or self._file_version() != self._version:
+            with self._lock:
+                self._load()
+                values = self._values
+        return values
+
+    def get_int(self, key, default_value):
+        value = self.all().get(key)
+        if value is None:
+            return default_value
+        try:
+            return int(value) # Assuming numeric settings for now
+        except ValueError:
+            return default_value # Fallback if value is not an int
+
+    def invalidate(self):
+        """Call after committing a change to the Setting table."""
+        self._values = None
+        os.makedirs(os.path.dirname(self.version_file), exist_ok=True)
+        with open(self.version_file, 'w') as f:
+            f.write(str(time.time_ns())) # Content is informational; readers compare the mtime
+
+def init_settings_cache(app):
+    version_file = app.config.get('SETTINGS_VERSION_FILE') or os.path.join(app.instance_path, 'settings.version')
+    app.extensions['settings_cache'] = SettingsCache(version_file)
+
+def get_settings_cache():
+    return current_app.extensions['settings_cache']
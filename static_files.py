@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import click
+from flask import Response, current_app, jsonify, request
+from compression import COMPRESSIBLE_TYPES
+
+try:
+    import brotli
+except ImportError: # Optional dependency; without it `flask compress-static` only writes .gz files
+    brotli = None
+
+# Pre-built variants served when the client accepts them, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Vite writes bundle files as assets/<name>-<content hash>.<ext>; a name never changes content
+HASHED_NAME = re.compile(r'(^|/)assets/[^/]+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MIN_COMPRESS_SIZE = 1024 # Smaller files gain too little to be worth a variant
+
+class StaticFile:
+    """One file of the build: its bytes and those of its pre-compressed variants, all in memory."""
+    __slots__ = ('mimetype', 'etag', 'immutable', 'variants')
+
+    def __init__(self, mimetype, content, immutable):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(content).hexdigest()[:20]
+        self.immutable = immutable
+        self.variants = {'identity': content}
+
+class StaticIndex:
+    """
+    The frontend build (app/dist), read once when the app starts: requests are answered from
+    memory without looking at the disk, so a new build needs a restart (as a deploy does anyway).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {}
+        if root and os.path.isdir(root):
+            self._scan()
+
+    def _scan(self):
+        names = set()
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                names.add(os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, '/'))
+        for name in sorted(names):
+            if any(name.endswith(suffix) and name[:-len(suffix)] in names for _, suffix in ENCODINGS):
+                continue # A variant; attached to its file below
+            with open(os.path.join(self.root, name), 'rb') as f:
+                static_file = StaticFile(mimetypes.guess_type(name)[0] or 'application/octet-stream', f.read(),
+                                         bool(HASHED_NAME.search(name)))
+            for encoding, suffix in ENCODINGS:
+                if name + suffix in names:
+                    with open(os.path.join(self.root, name + suffix), 'rb') as f:
+                        static_file.variants[encoding] = f.read()
+            self.files[name] = static_file
+
+    def get(self, path):
+        return self.files.get(path)
+
+def _negotiate(static_file):
+    for encoding, _ in ENCODINGS:
+        if encoding in static_file.variants and request.accept_encodings[encoding]:
+            return encoding
+    return 'identity'
+
+def static_response(static_file):
+    """The file in the best encoding the client accepts, with caching headers; 304 if the client's copy is current."""
+    encoding = _negotiate(static_file)
+    response = Response(static_file.variants[encoding], mimetype=static_file.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    if len(static_file.variants) > 1:
+        response.vary.add('Accept-Encoding')
+    # Each encoding is a different representation, so it gets its own validator
+    response.set_etag(static_file.etag if encoding == 'identity' else f'{static_file.etag}-{encoding}')
+    if static_file.immutable:
+        response.headers['Cache-Control'] = IMMUTABLE
+    else:
+        response.cache_control.no_cache = True # index.html etc.: always revalidate, usually a 304
+    return response.make_conditional(request)
+
+def serve_static(path=''):
+    """
+    Serves the frontend build from the in-memory index. Paths that aren't files are SPA routes
+    and get index.html, except ones that look like files (they'd get HTML in place of e.g. a
+    stale script) and unknown /api/ paths.
+    """
+    index = current_app.extensions['static_index']
+    static_file = index.get(path)
+    if static_file is None:
+        last_segment = path.rsplit('/', 1)[-1]
+        static_file = index.get('index.html') if '.' not in last_segment and not path.startswith('api/') else None
+    if static_file is None:
+        if not index.files:
+            current_app.logger.error(f"Static file not found: {path}. No frontend build in {index.root}.")
+            return jsonify(error="Resource not found or application not fully initialized."), 404
+        return jsonify(error="Resource not found."), 404
+    return static_response(static_file)
+
+def compress_directory(root, gzip_level=9, brotli_quality=11):
+    """
+    Writes .gz (and, with the brotli package, .br) variants next to every compressible file in
+    root, keeping only the ones that come out smaller. Returns (files, variants written).
+    """
+    files = written = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                continue
+            path = os.path.join(directory, filename)
+            mimetype = mimetypes.guess_type(filename)[0] or ''
+            if not mimetype.startswith(COMPRESSIBLE_TYPES) or os.path.getsize(path) < MIN_COMPRESS_SIZE:
+                continue
+            with open(path, 'rb') as f:
+                content = f.read()
+            files += 1
+            variants = {'.gz': gzip.compress(content, compresslevel=gzip_level, mtime=0)} # mtime=0: reproducible output
+            if brotli is not None:
+                variants['.br'] = brotli.compress(content, quality=brotli_quality)
+            for suffix, compressed in variants.items():
+                if len(compressed) < len(content):
+                    with open(path + suffix, 'wb') as f:
+                        f.write(compressed)
+                    written += 1
+                elif os.path.exists(path + suffix):
+                    os.remove(path + suffix) # Stale variant from an earlier build
+    return files, written
+
+def init_static(app):
+    """Indexes STATIC_ROOT (the Vite build) and serves it, with SPA fallback, at / and /<path>."""
+    index = StaticIndex(app.config['STATIC_ROOT'])
+    app.extensions['static_index'] = index
+    if not index.files:
+        app.logger.warning(f"No frontend build found in {index.root}; run `npm run build` in app/.")
+    app.add_url_rule('/', 'serve_static', serve_static, defaults={'path': ''}, methods=['GET'])
+    app.add_url_rule('/<path:path>', 'serve_static', serve_static, methods=['GET'])
+
+    @app.cli.command('compress-static')
+    @click.option('--gzip-level', type=int, default=9)
+    @click.option('--brotli-quality', type=int, default=11)
+    def compress_static_command(gzip_level, brotli_quality):
+        """Pre-compresses the frontend build (run after `npm run build`)."""
+        files, written = compress_directory(app.config['STATIC_ROOT'], gzip_level, brotli_quality)
+        note = '' if brotli is not None else ' (brotli not installed: gzip only)'
+        click.echo(f"{files} file(s) compressed, {written} variant(s) written{note}")
@@ -0,0 +1,56 @@
+from flask import Response, current_app, request, stream_with_context
+from app_init import db
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def wants_stream():
+    """
+    Streaming is opt-in: ?stream=1 streams a JSON array, ?stream=ndjson (or an Accept header
+    preferring application/x-ndjson) streams one JSON document per line.
+    """
+    return request.args.get('stream') in ('1', 'true', 'ndjson') or wants_ndjson()
+
+def wants_ndjson():
+    return (request.args.get('stream') == 'ndjson' or
+            request.accept_mimetypes.best_match([NDJSON_MIMETYPE, 'application/json']) == NDJSON_MIMETYPE)
+
+def yield_rows(query):
+    """
+    Runs query in chunks of STREAM_CHUNK_SIZE rows on the session that is current when called.
+    A query built in the view is bound to the view's session, which Flask-SQLAlchemy closes when
+    the view returns; iterating it later would check out a connection that nothing gives back.
+    """
+    return query.with_session(db.session()).yield_per(current_app.config['STREAM_CHUNK_SIZE'])
+
+def stream_json(items, serialize):
+    """
+    Streams serialize(item) for each item as the body is sent, so peak memory stays at one
+    chunk of rows regardless of how many there are. items is a callable returning the
+    (lazy) iterable, e.g. lambda: yield_rows(query); it is called once streaming starts.
+    """
+    ndjson = wants_ndjson()
+    dumps = current_app.json.dumps
+    chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+
+    def generate():
+        buffer = []
+        first = True
+        if not ndjson:
+            yield '['
+        for item in items():
+            buffer.append(dumps(serialize(item)))
+            if len(buffer) >= chunk_size:
+                yield _join(buffer, ndjson, first)
+                buffer, first = [], False
+        if buffer:
+            yield _join(buffer, ndjson, first)
+        if not ndjson:
+            yield ']'
+
+    return Response(stream_with_context(generate()),
+                    mimetype=NDJSON_MIMETYPE if ndjson else 'application/json')
+
+def _join(encoded, ndjson, first):
+    if ndjson:
+        return '\n'.join(encoded) + '\n'
+    return ('' if first else ',') + ','.join(encoded)
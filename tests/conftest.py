@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# run.py builds its app from Config at import time, so point it at a throwaway database first
+_tmpdir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmpdir, 'test.db')
+os.environ['STATIC_ROOT'] = _tmpdir
+os.environ['SCHEDULER_ENABLED'] = '0'
+
+from run import app as flask_app, bootstrap_settings, db
+from search import SEARCH_SOURCES
+
+@pytest.fixture
+def app():
+    """The run.py app on an empty, bootstrapped database (rebuilt for every test)."""
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+        with db.engine.begin() as connection:
+            # The FTS tables aren't in the metadata; drop them so create_all() rebuilds them empty
+            for fts, _ in SEARCH_SOURCES.values():
+                connection.execute(text(f'DROP TABLE IF EXISTS {fts}'))
+        db.create_all()
+        bootstrap_settings()
+        flask_app.extensions.pop('overdue_marked_on', None) # Mark overdue instances again on the new data
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
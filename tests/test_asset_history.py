@@ -0,0 +1,46 @@
+import json
+from datetime import datetime, timedelta
+
+from app_init import db
+from models.models import Asset, Category, TaskDefinition, TaskInstance, TaskInstanceHistory
+
+def seed():
+    """An asset's completed instances: dated, archived, and two without a completion date."""
+    asset = Asset(name='Boiler')
+    task_def = TaskDefinition(title='Service boiler', defined_category=Category(short_name='house', icon='*'), asset=asset)
+    start = datetime(2030, 1, 1)
+    live = [TaskInstance(defined_task=task_def, due_date=start + timedelta(days=10 * n), status='Completed',
+                         completion_date=None if n in (1, 3) else start + timedelta(days=10 * n + 2))
+            for n in range(5)]
+    live.append(TaskInstance(defined_task=task_def, due_date=start + timedelta(days=60), status='Pending'))
+    db.session.add_all([asset, task_def, *live])
+    db.session.flush()
+    archived = [TaskInstanceHistory(instance_id=1000 + n, task_definition_id=task_def.id, due_date=start - timedelta(days=10 * n),
+                                    completion_date=start - timedelta(days=10 * n - 1)) for n in range(1, 4)]
+    db.session.add_all(archived)
+    db.session.commit()
+    return asset.id
+
+def test_completed_instances_without_a_completion_date_sort_by_due_date(app, client):
+    asset_id = seed()
+    url = f'/api/assets/{asset_id}/completed_task_instances'
+
+    response = client.get(url)
+    assert response.status_code == 200
+    history = response.get_json()
+    assert len(history) == 8
+    sort_keys = [entry['completion_date'] or entry['due_date'] for entry in history]
+    assert sort_keys == sorted(sort_keys, reverse=True)
+
+    streamed = client.get(url + '?stream=ndjson').get_data(as_text=True)
+    assert [json.loads(line) for line in streamed.splitlines() if line] == history
+
+    pages, cursor = [], None
+    while True:
+        page = client.get(url + '?limit=3' + (f'&cursor={cursor}' if cursor else ''))
+        assert page.status_code == 200
+        pages += page.get_json()
+        cursor = page.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert pages == history
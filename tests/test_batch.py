@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from app_init import db
+from models.models import Category, TaskDefinition, TaskInstance
+
+def seed(due_dates):
+    task_def = TaskDefinition(title='Clean gutters', defined_category=Category(short_name='house', icon='*'))
+    instances = [TaskInstance(defined_task=task_def, due_date=due_date, status='Pending') for due_date in due_dates]
+    db.session.add_all([task_def, *instances])
+    db.session.commit()
+    return [instance.id for instance in instances]
+
+def test_conflicting_reschedule_fails_alone(app, client):
+    days = [datetime(2031, 1, day) for day in (1, 8, 15, 22)]
+    first, second, third, fourth = seed(days)
+    free_day = datetime(2031, 2, 1)
+
+    response = client.post('/api/task_instances/batch', json={'operations': [
+        {'id': first, 'op': 'reschedule', 'due_date': days[1].isoformat()}, # Taken by second
+        {'id': second, 'op': 'complete'},
+        {'id': third, 'op': 'reschedule', 'due_date': free_day.isoformat()},
+        {'id': fourth, 'op': 'reschedule', 'due_date': free_day.isoformat()} # Taken by third in this batch
+    ]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [result['result'] for result in body['results']] == ['error', 'ok', 'ok', 'error']
+    assert body['applied'] == 2
+    due = {instance.id: (instance.due_date, instance.status) for instance in TaskInstance.query}
+    assert due == {first: (days[0], 'Pending'),
+                   second: (days[1], 'Completed'), third: (free_day, 'Pending'), fourth: (days[3], 'Pending')}
+
+def test_reschedule_onto_a_date_freed_in_the_same_batch(app, client):
+    due_date = datetime.now().replace(microsecond=0) + timedelta(days=30)
+    kept, deleted = seed([due_date - timedelta(days=7), due_date])
+
+    response = client.post('/api/task_instances/batch', json={'operations': [
+        {'id': kept, 'op': 'reschedule', 'due_date': due_date.isoformat()},
+        {'id': deleted, 'op': 'delete'}
+    ]})
+
+    assert [result['result'] for result in response.get_json()['results']] == ['ok', 'ok']
+    assert [(instance.id, instance.due_date) for instance in TaskInstance.query] == [(kept, due_date)]
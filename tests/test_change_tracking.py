@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from app_init import db
+from change_tracking import get_current_version
+from models.models import Category, TaskDefinition, TaskInstance
+from services import archive_completed_instances
+
+def seed(*instances):
+    """One definition with instances given as (due_date, status, completion_date); returns their ids."""
+    task_def = TaskDefinition(title='Water plants', defined_category=Category(short_name='garden', icon='*'))
+    rows = [TaskInstance(defined_task=task_def, due_date=due_date, status=status, completion_date=completed)
+            for due_date, status, completed in instances]
+    db.session.add_all([task_def, *rows])
+    db.session.commit()
+    return task_def.id, [row.id for row in rows]
+
+def changes_since(client, version):
+    response = client.get(f'/api/changes?since={version}')
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_version_seen_by_a_read_is_not_reused_by_the_next_write(app, client):
+    # Nothing is overdue, so the day's first read marks no rows and must not hand out a version
+    _, (instance_id,) = seed((datetime.now() + timedelta(days=3), 'Pending', None))
+    version = client.get('/api/bootstrap').get_json()['version']
+    assert client.put(f'/api/task_instances/{instance_id}/complete').status_code == 200
+
+    changes = changes_since(client, version)
+    assert [instance['id'] for instance in changes['task_instances']] == [instance_id]
+    assert changes['version'] > version
+
+def test_overdue_marking_is_reported_as_a_change(app, client):
+    _, (overdue_id, pending_id) = seed((datetime.now() - timedelta(days=2), 'Pending', None),
+                                       (datetime.now() + timedelta(days=2), 'Pending', None))
+    version = get_current_version()
+
+    changes = changes_since(client, version) # This read runs the day's overdue marking first
+    assert [(instance['id'], instance['status']) for instance in changes['task_instances']] == [(overdue_id, 'Overdue')]
+    assert changes_since(client, changes['version'])['task_instances'] == []
+    assert pending_id not in [instance['id'] for instance in changes['task_instances']]
+
+def test_archiving_leaves_tombstones(app, client):
+    long_ago = datetime.now() - timedelta(days=800)
+    _, (archived_id, kept_id) = seed((long_ago, 'Completed', long_ago),
+                                     (datetime.now() + timedelta(days=1), 'Pending', None))
+    client.get('/api/bootstrap') # Today's overdue marking out of the way
+    version = get_current_version()
+
+    assert archive_completed_instances(older_than_days=365) == 1
+    changes = changes_since(client, version)
+    assert changes['deleted'] == {'task_instance': [str(archived_id)]}
+    assert changes['task_instances'] == []
+    assert db.session.get(TaskInstance, kept_id) is not None
+
+def test_deleting_a_definition_leaves_tombstones_for_it_and_its_instances(app, client):
+    task_def_id, instance_ids = seed((datetime.now() + timedelta(days=1), 'Pending', None),
+                                     (datetime.now() + timedelta(days=8), 'Pending', None))
+    version = client.get('/api/bootstrap').get_json()['version']
+
+    assert client.delete(f'/api/task_definitions/{task_def_id}').status_code == 200
+    deleted = changes_since(client, version)['deleted']
+    assert deleted['task_definition'] == [str(task_def_id)]
+    assert sorted(deleted['task_instance']) == sorted(str(id) for id in instance_ids)
+    assert changes_since(client, changes_since(client, version)['version'])['deleted'] == {}
@@ -0,0 +1,105 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app_init import db
+from models.models import Asset, Category, TaskDefinition, TaskInstance, TaskInstanceHistory
+from services import archive_completed_instances
+
+GROUP_BYS = [(), ('category',), ('asset',), ('category', 'asset')]
+TODAY = date.today()
+FROM, TO = TODAY - timedelta(days=120), TODAY + timedelta(days=120)
+
+def direct_statistics(period, group_by):
+    """What /api/statistics/completions should report, aggregated straight from the instances."""
+    rows = [(td.category_short_name, td.asset_id, i.status, i.due_date, i.completion_date)
+            for i, td in db.session.query(TaskInstance, TaskDefinition).join(TaskInstance.defined_task)
+            .filter(TaskInstance.status.in_(['Completed', 'Skipped']))]
+    rows += [(td.category_short_name, td.asset_id, 'Completed', h.due_date, h.completion_date)
+             for h, td in db.session.query(TaskInstanceHistory, TaskDefinition)
+             .join(TaskDefinition, TaskInstanceHistory.task_definition_id == TaskDefinition.id)]
+    totals = defaultdict(Counter)
+    for category, asset_id, status, due_date, completion_date in rows:
+        start = due_date.date() if period == 'day' else due_date.date().replace(day=1)
+        if not (FROM.replace(day=1) if period == 'month' else FROM) <= start <= TO:
+            continue
+        groups = {'category': category, 'asset': asset_id}
+        key = (start.isoformat(), *(groups[field] for field in group_by))
+        if status == 'Skipped':
+            totals[key]['skipped'] += 1
+            continue
+        totals[key]['completed'] += 1
+        days_late = (completion_date.date() - due_date.date()).days
+        totals[key]['late' if days_late > 0 else 'on_time'] += 1
+        totals[key]['lateness_days'] += max(days_late, 0)
+    return {key: {name: counters[name] for name in ('completed', 'on_time', 'late', 'lateness_days', 'skipped')}
+            for key, counters in totals.items()}
+
+def reported_statistics(client, period, group_by):
+    response = client.get(f"/api/statistics/completions?period={period}&from={FROM}&to={TO}&group_by={','.join(group_by)}")
+    assert response.status_code == 200
+    return {(row['period_start'], *(row[field] for field in group_by)):
+            {name: row[name] for name in ('completed', 'on_time', 'late', 'lateness_days', 'skipped')}
+            for row in response.get_json()['rows']}
+
+def assert_rollups_match(client):
+    for period in ('day', 'month'):
+        for group_by in GROUP_BYS:
+            expected = direct_statistics(period, group_by)
+            assert reported_statistics(client, period, group_by) == expected, (period, group_by)
+    return expected
+
+@pytest.fixture
+def instance_ids(app):
+    """Three definitions (one without an asset) with instances due over the past and next two months."""
+    garden, house = Category(short_name='garden', icon='*'), Category(short_name='house', icon='*')
+    shed, boiler = Asset(name='Shed'), Asset(name='Boiler')
+    definitions = [TaskDefinition(title='Oil hinges', defined_category=garden, asset=shed),
+                   TaskDefinition(title='Bleed radiators', defined_category=house, asset=boiler),
+                   TaskDefinition(title='Sweep', defined_category=house)]
+    start = datetime.combine(TODAY, datetime.min.time())
+    instances = [TaskInstance(defined_task=task_def, due_date=start + timedelta(days=offset), status='Pending')
+                 for task_def in definitions for offset in (-45, -10, -3, 0, 5, 40)]
+    db.session.add_all([garden, house, shed, boiler, *definitions, *instances])
+    db.session.commit()
+    return [instance.id for instance in instances]
+
+def batch(client, *operations):
+    response = client.post('/api/task_instances/batch', json={'operations': list(operations)})
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_rollups_follow_complete_skip_unskip_and_delete(client, instance_ids):
+    assert_rollups_match(client)
+    for instance_id in instance_ids[::2]: # Late, on time and early completions
+        assert client.put(f'/api/task_instances/{instance_id}/complete').status_code == 200
+    assert sum(counters['late'] for counters in assert_rollups_match(client).values()) > 0
+
+    batch(client, *({'id': instance_id, 'op': 'skip'} for instance_id in instance_ids[1::4]))
+    batch(client, {'id': instance_ids[2], 'op': 'complete'}) # Already completed: unchanged
+    assert_rollups_match(client)
+
+    # Undoing a resolution: a rescheduled skipped instance is open again
+    new_date = datetime.combine(TODAY + timedelta(days=60), datetime.min.time())
+    batch(client, {'id': instance_ids[1], 'op': 'reschedule', 'due_date': new_date.isoformat()})
+    assert_rollups_match(client)
+
+    batch(client, {'id': instance_ids[0], 'op': 'delete'}, {'id': instance_ids[5], 'op': 'delete'},
+          {'id': instance_ids[3], 'op': 'complete'})
+    assert_rollups_match(client)
+
+def test_rollups_follow_definition_moves_archiving_and_deletes(client, instance_ids):
+    batch(client, *({'id': instance_id, 'op': 'complete' if n % 3 else 'skip'} for n, instance_id in enumerate(instance_ids)))
+    assert_rollups_match(client)
+
+    oil_hinges, radiators, sweep = (task_def.id for task_def in TaskDefinition.query.order_by(TaskDefinition.id))
+    assert client.put(f'/api/task_definitions/{oil_hinges}', json={'category_short_name': 'house', 'asset_id': None}).status_code == 200
+    assert client.put(f'/api/task_definitions/{sweep}', json={'asset_id': Asset.query.filter_by(name='Shed').one().id}).status_code == 200
+    assert_rollups_match(client)
+
+    assert archive_completed_instances(older_than_days=-1) > 0 # Everything completed so far moves to history
+    assert_rollups_match(client)
+
+    assert client.delete(f'/api/task_definitions/{radiators}').status_code == 200
+    assert_rollups_match(client)
@@ -0,0 +1,21 @@
+from app_init import db
+from models.models import Category
+
+def test_etag_depends_on_representation(app, client):
+    with app.app_context():
+        db.session.add(Category(short_name='garden', icon='*'))
+        db.session.commit()
+
+    as_json = client.get('/api/categories')
+    as_ndjson = client.get('/api/categories', headers={'Accept': 'application/x-ndjson'})
+    assert 'Accept' in as_json.vary and 'Accept' in as_ndjson.vary
+    assert as_json.headers['ETag'] != as_ndjson.headers['ETag']
+    assert client.get('/api/task_definitions?stream=ndjson').headers['ETag'] != \
+        client.get('/api/task_definitions').headers['ETag']
+
+    # A JSON ETag doesn't validate a request for NDJSON, only one for JSON
+    etag = as_json.headers['ETag']
+    revalidated = client.get('/api/categories', headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304 and 'Accept' in revalidated.vary
+    assert client.get('/api/categories', headers={'If-None-Match': etag,
+                                                  'Accept': 'application/x-ndjson'}).status_code == 200
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+import pytest
+
+from app_init import create_app
+from config import Config
+from instrumentation import percentile
+
+def make_app(token=None):
+    class InstrumentedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'instrumentation.db')
+        SCHEDULER_ENABLED = False
+        INSTRUMENTATION_ENABLED = True
+        INSTRUMENTATION_TOKEN = token
+    return create_app(InstrumentedConfig)
+
+def profiled(client, **kwargs):
+    return 'X-Profile-Id' in client.get('/api/debug/metrics?_profile=1', **kwargs).headers
+
+@pytest.mark.parametrize('remote_addr', ['127.0.0.1', '::1'])
+def test_debug_endpoints_answer_local_requests(remote_addr):
+    client = make_app().test_client()
+    environ = {'REMOTE_ADDR': remote_addr}
+    assert profiled(client, environ_base=environ)
+    assert client.get('/api/debug/metrics', environ_base=environ).status_code == 200
+
+def test_debug_endpoints_hidden_from_remote_and_proxied_requests():
+    client = make_app().test_client()
+    for kwargs in ({'environ_base': {'REMOTE_ADDR': '192.168.1.20'}},
+                   {'environ_base': {'REMOTE_ADDR': '127.0.0.1'}, 'headers': {'X-Forwarded-For': '192.168.1.20'}}):
+        assert not profiled(client, **kwargs)
+        assert client.get('/api/debug/metrics', **kwargs).status_code == 404
+
+def test_token_required_when_configured():
+    client = make_app(token='s3cret').test_client()
+    local = {'REMOTE_ADDR': '127.0.0.1'}
+    assert client.get('/api/debug/metrics', environ_base=local).status_code == 404
+    assert client.get('/api/debug/metrics', headers={'X-Debug-Token': 'wrong'}).status_code == 404
+    remote = {'environ_base': {'REMOTE_ADDR': '192.168.1.20'}, 'headers': {'X-Debug-Token': 's3cret'}}
+    assert profiled(client, **remote)
+    assert client.get('/api/debug/metrics', **remote).status_code == 200
+
+@pytest.mark.parametrize('values, pct, expected', [
+    ([1, 2], 50, 1), # pct/100*n is an odd integer: must not round half to even
+    ([1, 2, 3, 4, 5, 6], 50, 3),
+    ([1, 2, 3, 4], 75, 3),
+    ([1, 2, 3], 50, 2),
+    (list(range(1, 101)), 7, 7), # 0.07 * 100 isn't exactly 7 in floating point
+    (list(range(1, 101)), 95, 95),
+    (list(range(1, 101)), 99, 99),
+    (list(range(1, 11)), 99, 10),
+    ([5], 0, 5),
+    ([1, 2, 3], 100, 3)
+])
+def test_percentile_is_nearest_rank(values, pct, expected):
+    assert percentile(values, pct) == expected
+
+def test_percentile_of_no_values():
+    assert percentile([], 50) is None
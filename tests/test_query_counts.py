@@ -0,0 +1,58 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app_init import db
+from models.models import Asset, Category, RecurrenceRule, TaskDefinition, TaskInstance
+
+@contextmanager
+def count_queries():
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def seed(first, count):
+    # count definitions, each with its own category, asset, rule and a few instances
+    start = datetime(2030, 1, 1)
+    for i in range(first, first + count):
+        category = Category(short_name=f'cat{i}', icon='*')
+        asset = Asset(name=f'Asset {i}')
+        task_def = TaskDefinition(title=f'Task {i}', defined_category=category, asset=asset)
+        db.session.add_all([category, asset, task_def,
+                            RecurrenceRule(task_definition=task_def, rule_type='weekly', weekly_recurring_day=i % 7)])
+        db.session.add_all([TaskInstance(defined_task=task_def, due_date=start + timedelta(days=7 * n), status='Pending')
+                            for n in range(3)])
+    db.session.commit()
+
+def queries_for(client, path):
+    client.get(path) # Warm up: once-a-day overdue marking, settings cache
+    db.session.remove() # No identity map left from seeding
+    with count_queries() as statements:
+        response = client.get(path)
+        assert response.status_code == 200
+    return len(statements), len(response.get_json())
+
+@pytest.mark.parametrize('path', ['/api/task_instances', '/api/task_definitions'])
+def test_list_query_count_does_not_grow_with_rows(client, path):
+    seed(0, 5)
+    small, small_rows = queries_for(client, path)
+    seed(5, 45)
+    large, large_rows = queries_for(client, path)
+    assert large_rows > small_rows
+    assert large == small
+
+@pytest.mark.parametrize('model', [TaskInstance, TaskDefinition])
+def test_query_with_details_to_dict_is_one_query(app, model):
+    seed(0, 20)
+    db.session.remove()
+    with count_queries() as statements:
+        rows = [row.to_dict() for row in model.query_with_details().all()]
+    assert len(rows) >= 20
+    assert len(statements) == 1
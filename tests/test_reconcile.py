@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+
+from app_init import db
+from models.models import TaskInstance
+
+def day(offset):
+    today = date.today()
+    return datetime(today.year, today.month, today.day) + timedelta(days=offset)
+
+def instances(task_definition_id):
+    return {(i.due_date, i.status) for i in TaskInstance.query.filter_by(task_definition_id=task_definition_id)}
+
+def test_recurring_to_one_off_keeps_past_overdue_instances(client):
+    definition_id = client.post('/api/task_definitions', json={
+        'title': 'Water plants', 'recurrence_rule': {'rule_type': 'daily'}
+    }).get_json()['id']
+    # Missed occurrences of the daily schedule
+    db.session.add_all([
+        TaskInstance(task_definition_id=definition_id, due_date=day(-10), occurrence_date=day(-10), status='Overdue'),
+        TaskInstance(task_definition_id=definition_id, due_date=day(-3), occurrence_date=day(-3), status='Overdue')
+    ])
+    db.session.commit()
+    before = instances(definition_id)
+    kept = {(due_date, status) for due_date, status in before if due_date <= datetime.utcnow()} # Incl. today's
+    future = before - kept
+    assert future
+
+    response = client.put(f'/api/task_definitions/{definition_id}', json={
+        'due_date': day(7).isoformat(), 'recurrence_rule': None
+    })
+    assert response.status_code == 200
+    changes = response.get_json()['instance_changes']
+
+    assert {(day(-10), 'Overdue'), (day(-3), 'Overdue')} <= kept
+    assert instances(definition_id) == kept | {(day(7), 'Pending')}
+    assert changes['rescheduled'] == 1 # One future instance moved to the new date
+    assert changes['deleted'] == len(future) - 1
+    assert changes['unchanged'] == 0
+
+def test_one_off_due_date_edit_moves_its_overdue_instance(client):
+    definition_id = client.post('/api/task_definitions', json={
+        'title': 'Renew insurance', 'due_date': day(-5).isoformat()
+    }).get_json()['id']
+    [instance] = TaskInstance.query.filter_by(task_definition_id=definition_id).all()
+    assert instance.status == 'Overdue'
+
+    response = client.put(f'/api/task_definitions/{definition_id}', json={'due_date': day(5).isoformat()})
+    assert response.status_code == 200
+
+    [moved] = TaskInstance.query.filter_by(task_definition_id=definition_id).all()
+    assert moved.id == instance.id
+    assert (moved.due_date, moved.status) == (day(5), 'Pending')
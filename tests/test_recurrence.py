@@ -0,0 +1,82 @@
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+import pytest
+
+import recurrence
+from recurrence import (LAST_DAY_OF_MONTH, MAX_CACHED_WINDOW_MONTHS, Recurrence, add_months, expand, occurrences,
+                        parse_recurrence_fields)
+
+def dates(rec, start, end):
+    return list(occurrences(rec, start, end))
+
+@pytest.mark.parametrize('month_day, expected', [
+    (31, [date(2031, 1, 31), date(2031, 2, 28), date(2031, 3, 31), date(2031, 4, 30)]),
+    (30, [date(2031, 1, 30), date(2031, 2, 28), date(2031, 3, 30), date(2031, 4, 30)]),
+    (LAST_DAY_OF_MONTH, [date(2031, 1, 31), date(2031, 2, 28), date(2031, 3, 31), date(2031, 4, 30)])
+])
+def test_monthly_days_past_the_end_of_a_month_fall_on_its_last_day(month_day, expected):
+    assert dates(Recurrence('monthly', month_day=month_day), date(2031, 1, 1), date(2031, 4, 30)) == expected
+
+def test_monthly_last_day_in_a_leap_february():
+    assert dates(Recurrence('monthly', month_day=LAST_DAY_OF_MONTH), date(2032, 2, 1), date(2032, 2, 29)) == [date(2032, 2, 29)]
+
+def test_annual_29_february_falls_on_the_28th_outside_leap_years():
+    rec = Recurrence('annual', month_day=29, month=2)
+    assert dates(rec, date(2031, 1, 1), date(2033, 12, 31)) == [date(2031, 2, 28), date(2032, 2, 29), date(2033, 2, 28)]
+
+def test_biweekly_rule_on_several_weekdays():
+    rec = Recurrence('weekly', interval=2, weekdays=(1, 4), start=date(2031, 1, 6)) # A Monday
+    assert dates(rec, date(2031, 1, 1), date(2031, 2, 1)) == [
+        date(2031, 1, 6), date(2031, 1, 9), date(2031, 1, 20), date(2031, 1, 23)
+    ]
+    # Starting the window mid-series keeps the same weeks
+    assert dates(rec, date(2031, 1, 14), date(2031, 1, 31)) == [date(2031, 1, 20), date(2031, 1, 23)]
+
+def test_start_and_end_dates_bound_the_series_inclusively():
+    rec = Recurrence('daily', interval=3, start=date(2031, 5, 10), end=date(2031, 5, 22))
+    assert dates(rec, date(2031, 5, 1), date(2031, 6, 30)) == [
+        date(2031, 5, 10), date(2031, 5, 13), date(2031, 5, 16), date(2031, 5, 19), date(2031, 5, 22)
+    ]
+    assert dates(rec, date(2031, 5, 23), None) == []
+    assert dates(Recurrence('daily', end=date(2031, 5, 1)), date(2031, 5, 2), date(2031, 5, 9)) == []
+
+@pytest.mark.parametrize('months', [1, MAX_CACHED_WINDOW_MONTHS - 1, MAX_CACHED_WINDOW_MONTHS, MAX_CACHED_WINDOW_MONTHS + 1])
+@pytest.mark.parametrize('rec', [
+    Recurrence('daily', interval=2, start=date(2030, 12, 30)),
+    Recurrence('weekly', interval=3, weekdays=(2, 6), start=date(2031, 1, 1)),
+    Recurrence('monthly', month_day=LAST_DAY_OF_MONTH, end=date(2032, 8, 31)),
+    Recurrence('annual', month_day=29, month=2)
+])
+def test_expand_matches_occurrences_on_both_sides_of_the_cache_limit(rec, months):
+    recurrence._month_window.cache_clear()
+    start = date(2031, 3, 17)
+    end = add_months(start, months) - timedelta(days=1)
+    assert expand(rec, start, end) == tuple(occurrences(rec, start, end))
+    assert expand(rec, start, end, 3) == tuple(islice(occurrences(rec, start, end), 3))
+    assert expand(rec, start, None, 5) == tuple(islice(occurrences(rec, start, None), 5))
+    cached = recurrence._month_window.cache_info().currsize
+    assert cached == (1 if add_months(start.replace(day=1), MAX_CACHED_WINDOW_MONTHS) > end else 0)
+
+def test_interval_rules_without_a_start_date_start_on_the_default():
+    today = datetime(2031, 3, 5)
+    assert parse_recurrence_fields({'rule_type': 'weekly', 'interval': 2, 'weekly_recurring_day': 3},
+                                   default_start=today)['start_date'] == today
+    assert parse_recurrence_fields({'rule_type': 'weekly', 'interval': 1, 'weekly_recurring_day': 3},
+                                   default_start=today)['start_date'] is None
+    given = {'rule_type': 'daily', 'interval': 2, 'start_date': '2031-01-01'}
+    assert parse_recurrence_fields(given, default_start=today)['start_date'] == datetime(2031, 1, 1)
+
+def test_new_biweekly_definition_starts_this_week(app, client):
+    today = date.today()
+    assert client.post('/api/categories', json={'short_name': 'garden', 'icon': '*'}).status_code == 201
+    response = client.post('/api/task_definitions', json={
+        'title': 'Mow the lawn', 'category_short_name': 'garden',
+        'recurrence_rule': {'rule_type': 'weekly', 'interval': 2, 'weekly_recurring_day': today.isoweekday()}
+    })
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['recurrence_rule']['start_date'] == datetime.combine(today, datetime.min.time()).isoformat()
+    instances = client.get(f"/api/task_instances?task_definition_id={response.get_json()['id']}").get_json()
+    assert [instance['due_date'][:10] for instance in instances[:2]] == [
+        today.isoformat(), (today + timedelta(weeks=2)).isoformat()
+    ]
@@ -0,0 +1,86 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+DEFINITIONS = 100
+
+def read_during_generation(profile):
+    """
+    Runs in a child process, since run.py builds its app (and SQLite profile) at import time.
+    One thread generates instances for every definition and keeps the transaction open; with a
+    tiny page cache the inserted pages spill to disk mid-transaction, as a large nightly batch
+    does. Meanwhile /api/task_instances is read through the app. Returns what the read saw.
+    """
+    tmpdir = tempfile.mkdtemp()
+    os.environ.update({'DATABASE_URL': 'sqlite:///' + os.path.join(tmpdir, 'profile.db'), 'SQLITE_PROFILE': profile,
+                       'SCHEDULER_ENABLED': '0', 'STATIC_ROOT': tmpdir})
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from datetime import date
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from run import app, bootstrap_settings, db
+    from models.models import Category, RecurrenceRule, TaskDefinition
+    from services import generate_task_instances
+
+    app.config['TESTING'] = True # Let a 'database is locked' error reach us instead of becoming a 500
+    app.extensions['overdue_marked_on'] = date.today() # Keep the read a pure read
+    with app.app_context():
+        db.create_all()
+        bootstrap_settings()
+        category = Category(short_name='home', icon='*')
+        for i in range(DEFINITIONS):
+            task_def = TaskDefinition(title=f'Task {i}', defined_category=category)
+            db.session.add_all([task_def, RecurrenceRule(task_definition=task_def, rule_type='daily')])
+        db.session.commit()
+        pragmas = {name: db.session.execute(text(f'PRAGMA {name}')).scalar_one() for name in ('journal_mode', 'busy_timeout')}
+
+    writing, done_reading = threading.Event(), threading.Event()
+
+    def generate():
+        with app.app_context():
+            db.session.execute(text('PRAGMA cache_size = 10'))
+            for task_def in TaskDefinition.query.all():
+                generate_task_instances(task_def)
+            db.session.flush() # Written, not committed: the write lock is held from here on
+            writing.set()
+            done_reading.wait()
+            db.session.rollback()
+
+    writer = threading.Thread(target=generate)
+    writer.start()
+    writing.wait()
+    started = time.perf_counter()
+    try:
+        response = app.test_client().get('/api/task_instances')
+        result = {'status': response.status_code, 'rows': len(response.get_json())}
+    except OperationalError as e:
+        result = {'error': str(e.orig)}
+    result['elapsed_ms'] = (time.perf_counter() - started) * 1000
+    done_reading.set()
+    writer.join()
+    return {**result, **pragmas}
+
+def run_profile(profile):
+    output = subprocess.run([sys.executable, __file__, profile], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def test_production_profile_reads_are_not_blocked_by_an_open_generation_write():
+    result = run_profile('production')
+    assert result['journal_mode'] == 'wal' and result['busy_timeout'] == 5000
+    assert result['status'] == 200 and result['rows'] == 0 # Sees the last commit, not the pending batch
+    assert result['elapsed_ms'] < 1000 # Well under busy_timeout: it never waited for the lock
+
+def test_default_profile_reads_wait_for_an_open_generation_write():
+    # The rollback journal locks readers out once the writer's pages spill; the read waits for the
+    # driver's 5 s timeout and then fails
+    result = run_profile('default')
+    assert result['journal_mode'] == 'delete'
+    assert 'database is locked' in result.get('error', '')
+    assert result['elapsed_ms'] >= 4000
+
+if __name__ == '__main__':
+    print(json.dumps(read_during_generation(sys.argv[1])))